@@ -0,0 +1,101 @@
+"""
+Token authentication with a cache in front of the Token + User lookup.
+
+Entries sit in a bounded in-process LRU with a TTL and, when
+AUTH_TOKEN_CACHE_ALIAS names a Django cache, in that shared backend as well.
+accounts/signals.py evicts entries on token deletion/rotation and user saves,
+in this process and on the shared backend. With a shared backend, a local
+hit only counts while the shared entry still exists (one existence check,
+no database), so logout and deactivation apply in every process at once.
+Without one, other processes' LRU entries outlive an eviction by up to
+AUTH_TOKEN_CACHE_TTL, which therefore defaults to a few seconds.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCache:
+    """Thread-safe LRU mapping of token key -> (user, token) with a TTL."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = TokenCache(settings.AUTH_TOKEN_CACHE_SIZE, settings.AUTH_TOKEN_CACHE_TTL)
+
+
+def _shared_cache():
+    alias = settings.AUTH_TOKEN_CACHE_ALIAS
+    return caches[alias] if alias else None
+
+
+def _shared_key(key):
+    return f'auth-token:{key}'
+
+
+def evict_token(key):
+    local_cache.delete(key)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.delete(_shared_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for TokenAuthentication. A cache hit costs a dict
+    lookup, plus an existence check on the shared backend when there is one;
+    misses (and invalid tokens) fall through to the database.
+    """
+
+    def authenticate_credentials(self, key):
+        entry = cached = local_cache.get(key)
+        shared = _shared_cache()
+        # Other processes evict from the shared backend only, so it decides whether a local hit stands
+        if shared is not None and (entry is None or not shared.has_key(_shared_key(key))):
+            entry = shared.get(_shared_key(key))
+        if entry is None:
+            entry = super().authenticate_credentials(key)
+            if shared is not None:
+                shared.set(_shared_key(key), entry, settings.AUTH_TOKEN_CACHE_TTL)
+        if entry is not cached:
+            local_cache.set(key, entry)
+
+        user, token = entry
+        # Views may mutate request.user, so never hand out the cached instance
+        return copy.copy(user), token
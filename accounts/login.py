@@ -0,0 +1,129 @@
+"""
+Credential checks for the login endpoint.
+
+A full check runs the password hasher (PBKDF2 by default), which dominates
+the cost of a login. Two things keep that in check:
+
+* Recently verified credentials are remembered under an HMAC of the
+  username and password, keyed with SECRET_KEY. The entry holds the user's
+  pk and an HMAC of the password hash it was verified against, not the hash
+  itself, so a dump of the cache gives nothing to crack offline. A repeat
+  login with the same credentials costs two HMACs and one user lookup, and
+  stops matching as soon as the password (or its hash, on a hasher upgrade)
+  changes or the user is deactivated. Only successful checks are
+  remembered, and without SECRET_KEY an entry is useless for guessing
+  passwords.
+* Full checks hash on a bounded pool of AUTH_HASH_WORKERS threads, so a
+  login flood uses at most that many cores for hashing and queues the rest.
+  hashlib releases the GIL while hashing, so the pool runs in parallel.
+  Only the hashing runs there. The user lookup and any write stay on the
+  request's thread and database connection.
+
+The full check is ModelBackend's: inactive users and unknown usernames are
+refused, and unknown usernames still pay for one hash so they can't be
+told apart by timing. When PASSWORD_HASHERS or the iteration count changes,
+the password is transparently rehashed on the next login, like
+``User.check_password()`` does. The new hash then misses the cache once.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, user_login_failed
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import caches
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .authentication import TokenCache
+
+User = get_user_model()
+
+local_cache = TokenCache(settings.AUTH_LOGIN_CACHE_SIZE, settings.AUTH_LOGIN_CACHE_TTL)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _hash_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=settings.AUTH_HASH_WORKERS, thread_name_prefix='login-hash')
+        return _pool
+
+
+def _shared_cache():
+    alias = settings.AUTH_LOGIN_CACHE_ALIAS
+    return caches[alias] if alias else None
+
+
+def credentials_key(username, password):
+    digest = salted_hmac('accounts.login', f'{username}\0{password}', algorithm='sha256').hexdigest()
+    return f'auth-login:{digest}'
+
+
+def _password_digest(user):
+    return salted_hmac('accounts.login.hash', user.password, algorithm='sha256').hexdigest()
+
+
+def _remember(key, user):
+    entry = (user.pk, _password_digest(user))
+    local_cache.set(key, entry)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.set(key, entry, settings.AUTH_LOGIN_CACHE_TTL)
+
+
+def _recall(key):
+    entry = local_cache.get(key)
+    if entry is None:
+        shared = _shared_cache()
+        if shared is not None:
+            entry = shared.get(key)
+    if entry is None:
+        return None
+    pk, password_digest = entry
+    user = User._default_manager.filter(pk=pk, is_active=True).first()
+    if user is None or not constant_time_compare(_password_digest(user), password_digest):
+        return None
+    return user
+
+
+def _check_password(password, encoded):
+    """(matches, needs rehash); CPU only, run on the hash pool."""
+    outdated = []
+    matches = check_password(password, encoded, setter=lambda raw: outdated.append(True))
+    return matches, bool(outdated)
+
+
+def _full_check(username, password):
+    try:
+        user = User._default_manager.get_by_natural_key(username)
+    except User.DoesNotExist:
+        _hash_pool().submit(make_password, password).result()
+        return None
+    matches, outdated = _hash_pool().submit(_check_password, password, user.password).result()
+    if not matches or not user.is_active:
+        return None
+    if outdated:
+        user.set_password(password)
+        user.save(update_fields=['password'])
+    return user
+
+
+def verify_credentials(request, username, password):
+    """The user these credentials belong to, or None."""
+    if not username or not password:
+        return None
+    key = credentials_key(username, password) if settings.AUTH_LOGIN_CACHE_TTL else None
+    if key is not None:
+        user = _recall(key)
+        if user is not None:
+            return user
+
+    user = _full_check(username, password)
+    if user is None:
+        user_login_failed.send(sender=__name__, credentials={'username': username}, request=request)
+    elif key is not None:
+        _remember(key, user)
+    return user
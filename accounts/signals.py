@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import evict_token
+
+User = get_user_model()
+
+
+# Covers logout (which deletes auth_token) and token rotation
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def evict_changed_token(sender, instance, **kwargs):
+    evict_token(instance.key)
+
+
+# Deactivation, staff changes and the like must not be served from a stale user
+@receiver(post_save, sender=User)
+def evict_user_tokens(sender, instance, **kwargs):
+    for key in Token.objects.filter(user_id=instance.pk).values_list('key', flat=True):
+        evict_token(key)
@@ -1,8 +1,16 @@
-from django.test import TestCase
+from unittest.mock import patch
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import caches
+from django.test import TestCase, override_settings
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from rest_framework.authtoken.models import Token
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from accounts.authentication import local_cache
+from accounts.login import credentials_key, local_cache as login_cache
+from api.throttling import local_buckets
 
 User = get_user_model()
 
@@ -90,3 +98,143 @@ class AccountsAPITests(APITestCase):
         res = self.client.get(f'{self.users_list_url}{self.user.id}/')
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data['username'], 'user')
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        local_cache.clear()
+        self.user = User.objects.create_user(username='bot', email='bot@example.com', password='pass')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_repeat_requests_skip_token_lookup(self):
+        self.client.get('/auth/users/me/')
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get('/auth/users/me/')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('authtoken_token' in query['sql'] for query in queries))
+
+    def test_logout_invalidates_cached_token(self):
+        self.client.get('/auth/users/me/')
+        res = self.client.post('/auth/logout/')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get('/auth/users/me/')
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_invalidates_cached_token(self):
+        self.client.get('/auth/users/me/')
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get('/auth/users/me/')
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_TOKEN_CACHE_ALIAS='api')
+    def test_eviction_in_another_process_reaches_local_hits(self):
+        caches['api'].clear()
+        self.assertEqual(self.client.get('/auth/users/me/').status_code, status.HTTP_200_OK)
+        # Another worker's logout: its signal clears the shared entry, this LRU is untouched
+        Token.objects.filter(pk=self.token.pk)._raw_delete('default')
+        caches['api'].delete(f'auth-token:{self.token.key}')
+        self.assertIsNotNone(local_cache.get(self.token.key))
+        res = self.client.get('/auth/users/me/')
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rotated_token_is_rejected(self):
+        self.client.get('/auth/users/me/')
+        self.token.delete()
+        Token.objects.create(user=self.user)
+        res = self.client.get('/auth/users/me/')
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(API_THROTTLE_RATES={'login': '2/min', 'login-username': '1/min', 'register': '1/hour'})
+class AuthThrottlingTests(APITestCase):
+    def setUp(self):
+        local_buckets.clear()
+        self.user = User.objects.create_user(username='user', email='user@example.com', password='pass')
+        User.objects.create_user(username='other', email='other@example.com', password='pass')
+
+    def attempt(self, username='user', password='wrong', **extra):
+        return self.client.post('/auth/login/', {'username': username, 'password': password}, format='json', **extra)
+
+    def test_login_is_limited_per_ip(self):
+        for username in ('user', 'other'):
+            self.assertEqual(self.attempt(username).status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.attempt('nobody')
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreaterEqual(int(res['Retry-After']), 1)
+        self.assertEqual(res['RateLimit-Remaining'], '0')
+        self.assertEqual(self.attempt('other', 'pass', REMOTE_ADDR='10.0.0.2').status_code, status.HTTP_200_OK)
+
+    @override_settings(API_THROTTLE_RATES={'login': '3/min', 'login-username': '1/min'})
+    def test_login_is_limited_per_username_and_ip(self):
+        self.assertEqual(self.attempt().status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.attempt().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # The address still has login attempts left for other accounts
+        self.assertEqual(self.attempt('other', 'pass').status_code, status.HTTP_200_OK)
+
+    def test_flooded_username_can_still_log_in_from_a_new_ip(self):
+        for n in range(5):
+            self.attempt(REMOTE_ADDR=f'10.0.0.{n}')
+        self.assertEqual(self.attempt(password='pass', REMOTE_ADDR='10.0.1.1').status_code, status.HTTP_200_OK)
+
+    def test_sessions_and_forwarded_headers_dont_bypass_the_limit(self):
+        self.client.force_login(self.user)
+        codes = [
+            self.attempt(username, HTTP_X_FORWARDED_FOR=f'10.1.0.{n}').status_code
+            for n, username in enumerate(['a', 'b', 'c', 'd'])
+        ]
+        self.assertEqual(codes[-1], status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_register_is_limited(self):
+        payload = {'username': 'new', 'email': 'new@example.com', 'password': 'secret'}
+        self.assertEqual(self.client.post('/auth/register/', payload, format='json').status_code, status.HTTP_200_OK)
+        payload['username'] = 'newer'
+        self.assertEqual(self.client.post('/auth/register/', payload, format='json').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class LoginCostTests(APITestCase):
+    def setUp(self):
+        login_cache.clear()
+        self.user = User.objects.create_user(username='user', email='user@example.com', password='pass')
+
+    def login(self, password='pass'):
+        return self.client.post('/auth/login/', {'username': 'user', 'password': password}, format='json')
+
+    def test_repeat_login_skips_password_hashing(self):
+        with patch('accounts.login.check_password', wraps=check_password) as check:
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+            token = self.login().data['token']
+        self.assertEqual(check.call_count, 1)
+        self.assertEqual(token, Token.objects.get(user=self.user).key)
+        # A wrong password never hits the cached entry
+        self.assertEqual(self.login('nope').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cached_entry_does_not_hold_the_password_hash(self):
+        self.login()
+        entry = login_cache.get(credentials_key('user', 'pass'))
+        self.assertEqual(entry[0], self.user.pk)
+        self.assertNotIn(self.user.password, entry)
+
+    def test_password_change_and_deactivation_drop_cached_credentials(self):
+        self.login()
+        self.user.set_password('new-pass')
+        self.user.save()
+        self.assertEqual(self.login().status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.login('new-pass').status_code, status.HTTP_200_OK)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.login('new-pass').status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(PASSWORD_HASHERS=[
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ])
+    def test_outdated_hash_is_upgraded_on_login(self):
+        User.objects.filter(pk=self.user.pk).update(password=make_password('pass', hasher='md5'))
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+
+    def test_unknown_user_is_refused(self):
+        res = self.client.post('/auth/login/', {'username': 'ghost', 'password': 'pass'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
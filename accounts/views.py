@@ -2,8 +2,10 @@ from django.shortcuts import render
 from django.contrib.auth import get_user_model
 from accounts.serializers import RegisterSerializer, UserProfileSerializer, UserSerializer
 from rest_framework.authtoken.models import Token
-from rest_framework.decorators import api_view, permission_classes, authentication_classes
-from rest_framework.authentication import authenticate
+from accounts.authentication import CachedTokenAuthentication
+from accounts.login import verify_credentials
+from rest_framework.decorators import api_view, permission_classes, authentication_classes, throttle_classes
+from api.throttling import LoginThrottle, LoginUsernameThrottle
 from rest_framework import (
     viewsets,
     permissions,
@@ -23,6 +25,7 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = [permissions.AllowAny]
     serializer_class = RegisterSerializer
+    throttle_scope = 'register'
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -42,11 +45,12 @@ class RegisterView(generics.CreateAPIView):
         })
     
 @api_view(['POST'])
+@throttle_classes([LoginThrottle, LoginUsernameThrottle])
 def login(request):
     username=request.data.get('username')
     password=request.data.get('password')
 
-    user = authenticate(username=username, password=password)
+    user = verify_credentials(request, username, password)
 
     if user:
         token, _ = Token.objects.get_or_create(user=user)
@@ -61,7 +65,7 @@ def login(request):
     }, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['POST'])
-@authentication_classes([authentication.TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([permissions.IsAuthenticated])
 def logout(request):
     request.user.auth_token.delete()
@@ -72,7 +76,7 @@ def logout(request):
     }, status=status.HTTP_200_OK)
 
 @api_view(['GET', 'PATCH'])
-@authentication_classes([authentication.TokenAuthentication, authentication.SessionAuthentication])
+@authentication_classes([CachedTokenAuthentication, authentication.SessionAuthentication])
 @permission_classes([permissions.IsAuthenticated])
 def profile(request):
     if request.method == 'GET':
@@ -87,13 +91,13 @@ def profile(request):
         return response.Response(serializer.errors, status=400)
     
 class UserAPIView(generics.ListAPIView):
-    authentication_classes = [authentication.TokenAuthentication, authentication.SessionAuthentication]
+    authentication_classes = [CachedTokenAuthentication, authentication.SessionAuthentication]
     permission_classes = [permissions.IsAdminUser]
     queryset = User.objects.all()
     serializer_class = UserSerializer
 
 class UserAPIDetailView(generics.RetrieveAPIView):
-    authentication_classes = [authentication.TokenAuthentication, authentication.SessionAuthentication]
+    authentication_classes = [CachedTokenAuthentication, authentication.SessionAuthentication]
     permission_classes = [permissions.IsAdminUser]
     queryset = User.objects.all()
     serializer_class = UserSerializer
\ No newline at end of file
@@ -0,0 +1,256 @@
+"""
+Async-native read endpoints for the hottest anonymous traffic, served under
+/api/async/ next to the sync viewsets.
+
+Under ASGI these views never hold a worker while waiting on the database or a
+slow client: every query goes through the async ORM (``aget``, ``aexists``,
+``async for``), and everything else is plain CPU work. Responses have the same
+shape as the sync endpoints; pagination is keyset-based with its own opaque
+cursor, forward only. Authentication, response caching and ETags stay on the
+sync path.
+
+The activity feed and the per-post live stream live here too. The feed's
+long-poll waits with ``asyncio.sleep`` between reads and the stream waits on
+api/pubsub.py; both only free the worker under ASGI.
+"""
+import asyncio
+import base64
+import binascii
+import json
+from collections import deque
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+
+from . import events, pubsub, serializers
+from .models import BugPost, BugSolution, Tag
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _encode_cursor(*values):
+    raw = '|'.join(str(value) for value in values)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor, parts):
+    try:
+        values = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor
+    if len(values) != parts:
+        raise InvalidCursor
+    return values
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get('page_size', settings.API_PAGE_SIZE))
+    except ValueError:
+        size = settings.API_PAGE_SIZE
+    return max(1, min(size, settings.API_MAX_PAGE_SIZE))
+
+
+def _next_url(request, cursor):
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+
+async def _created_at_page(request, queryset):
+    """One page of ``queryset`` newest first, keyset on (created_at, id)."""
+    cursor = request.GET.get('cursor')
+    if cursor:
+        created_at, pk = _decode_cursor(cursor, 2)
+        created_at = parse_datetime(created_at)
+        if created_at is None or not pk.isdigit():
+            raise InvalidCursor
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+    size = _page_size(request)
+    rows = [row async for row in queryset.order_by('-created_at', '-id')[:size + 1]]
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = _encode_cursor(rows[-1].created_at.isoformat(), rows[-1].pk)
+    return rows, next_cursor
+
+
+def _paginated(request, data, next_cursor):
+    return JsonResponse({
+        'next': _next_url(request, next_cursor) if next_cursor else None,
+        'previous': None,
+        'results': data,
+    })
+
+
+def _bad_cursor():
+    return JsonResponse({'detail': 'Invalid cursor'}, status=404)
+
+
+def _posts():
+    return BugPost.objects.select_related('created_by').prefetch_related('tags')
+
+
+@require_GET
+async def bug_post_list(request):
+    try:
+        posts, next_cursor = await _created_at_page(request, _posts())
+    except InvalidCursor:
+        return _bad_cursor()
+    return _paginated(request, serializers.BugPostSerializer(posts, many=True).data, next_cursor)
+
+
+@require_GET
+async def bug_post_detail(request, pk):
+    try:
+        post = await _posts().aget(pk=pk)
+    except BugPost.DoesNotExist:
+        raise Http404
+    return JsonResponse(serializers.BugPostSerializer(post).data)
+
+
+@require_GET
+async def bug_post_solutions(request, pk):
+    if not await BugPost.objects.filter(pk=pk).aexists():
+        raise Http404
+    solutions = BugSolution.objects.filter(bug_post_id=pk).with_listing_data()
+    try:
+        page, next_cursor = await _created_at_page(request, solutions)
+    except InvalidCursor:
+        return _bad_cursor()
+    data = serializers.BugSolutionSerializer(page, many=True, context={'request': request}).data
+    return _paginated(request, data, next_cursor)
+
+
+@require_GET
+async def tag_list(request):
+    queryset = Tag.objects.order_by('-id')
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            (pk,) = _decode_cursor(cursor, 1)
+            if not pk.isdigit():
+                raise InvalidCursor
+        except InvalidCursor:
+            return _bad_cursor()
+        queryset = queryset.filter(pk__lt=pk)
+
+    size = _page_size(request)
+    tags = [tag async for tag in queryset[:size + 1]]
+    next_cursor = None
+    if len(tags) > size:
+        tags = tags[:size]
+        next_cursor = _encode_cursor(tags[-1].pk)
+    return _paginated(request, serializers.TagSerializer(tags, many=True).data, next_cursor)
+
+
+@require_GET
+async def event_feed(request):
+    """
+    Events after ``?since=<seq>`` (default 0), at most ``?limit=`` of them.
+    ``?wait=<seconds>`` holds the request until an event arrives or the wait,
+    capped at API_FEED_MAX_WAIT, runs out. ``next`` is the ``since`` to send
+    next time.
+    """
+    try:
+        since = int(request.GET.get('since', 0))
+        wait = float(request.GET.get('wait', 0))
+    except ValueError:
+        return JsonResponse({'detail': 'since must be an integer and wait a number of seconds.'}, status=400)
+    limit = events.batch_size(request.GET.get('limit'))
+    wait = max(0.0, min(wait, settings.API_FEED_MAX_WAIT))
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while True:
+        batch = await events.aevents_since(since, limit)
+        remaining = deadline - loop.time()
+        if batch or remaining <= 0:
+            break
+        await asyncio.sleep(min(settings.API_FEED_POLL_INTERVAL, remaining))
+
+    return JsonResponse({
+        'next': batch[-1].id if batch else since,
+        'events': [events.as_dict(event) for event in batch],
+    })
+
+
+def _sse(event):
+    return f'id: {event["seq"]}\nevent: {event["kind"]}\ndata: {json.dumps(event)}\n\n'
+
+
+async def _post_stream(pk, since):
+    subscription = pubsub.hub.subscribe(f'post:{pk}')
+    # Seqs already sent; live messages may arrive below the replay position
+    sent, recent = set(), deque()
+
+    def mark(seq):
+        sent.add(seq)
+        recent.append(seq)
+        if len(recent) > settings.API_PUBSUB_QUEUE_SIZE * 2:
+            sent.discard(recent.popleft())
+
+    try:
+        yield f'retry: {settings.API_SSE_RETRY_MS}\n\n'
+        if since is None:
+            since = await events.alatest_seq()
+        catch_up = True
+        while True:
+            if catch_up or subscription.overflowed:
+                # Replay from the log: after Last-Event-ID, or what a full queue dropped
+                subscription.drain()
+                catch_up = False
+                while True:
+                    batch = await events.apost_events_since(pk, since, settings.API_FEED_BATCH_SIZE)
+                    for event in batch:
+                        since = event.id
+                        if event.id not in sent:
+                            mark(event.id)
+                            yield _sse(events.as_dict(event))
+                    if len(batch) < settings.API_FEED_BATCH_SIZE:
+                        break
+            try:
+                message = await asyncio.wait_for(subscription.get(), settings.API_SSE_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if message['seq'] not in sent:
+                mark(message['seq'])
+                since = max(since, message['seq'])
+                yield _sse(message)
+    finally:
+        subscription.close()
+
+
+@require_GET
+async def bug_post_stream(request, pk):
+    """
+    Server-Sent Events for one post: new solutions and comments, and vote
+    count changes. ``Last-Event-ID`` (or ``?last_event_id=``) replays what was
+    missed since that event. ASGI only; WSGI deployments get a 501.
+    """
+    if not await BugPost.objects.filter(pk=pk).aexists():
+        raise Http404
+    since = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    if since is not None:
+        if not since.isdigit():
+            return JsonResponse({'detail': 'Last-Event-ID must be an event sequence number.'}, status=400)
+        since = int(since)
+    if not isinstance(request, ASGIRequest):
+        # WSGI collects async streaming content before sending any of it, and this one never ends
+        return JsonResponse(
+            {'detail': 'Live streams need an ASGI server; poll /api/events/ instead.'},
+            status=501,
+        )
+    response = StreamingHttpResponse(_post_stream(pk, since), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,196 @@
+"""
+List-payload bulk create/update/delete for the api viewsets.
+
+``POST``, ``PATCH`` and ``DELETE`` on ``<endpoint>/bulk/`` take a list of items
+(``{"ids": [...]}`` for DELETE), validate them in one ``many=True`` pass, write
+in batches of API_BULK_BATCH_SIZE rows per transaction and answer with one
+status entry per input item.
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from . import events
+from .cache import invalidate
+from .permissions import OnlyAuthorEditsOrDeletes
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class BulkMixin:
+    """
+    Viewsets set ``bulk_invalidates`` to the response-cache namespaces touched
+    by their model, since bulk_create/bulk_update send no model signals, and
+    override ``bulk_written`` for any other signal-driven bookkeeping. Creates
+    are logged to the activity feed like single creates when the viewset sets
+    ``created_event`` and ``created_event_row``.
+    """
+    bulk_invalidates = ()
+    created_event = None
+
+    def bulk_updating(self, instances):
+        """Called with the loaded instances of a bulk update before the changes are applied."""
+
+    def bulk_written(self, instances):
+        """Called with the created, updated or deleted instances of a bulk request."""
+
+    def created_event_row(self, instance):
+        """``(object_id, post_id, data)`` of the ``created_event`` for ``instance``."""
+        raise NotImplementedError
+
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request):
+        if request.method == 'DELETE':
+            items = request.data.get('ids') if isinstance(request.data, dict) else None
+        else:
+            items = request.data
+        if not isinstance(items, list):
+            return Response({"detail": "Expected a list of items."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.API_BULK_MAX_ITEMS:
+            return Response(
+                {"detail": f"At most {settings.API_BULK_MAX_ITEMS} items per request."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if request.method == 'POST':
+            results = self.bulk_create(items)
+            success = status.HTTP_201_CREATED
+        elif request.method == 'PATCH':
+            results = self.bulk_update(items)
+            success = status.HTTP_200_OK
+        else:
+            results = self.bulk_destroy(items)
+            success = status.HTTP_200_OK
+
+        if any(result['status'] == success for result in results):
+            invalidate(*self.bulk_invalidates)
+        failed = any(result['status'] != success for result in results)
+        return Response(
+            {'results': results},
+            status=status.HTTP_207_MULTI_STATUS if failed else success
+        )
+
+    def _validate_many(self, items, **kwargs):
+        """Validate ``items`` in one pass; returns (validated data or None, errors) per item."""
+        serializer = self.get_serializer(data=items, many=True, **kwargs)
+        if serializer.is_valid():
+            return [(data, None) for data in serializer.validated_data]
+
+        outcome = [(None, errors) if errors else None for errors in serializer.errors]
+        valid_items = [item for item, result in zip(items, outcome) if result is None]
+        if valid_items:
+            serializer = self.get_serializer(data=valid_items, many=True, **kwargs)
+            serializer.is_valid(raise_exception=True)
+            validated = iter(serializer.validated_data)
+            outcome = [result or (next(validated), None) for result in outcome]
+        return outcome
+
+    def _get_permitted(self, ids, results):
+        """
+        Load the objects for ``ids``, and their authors for the permission
+        check, in one query. Ids go through the primary key field, so ``"5"``
+        finds object 5. Malformed, missing or not-permitted ids get their
+        failure recorded in ``results``; returns {index: instance}.
+        """
+        model = self.queryset.model
+        pk_field = model._meta.pk
+        keys = {}
+        for index, pk in enumerate(ids):
+            if pk is None:
+                continue
+            try:
+                # JSON true/false would pass for 1 and 0, and floats would be truncated
+                if isinstance(pk, bool) or not isinstance(pk, (int, str)):
+                    raise ValidationError(pk_field.error_messages['invalid'], code='invalid', params={'value': pk})
+                keys[index] = pk_field.to_python(pk)
+            except ValidationError as error:
+                results[index] = {'index': index, 'id': pk, 'status': status.HTTP_400_BAD_REQUEST, 'errors': {'id': error.messages}}
+
+        instances = model.objects.select_related('created_by').in_bulk(set(keys.values()))
+        permission = OnlyAuthorEditsOrDeletes()
+        permitted = {}
+        for index, pk in enumerate(ids):
+            if results[index] is not None:
+                continue
+            instance = instances.get(keys.get(index))
+            if instance is None:
+                results[index] = {'index': index, 'id': pk, 'status': status.HTTP_404_NOT_FOUND}
+            elif not permission.has_object_permission(self.request, self, instance):
+                results[index] = {'index': index, 'id': pk, 'status': status.HTTP_403_FORBIDDEN}
+            else:
+                permitted[index] = instance
+        return permitted
+
+    def bulk_create(self, items):
+        model = self.queryset.model
+        results = []
+        objects = []
+        for index, (data, errors) in enumerate(self._validate_many(items)):
+            if errors:
+                results.append({'index': index, 'status': status.HTTP_400_BAD_REQUEST, 'errors': errors})
+            else:
+                # Same as perform_create on the single-row path
+                objects.append((index, model(created_by=self.request.user, **data)))
+                results.append(None)
+
+        for batch in _batches(objects, settings.API_BULK_BATCH_SIZE):
+            with transaction.atomic():
+                created = model.objects.bulk_create([obj for _, obj in batch])
+                if self.created_event:
+                    events.record_many(self.created_event, self.request.user, [self.created_event_row(obj) for obj in created])
+            for index, obj in batch:
+                results[index] = {'index': index, 'id': obj.pk, 'status': status.HTTP_201_CREATED}
+        self.bulk_written([obj for _, obj in objects])
+        return results
+
+    def bulk_update(self, items):
+        results = [None] * len(items)
+        ids = [item.get('id') if isinstance(item, dict) else None for item in items]
+        permitted = self._get_permitted(ids, results)
+
+        indexes = sorted(permitted)
+        validated = self._validate_many([items[index] for index in indexes], partial=True)
+        self.bulk_updating([permitted[index] for index in indexes])
+        changed = []
+        fields = {'updated_at'}
+        now = timezone.now()
+        for index, (data, errors) in zip(indexes, validated):
+            if errors:
+                results[index] = {'index': index, 'id': ids[index], 'status': status.HTTP_400_BAD_REQUEST, 'errors': errors}
+                continue
+            instance = permitted[index]
+            for field, value in data.items():
+                setattr(instance, field, value)
+                fields.add(field)
+            # bulk_update() does not apply auto_now
+            instance.updated_at = now
+            changed.append((index, instance))
+
+        model = self.queryset.model
+        for batch in _batches(changed, settings.API_BULK_BATCH_SIZE):
+            with transaction.atomic():
+                model.objects.bulk_update([obj for _, obj in batch], sorted(fields))
+            for index, obj in batch:
+                results[index] = {'index': index, 'id': obj.pk, 'status': status.HTTP_200_OK}
+        self.bulk_written([obj for _, obj in changed])
+        return results
+
+    def bulk_destroy(self, ids):
+        results = [None] * len(ids)
+        permitted = sorted(self._get_permitted(ids, results).items())
+
+        model = self.queryset.model
+        for batch in _batches(permitted, settings.API_BULK_BATCH_SIZE):
+            with transaction.atomic():
+                model.objects.filter(pk__in=[obj.pk for _, obj in batch]).delete()
+            for index, obj in batch:
+                results[index] = {'index': index, 'id': ids[index], 'status': status.HTTP_200_OK}
+        self.bulk_written([obj for _, obj in permitted])
+        return results
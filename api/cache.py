@@ -0,0 +1,154 @@
+"""
+Response cache for anonymous list/retrieve requests.
+
+Entries live in the ``api`` cache alias (see CACHES in settings) and are keyed by
+namespace generation, serializer, negotiated media type, path and query string.
+Invalidation bumps a namespace's generation counter (see api/signals.py), which
+orphans every entry of that namespace at once; orphans then expire by timeout.
+Compressible entries also hold their gzip/brotli bodies (api/compression.py),
+compressed once when stored.
+
+Responses read from a replica (api/routers.py) are not stored for
+API_REPLICA_STICKY_SECONDS after their namespace was invalidated: the
+replica may not have the change yet, and the stale page would outlive the
+lag by the whole cache timeout.
+"""
+import hashlib
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from .compression import precompress
+from .fieldsets import expands_relations
+from .routers import current_read_alias
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def _generation_key(namespace):
+    return f'api-cache:generation:{namespace}'
+
+
+def _changed_key(namespace):
+    return f'api-cache:changed:{namespace}'
+
+
+def invalidate(*namespaces):
+    """Drop every cached response of the given namespaces."""
+    cache = get_cache()
+    for namespace in namespaces:
+        key = _generation_key(namespace)
+        # add() is a no-op when the counter exists, incr() is atomic on shared backends
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(key, 1, timeout=None)
+        if settings.API_REPLICA_STICKY_SECONDS:
+            cache.set(_changed_key(namespace), True, settings.API_REPLICA_STICKY_SECONDS)
+
+
+def cache_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _record(namespace, outcome):
+    with _stats_lock:
+        _stats[f'{namespace}.{outcome}'] += 1
+        _stats[outcome] += 1
+
+
+class CachedResponseMixin:
+    """
+    Serve anonymous GET list/retrieve responses from the response cache.
+
+    Viewsets set ``cache_namespace``; entries are stored as rendered bytes,
+    so a hit skips the queryset, the serializer and the renderer. Listed
+    before ConditionalGetMixin, so a hit also skips the validator queries:
+    the entry keeps the ETag/Last-Modified it was served with.
+    """
+    cache_namespace = None
+    cached_actions = ('list', 'retrieve')
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(super().retrieve, request, *args, **kwargs)
+
+    def _cache_key(self, request):
+        generation = get_cache().get(_generation_key(self.cache_namespace), 0)
+        serializer_class = self.get_serializer_class()
+        raw = '|'.join([
+            str(settings.API_CACHE_VERSION),
+            f'{serializer_class.__module__}.{serializer_class.__qualname__}',
+            request.accepted_media_type or '',
+            request.path,
+            request.META.get('QUERY_STRING', ''),
+        ])
+        digest = hashlib.sha256(raw.encode()).hexdigest()
+        return f'api-cache:{self.cache_namespace}:{generation}:{digest}'
+
+    def _cached(self, handler, request, *args, **kwargs):
+        if (
+            not settings.API_CACHE_ENABLED
+            or request.method != 'GET'
+            or self.action not in self.cached_actions
+            or not request.user.is_anonymous
+            or expands_relations(request)
+        ):
+            return handler(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = self._cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            _record(self.cache_namespace, 'hit')
+            content, content_type = entry[:2]
+            response = HttpResponse(content, content_type=content_type)
+            # Entries stored before compression was added have no variants
+            response.precompressed = entry[2] if len(entry) > 2 else {}
+            response['X-Cache'] = 'HIT'
+            # The entry is exactly as fresh as its validators, so revalidate without the database
+            validators = entry[3] if len(entry) > 3 else {}
+            for header, value in validators.items():
+                response[header] = value
+            not_modified = get_conditional_response(
+                request,
+                etag=validators.get('ETag'),
+                last_modified=parse_http_date_safe(validators.get('Last-Modified')),
+                response=response,
+            )
+            return not_modified or response
+
+        _record(self.cache_namespace, 'miss')
+        # Replicas may still lag behind a recent invalidation
+        lagging = current_read_alias() is not None and cache.get(_changed_key(self.cache_namespace))
+        response = handler(request, *args, **kwargs)
+        response['X-Cache'] = 'MISS'
+        if response.status_code == 200 and not lagging:
+            def store(rendered):
+                content, content_type = rendered.content, rendered['Content-Type']
+                rendered.precompressed = precompress(content, content_type)
+                validators = {header: rendered[header] for header in ('ETag', 'Last-Modified') if rendered.has_header(header)}
+                entry = (content, content_type, rendered.precompressed, validators)
+                cache.set(key, entry, settings.API_CACHE_TIMEOUT)
+            response.add_post_render_callback(store)
+        return response
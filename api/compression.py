@@ -0,0 +1,130 @@
+"""
+Negotiated gzip/brotli compression of api responses.
+
+CompressionMiddleware compresses non-streaming responses of a compressible
+type once they reach API_COMPRESSION_MIN_BYTES, picking brotli (when the
+``brotli`` package is installed) or gzip from the client's Accept-Encoding.
+Streaming responses such as the exports are passed through untouched, as
+are HTML pages, which carry the CSRF token (BREACH).
+
+A response may carry ``precompressed``, a dict of ``{encoding: body}``. The
+response cache (api/cache.py) fills it once when an entry is stored, so cache
+hits are served without compressing anything.
+"""
+import gzip
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/vnd.oai.openapi',
+    'application/vnd.oai.openapi+json',
+    'text/csv',
+    'text/plain',
+}
+
+_coding = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def available_encodings():
+    """Encodings this process can produce, most preferred first."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.API_COMPRESSION_BROTLI_QUALITY)
+    # mtime=0 keeps the output stable for the same input
+    return gzip.compress(content, compresslevel=settings.API_COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def compressible(content_type, size):
+    """Whether a body of this type and size is worth compressing."""
+    media_type = (content_type or '').split(';')[0].strip().lower()
+    return (
+        settings.API_COMPRESSION_ENABLED
+        and size >= settings.API_COMPRESSION_MIN_BYTES
+        and media_type in COMPRESSIBLE_TYPES
+    )
+
+
+def negotiate(accept_encoding):
+    """The best available encoding the Accept-Encoding header allows, or None."""
+    weights = {}
+    for part in (accept_encoding or '').split(','):
+        match = _coding.match(part)
+        if not match:
+            continue
+        try:
+            weights[match.group(1).lower()] = float(match.group(2) or 1)
+        except ValueError:
+            continue
+    best, best_weight = None, 0
+    for encoding in available_encodings():
+        weight = weights.get(encoding, weights.get('*', 0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def precompress(content, content_type):
+    """``{encoding: body}`` for every available encoding, or {} when not compressible."""
+    if not compressible(content_type, len(content)):
+        return {}
+    return {encoding: compress(content, encoding) for encoding in available_encodings()}
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or not compressible(response.get('Content-Type'), len(response.content))
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None:
+            return response
+
+        precompressed = getattr(response, 'precompressed', None) or {}
+        body = precompressed.get(encoding)
+        if body is None:
+            body = compress(response.content, encoding)
+        if len(body) >= len(response.content):
+            return response
+
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = encoding
+        # The compressed body is a different representation of the same content
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
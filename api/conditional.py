@@ -0,0 +1,130 @@
+"""
+Conditional GET (ETag / Last-Modified) for the api viewsets.
+
+Validators come from one aggregate statement: COUNT, MAX(timestamp) and MAX(pk)
+of the requested rows and of every nested relation they embed, glued together
+with UNION ALL. Lists first fetch the keys of the requested page (one indexed
+keyset query), so both statements cost a page regardless of table size.
+A matching If-None-Match / If-Modified-Since is answered with 304 before
+any serialization happens. Last-Modified is only sent for a single object
+without embedded relations; elsewhere removals can't be dated. Response
+cache hits (api/cache.py) are revalidated against the validators stored
+with the entry and skip these queries. ``?expand=`` responses embed other
+models and get no validators.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Count, DateTimeField, Max, Value
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.pagination import CursorPagination
+
+from .fieldsets import expands_relations
+
+
+def _aggregate(kind, queryset, timestamp_field):
+    if timestamp_field:
+        last = Max(timestamp_field)
+    else:
+        last = Value(None, output_field=DateTimeField())
+    return (
+        queryset.order_by()
+        .annotate(kind=Value(kind))
+        .values('kind')
+        .annotate(total=Count('pk'), last=last, top=Max('pk'))
+        .values_list('kind', 'total', 'last', 'top')
+    )
+
+
+def compute_validators(parts, *extra):
+    """
+    ``parts`` is a list of (kind, queryset, timestamp_field or None).
+    Returns (etag, last_modified) where last_modified may be None.
+    """
+    (kind, queryset, timestamp_field), *children = parts
+    statement = _aggregate(kind, queryset, timestamp_field)
+    if children:
+        statement = statement.union(*(_aggregate(*child) for child in children), all=True)
+    rows = sorted(statement, key=lambda row: row[0])
+
+    raw = repr((rows, extra)).encode()
+    etag = quote_etag(hashlib.sha1(raw).hexdigest())
+    timestamps = [row[2] for row in rows if row[2] is not None]
+    return etag, max(timestamps) if timestamps else None
+
+
+def filter_or_404(queryset, **lookup):
+    """``queryset.filter(**lookup)``; malformed values are a 404, as in DRF's get_object_or_404."""
+    try:
+        return queryset.filter(**lookup)
+    except (TypeError, ValueError, ValidationError):
+        raise Http404
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag/Last-Modified to list and retrieve and answers 304 when the
+    client's copy is current. Viewsets describe embedded relations by
+    overriding ``get_fingerprint_children``.
+    """
+    timestamp_field = 'updated_at'
+
+    def get_fingerprint_children(self, queryset):
+        return []
+
+    def get_fingerprint_parts(self, queryset):
+        return [('self', queryset, self.timestamp_field)] + self.get_fingerprint_children(queryset)
+
+    def list(self, request, *args, **kwargs):
+        if expands_relations(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.queryset.all())
+        extra = ()
+        paginator = self.paginator
+        if isinstance(paginator, CursorPagination):
+            # Only the requested page: its keys and links, then aggregates over those rows
+            ordering = paginator.get_ordering(request, queryset, self)
+            page = paginator.paginate_queryset(queryset.only(*(field.lstrip('-') for field in ordering)), request, view=self)
+            keys = [row.pk for row in page]
+            queryset = self.queryset.filter(pk__in=keys)
+            extra = (keys, paginator.get_next_link(), paginator.get_previous_link())
+        parts = self.get_fingerprint_parts(queryset)
+        return self.conditional_response(parts, super().list, request, *args, extra=extra, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = filter_or_404(self.queryset, **{self.lookup_field: kwargs[lookup_url_kwarg]})
+        parts = self.get_fingerprint_parts(queryset)
+        return self.conditional_response(parts, super().retrieve, request, *args, **kwargs)
+
+    def conditional_response(self, parts, handler, request, *args, extra=(), **kwargs):
+        if expands_relations(request):
+            return handler(request, *args, **kwargs)
+        etag, last_modified = compute_validators(
+            parts,
+            # has_voted and friends differ per user, renderers per media type
+            request.user.pk,
+            request.accepted_media_type,
+            settings.API_CACHE_VERSION,
+            *extra,
+        )
+        # MAX(timestamp) never moves when rows go away (a deleted comment, a removed
+        # tag, a withdrawn vote), so only a single row with nothing embedded is dated
+        if not (self.action == 'retrieve' and len(parts) == 1):
+            last_modified = None
+        # HTTP dates have one-second resolution
+        last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+        if not_modified is not None:
+            return not_modified
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified_ts is not None:
+                response['Last-Modified'] = http_date(last_modified_ts)
+        return response
@@ -0,0 +1,126 @@
+"""
+Append-only activity log behind the ``/api/events/`` feed.
+
+Write paths call ``record()`` inside the transaction of the change they
+describe, so an event exists exactly when its change does. Readers page
+through the log by sequence (the Event primary key) with ``since=<seq>``.
+
+Sequence values are handed out at insert time, not at commit, so a
+transaction can commit after a later one and briefly leave a hole below
+events that are already visible. Reads stop in front of a hole younger
+than API_FEED_SETTLE_SECONDS instead of skipping past it. Older holes are
+rolled-back inserts or compaction, and reads step over them.
+
+Once committed, events that belong to a post are also published to the
+``post:<id>`` channel of api/pubsub.py for the live streams.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import pubsub
+from .models import Event
+
+POST_CREATED = 'post.created'
+POST_TAGGED = 'post.tagged'
+POST_UNTAGGED = 'post.untagged'
+SOLUTION_CREATED = 'solution.created'
+COMMENT_CREATED = 'comment.created'
+TAG_CREATED = 'tag.created'
+VOTE_ADDED = 'vote.added'
+VOTE_REMOVED = 'vote.removed'
+
+
+def _actor(user):
+    return user.get_username() if user is not None and user.is_authenticated else ''
+
+
+def _publish_on_commit(events):
+    def publish():
+        for event in events:
+            if event.post_id is not None:
+                pubsub.publish(f'post:{event.post_id}', as_dict(event))
+    transaction.on_commit(publish)
+
+
+def record(kind, user, object_id, post_id=None, **data):
+    event = Event.objects.create(kind=kind, actor=_actor(user), object_id=object_id, post_id=post_id, data=data)
+    _publish_on_commit([event])
+    return event
+
+
+def record_many(kind, user, rows):
+    """One event per ``(object_id, post_id, data)`` row, in a single insert."""
+    actor = _actor(user)
+    created = Event.objects.bulk_create([
+        Event(kind=kind, actor=actor, object_id=object_id, post_id=post_id, data=data)
+        for object_id, post_id, data in rows
+    ])
+    _publish_on_commit(created)
+    return created
+
+
+def as_dict(event):
+    return {
+        'seq': event.id,
+        'kind': event.kind,
+        'post': event.post_id,
+        'object': event.object_id,
+        'actor': event.actor,
+        'data': event.data,
+        'created_at': event.created_at.isoformat(),
+    }
+
+
+def settled(events, since, now=None):
+    """``events`` (ascending, all after ``since``) up to the first hole that may still fill."""
+    horizon = (now or timezone.now()) - timedelta(seconds=settings.API_FEED_SETTLE_SECONDS)
+    previous = since
+    for index, event in enumerate(events):
+        if event.id != previous + 1 and event.created_at > horizon:
+            return events[:index]
+        previous = event.id
+    return events
+
+
+def batch_size(requested=None):
+    try:
+        size = int(requested) if requested is not None else settings.API_FEED_BATCH_SIZE
+    except ValueError:
+        size = settings.API_FEED_BATCH_SIZE
+    return max(1, min(size, settings.API_FEED_BATCH_SIZE))
+
+
+def events_since(since, limit):
+    return settled(list(Event.objects.filter(id__gt=since).order_by('id')[:limit]), since)
+
+
+async def aevents_since(since, limit):
+    return settled([event async for event in Event.objects.filter(id__gt=since).order_by('id')[:limit]], since)
+
+
+async def apost_events_since(post_id, since, limit):
+    """One post's events after ``since``; holes are expected here, other posts' events make them."""
+    return [event async for event in Event.objects.filter(post_id=post_id, id__gt=since).order_by('id')[:limit]]
+
+
+async def alatest_seq():
+    return await Event.objects.order_by('-id').values_list('id', flat=True).afirst() or 0
+
+
+def compact(before, batch_size=10000):
+    """Delete events created before ``before``, oldest first, ``batch_size`` ids per statement."""
+    last = Event.objects.filter(created_at__lt=before).order_by('-id').values_list('id', flat=True).first()
+    if last is None:
+        return 0
+    deleted = 0
+    start = Event.objects.order_by('id').values_list('id', flat=True).first()
+    while start is not None and start <= last:
+        end = min(start + batch_size - 1, last)
+        with transaction.atomic():
+            count, _ = Event.objects.filter(id__gte=start, id__lte=end).delete()
+        deleted += count
+        start = end + 1
+    return deleted
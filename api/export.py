@@ -0,0 +1,127 @@
+"""
+Streaming export of bug posts with their tags, solutions and comments.
+
+Posts are read with ``.iterator(chunk_size=...)``; prefetches run once per
+chunk, so memory stays flat however many rows are exported. Each post is
+written out as soon as its chunk is loaded: one JSON object per line for
+NDJSON, one row per comment (or per solution / post without any) for CSV.
+"""
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Exists, OuterRef, Prefetch, Q
+
+from .models import BugPost, BugSolution, Comment
+
+CSV_COLUMNS = [
+    'post_id', 'post_title', 'post_description', 'post_created_by', 'post_created_at', 'post_updated_at', 'post_tags',
+    'solution_id', 'solution_description', 'solution_created_by', 'solution_created_at', 'solution_updated_at',
+    'solution_vote_count', 'solution_score',
+    'comment_id', 'comment_description', 'comment_created_by', 'comment_created_at', 'comment_updated_at',
+]
+
+
+def export_queryset(since=None):
+    """
+    Posts in primary key order with everything the export writes prefetched.
+    With ``since``, only posts where the post, one of its solutions or one of
+    their comments was updated (or a vote was cast) at or after ``since``.
+    Tag changes, withdrawn votes and deleted solutions or comments move the
+    post's updated_at (api/signals.py), so they are included too.
+    """
+    queryset = BugPost.objects.select_related('created_by').prefetch_related(
+        'tags',
+        Prefetch(
+            'solutions',
+            queryset=BugSolution.objects.select_related('created_by').order_by('pk').prefetch_related(
+                Prefetch('comments', queryset=Comment.objects.select_related('created_by').order_by('pk'))
+            ),
+        ),
+    ).order_by('pk')
+
+    if since is not None:
+        solutions = BugSolution.objects.filter(bug_post=OuterRef('pk'))
+        queryset = queryset.filter(
+            Q(updated_at__gte=since)
+            | Exists(solutions.filter(
+                Q(updated_at__gte=since)
+                | Q(comments__updated_at__gte=since)
+                | Q(upvotes__created_at__gte=since)
+            ))
+        )
+    return queryset
+
+
+def post_record(post):
+    return {
+        'id': post.pk,
+        'title': post.title,
+        'description': post.description,
+        'created_by': post.created_by.username,
+        'created_at': post.created_at,
+        'updated_at': post.updated_at,
+        'tags': [tag.slug or tag.name for tag in post.tags.all()],
+        'solutions': [
+            {
+                'id': solution.pk,
+                'description': solution.description,
+                'created_by': solution.created_by.username,
+                'created_at': solution.created_at,
+                'updated_at': solution.updated_at,
+                'vote_count': solution.vote_count,
+                'score': solution.score,
+                'comments': [
+                    {
+                        'id': comment.pk,
+                        'description': comment.description,
+                        'created_by': comment.created_by.username,
+                        'created_at': comment.created_at,
+                        'updated_at': comment.updated_at,
+                    }
+                    for comment in solution.comments.all()
+                ],
+            }
+            for solution in post.solutions.all()
+        ],
+    }
+
+
+def iter_ndjson(queryset, chunk_size):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for post in queryset.iterator(chunk_size=chunk_size):
+        yield encoder.encode(post_record(post)) + '\n'
+
+
+class _Echo:
+    """File-like object handing each written CSV line straight back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset, chunk_size):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for post in queryset.iterator(chunk_size=chunk_size):
+        record = post_record(post)
+        post_cells = [
+            record['id'], record['title'], record['description'], record['created_by'],
+            record['created_at'].isoformat(), record['updated_at'].isoformat(), ';'.join(record['tags']),
+        ]
+        if not record['solutions']:
+            yield writer.writerow(post_cells + [''] * (len(CSV_COLUMNS) - len(post_cells)))
+            continue
+        for solution in record['solutions']:
+            solution_cells = [
+                solution['id'], solution['description'], solution['created_by'],
+                solution['created_at'].isoformat(), solution['updated_at'].isoformat(),
+                solution['vote_count'], solution['score'],
+            ]
+            if not solution['comments']:
+                yield writer.writerow(post_cells + solution_cells + [''] * 5)
+                continue
+            for comment in solution['comments']:
+                yield writer.writerow(post_cells + solution_cells + [
+                    comment['id'], comment['description'], comment['created_by'],
+                    comment['created_at'].isoformat(), comment['updated_at'].isoformat(),
+                ])
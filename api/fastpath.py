@@ -0,0 +1,200 @@
+"""
+Read-only fast path for listing and retrieving posts and solutions.
+
+On large pages ModelSerializer spends most of its time in per-field
+``to_representation`` calls on model instances. Here rows come from a
+``.values()`` projection, nested relations are loaded with one ``.values()``
+query per page, and the output dicts are built directly. The key order and
+value formatting are the same as the DRF serializers', so the rendered JSON
+is identical. The equivalence tests in api/tests.py compare both paths
+byte for byte.
+
+Used for JSON GET requests without ``?expand=``; anything else, including
+the browsable API and every write, goes through the regular serializers.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from .models import Comment, Tag
+
+
+def datetime_formatter():
+    """
+    DateTimeField.to_representation with the settings looked up once, for a
+    whole page: aware values in the current time zone, ISO 8601, 'Z' for UTC.
+    """
+    output_format = api_settings.DATETIME_FORMAT
+    if not settings.USE_TZ or output_format is None or output_format.lower() != ISO_8601:
+        return serializers.DateTimeField().to_representation
+    current = timezone.get_current_timezone()
+
+    def represent(value):
+        value = value.astimezone(current).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return represent
+
+
+class FastReadSerializer:
+    """
+    Stand-in for a read-only ``many=True`` / single-instance serializer over
+    rows produced by ``project()``. Subclasses list the output fields in the
+    order of the DRF serializer they mirror and the column behind each.
+    """
+    field_names = ()
+    columns = {}
+
+    def __init__(self, instance=None, many=False, context=None, fields=None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+        self.output = [name for name in self.field_names if fields is None or name in fields]
+
+    @classmethod
+    def project(cls, queryset, fields=None, always=('id', 'created_at')):
+        """``queryset.values()`` with the columns behind ``fields`` (None: all) plus ``always``."""
+        names = [name for name in cls.field_names if fields is None or name in fields]
+        values = dict.fromkeys(always)
+        values.update(dict.fromkeys(cls.columns[name] for name in names if name in cls.columns))
+        return queryset.values(*values)
+
+    def build(self, rows):
+        raise NotImplementedError
+
+    @property
+    def data(self):
+        rows = list(self.instance) if self.many else [self.instance]
+        items = self.build(rows)
+        if self.many:
+            return ReturnList(items, serializer=self)
+        return ReturnDict(items[0], serializer=self)
+
+
+class FastBugPostSerializer(FastReadSerializer):
+    """Mirrors serializers.BugPostSerializer."""
+    field_names = ('id', 'created_by', 'tags', 'title', 'description', 'created_at', 'updated_at')
+    columns = {
+        'id': 'id',
+        'created_by': 'created_by__username',
+        'title': 'title',
+        'description': 'description',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+
+    def build(self, rows):
+        output = self.output
+        as_datetime = datetime_formatter()
+        tags = defaultdict(list)
+        if 'tags' in output and rows:
+            for tag in (
+                Tag.objects.filter(post__in=[row['id'] for row in rows])
+                .order_by('id')
+                .values('id', 'name', 'slug', post_id=F('post'))
+            ):
+                tags[tag.pop('post_id')].append(tag)
+
+        items = []
+        for row in rows:
+            item = {}
+            for name in output:
+                if name == 'tags':
+                    item['tags'] = tags[row['id']]
+                elif name in ('created_at', 'updated_at'):
+                    item[name] = as_datetime(row[name])
+                else:
+                    item[name] = row[self.columns[name]]
+            items.append(item)
+        return items
+
+
+class FastBugSolutionSerializer(FastReadSerializer):
+    """Mirrors serializers.BugSolutionSerializer; rows carry the has_voted annotation."""
+    field_names = (
+        'id', 'bug_post', 'description', 'created_by', 'created_at', 'updated_at',
+        'vote_count', 'score', 'has_voted', 'comments',
+    )
+    columns = {
+        'id': 'id',
+        'bug_post': 'bug_post',
+        'description': 'description',
+        'created_by': 'created_by__username',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+        'vote_count': 'vote_count',
+        'score': 'score',
+        'has_voted': 'has_voted',
+    }
+
+    def build(self, rows):
+        output = self.output
+        as_datetime = datetime_formatter()
+        comments = defaultdict(list)
+        if 'comments' in output and rows:
+            for comment in (
+                Comment.objects.filter(bug_solution__in=[row['id'] for row in rows])
+                .order_by('created_at', 'id')
+                .values('id', 'description', 'bug_solution', 'created_by__username', 'created_at', 'updated_at')
+            ):
+                comments[comment['bug_solution']].append({
+                    'id': comment['id'],
+                    'description': comment['description'],
+                    'bug_solution': comment['bug_solution'],
+                    'created_by': comment['created_by__username'],
+                    'created_at': as_datetime(comment['created_at']),
+                    'updated_at': as_datetime(comment['updated_at']),
+                })
+
+        items = []
+        for row in rows:
+            item = {}
+            for name in output:
+                if name == 'comments':
+                    item['comments'] = comments[row['id']]
+                elif name in ('created_at', 'updated_at'):
+                    item[name] = as_datetime(row[name])
+                elif name == 'score':
+                    item['score'] = float(row['score'])
+                else:
+                    item[name] = row[self.columns[name]]
+            items.append(item)
+        return items
+
+
+class FastReadMixin:
+    """
+    Viewset mixin switching list/retrieve to ``fast_serializer_class``.
+    get_queryset() implementations check use_fast_path() and return
+    ``fast_serializer_class.project(...)`` rows instead of instances.
+    """
+    fast_serializer_class = None
+    fast_actions = ('list', 'retrieve')
+
+    def can_use_fast_path(self):
+        request = self.request
+        return (
+            settings.API_FAST_READS
+            and request is not None
+            and request.method in ('GET', 'HEAD')
+            and getattr(request, 'accepted_renderer', None) is not None
+            and request.accepted_renderer.format == 'json'
+            and not self.get_shape()[1]
+        )
+
+    def use_fast_path(self):
+        return self.action in self.fast_actions and self.can_use_fast_path()
+
+    def get_fast_serializer(self, serializer_class, *args, **kwargs):
+        kwargs.setdefault('context', self.get_serializer_context())
+        kwargs.setdefault('fields', self.get_shape()[0])
+        return serializer_class(*args, **kwargs)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.use_fast_path():
+            return self.get_fast_serializer(self.fast_serializer_class, *args, **kwargs)
+        return super().get_serializer(*args, **kwargs)
@@ -0,0 +1,109 @@
+"""
+Sparse fieldsets and expandable relations for the api read endpoints.
+
+``?fields=id,title`` keeps only the listed fields of each item and
+``?expand=solutions`` embeds a relation that is not part of the default
+representation. The viewset side parses both once per request and lets
+``get_queryset()`` skip the joins, prefetches, annotations and columns the
+response will not contain. Writes always use the full representation.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _names(value):
+    return {name.strip() for name in value.split(',') if name.strip()} if value else set()
+
+
+def expands_relations(request):
+    """
+    Whether a safe request asks for ``?expand=``. Expanded responses embed rows
+    that neither the response cache namespace nor the ETag parts cover, so
+    both skip them.
+    """
+    return request.method in SAFE_METHODS and bool(_names(request.query_params.get('expand')))
+
+
+class DynamicFieldsSerializerMixin:
+    """
+    Serializer mixin accepting ``fields`` (names to keep) and ``expand``
+    (names from get_expandable_fields() to add) keyword arguments.
+    """
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        if expand:
+            expandable = self.get_expandable_fields()
+            for name in expand:
+                if name in expandable:
+                    self.fields[name] = expandable[name]
+        if fields is not None:
+            keep = set(fields) | set(expand)
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
+
+    def get_expandable_fields(self):
+        """Relations that ?expand= may embed, as {name: serializer instance}."""
+        return {}
+
+
+class SparseFieldsetMixin:
+    """
+    Viewset mixin reading ``?fields=`` and ``?expand=`` on safe requests and
+    handing them to the serializer.
+    """
+
+    def get_shape(self):
+        if not hasattr(self, '_shape'):
+            fields, expand = None, set()
+            if self.request is not None and self.request.method in SAFE_METHODS:
+                params = self.request.query_params
+                fields = _names(params.get('fields')) or None
+                expand = _names(params.get('expand'))
+            self._shape = (fields, expand)
+        return self._shape
+
+    def get_shape_kwargs(self):
+        fields, expand = self.get_shape()
+        kwargs = {}
+        if fields is not None:
+            kwargs['fields'] = fields
+        if expand:
+            kwargs['expand'] = expand
+        return kwargs
+
+    def requested_fields(self):
+        """Names the response will contain, or None for the full representation."""
+        fields, expand = self.get_shape()
+        return None if fields is None else fields | expand
+
+    def wants(self, name):
+        requested = self.requested_fields()
+        return requested is None or name in requested
+
+    def expands(self, name):
+        return name in self.get_shape()[1]
+
+    def get_serializer(self, *args, **kwargs):
+        for key, value in self.get_shape_kwargs().items():
+            kwargs.setdefault(key, value)
+        return super().get_serializer(*args, **kwargs)
+
+    def only_requested(self, queryset, always=('id',)):
+        """
+        Load only the columns behind the requested fields, plus ``always``
+        (the primary key and whatever pagination orders by).
+        """
+        requested = self.requested_fields()
+        if requested is None:
+            return queryset
+        columns = set(always)
+        for name in requested:
+            try:
+                field = queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.many_to_many:
+                columns.add(name)
+        return queryset.only(*columns)
@@ -0,0 +1,31 @@
+"""Helpers shared by the bench_* management commands."""
+import time
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Run the block in a transaction that is always rolled back, so seeding leaves no trace."""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def best_of(func, repeat):
+    """Best wall time of ``repeat`` calls to ``func``, in seconds."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
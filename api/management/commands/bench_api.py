@@ -0,0 +1,210 @@
+import json
+import platform
+import random
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.cache import get_cache
+from api.management.benchmark import rolled_back
+from api.management.seeding import WORDS, seed, zipf_weights
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(values) - 1, round(fraction * len(values)) - 1))
+    return values[index]
+
+
+class Workload:
+    """
+    Mixed read/write traffic over every router endpoint. Reads are mostly
+    anonymous; writes use token-authenticated users. Targets follow the same
+    skew as the seeded data, so popular posts get most of the traffic.
+    """
+
+    def __init__(self, dataset, rng, active_users):
+        self.data = dataset
+        self.rng = rng
+        self.users = active_users
+        self.post_weights = zipf_weights(len(dataset.posts), 0.8)
+        self.solution_weights = zipf_weights(len(dataset.solutions), 0.8)
+        # Edits and tagging need the author, so keep each active user's own posts at hand
+        active_ids = {user.pk for user in active_users}
+        self.owned = defaultdict(list)
+        for post in dataset.posts:
+            if post.created_by_id in active_ids:
+                self.owned[post.created_by_id].append(post)
+        self.authors = [user for user in active_users if self.owned[user.pk]]
+        self.operations = [
+            # (name, weight, builder)
+            ('bug-post list', 20, lambda: ('get', '/api/bug-post/', None, None)),
+            ('bug-post retrieve', 15, lambda: ('get', f'/api/bug-post/{self.post().pk}/', None, None)),
+            ('bug-post search', 5, lambda: ('get', f'/api/bug-post/search/?q={self.rng.choice(WORDS)}', None, None)),
+            ('bug-post solutions', 10, lambda: ('get', f'/api/bug-post/{self.post().pk}/solutions/', None, self.user())),
+            ('bug-solution list', 8, lambda: ('get', '/api/bug-solution/', None, None)),
+            ('bug-solution retrieve', 8, lambda: ('get', f'/api/bug-solution/{self.solution().pk}/', None, None)),
+            ('comment list', 4, lambda: ('get', '/api/comment/', None, None)),
+            ('comment retrieve', 4, lambda: ('get', f'/api/comment/{self.rng.choice(self.data.comments).pk}/', None, None)),
+            ('tag list', 4, lambda: ('get', '/api/tag/', None, None)),
+            ('tag retrieve', 2, lambda: ('get', f'/api/tag/{self.rng.choice(self.data.tags).pk}/', None, None)),
+            ('bug-post create', 3, self.create_post),
+            ('bug-post partial_update', 1, self.update_post),
+            ('bug-post add_tags', 1, self.add_tag),
+            ('bug-solution create', 3, self.create_solution),
+            ('bug-solution upvote', 5, self.upvote),
+            ('comment create', 3, self.create_comment),
+        ]
+
+    def post(self):
+        return self.rng.choices(self.data.posts, self.post_weights)[0]
+
+    def solution(self):
+        return self.rng.choices(self.data.solutions, self.solution_weights)[0]
+
+    def user(self):
+        return self.rng.choice(self.users)
+
+    def create_post(self):
+        return ('post', '/api/bug-post/', {'title': 'bench post', 'description': 'created by bench_api'}, self.user())
+
+    def own_post(self):
+        user = self.rng.choice(self.authors)
+        return user, self.rng.choice(self.owned[user.pk])
+
+    def update_post(self):
+        user, post = self.own_post()
+        return ('patch', f'/api/bug-post/{post.pk}/', {'title': 'bench edit'}, user)
+
+    def add_tag(self):
+        user, post = self.own_post()
+        return ('post', f'/api/bug-post/{post.pk}/add_tags/', {'tag': self.rng.choice(self.data.tags).pk}, user)
+
+    def create_solution(self):
+        return ('post', '/api/bug-solution/', {'description': 'bench', 'bug_post': self.post().pk}, self.user())
+
+    def upvote(self):
+        return ('post', f'/api/bug-solution/{self.solution().pk}/upvote/', None, self.user())
+
+    def create_comment(self):
+        return ('post', '/api/comment/', {'description': 'bench', 'bug_solution': self.solution().pk}, self.user())
+
+    def next(self):
+        name, _, builder = self.rng.choices(self.operations, [op[1] for op in self.operations])[0]
+        return (name,) + builder()
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a mixed read/write workload against every api endpoint under the test client '
+        'and report p50/p95/p99 latency, queries and allocations per request as JSON. '
+        'Runs inside a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--warmup', type=int, default=100)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--solutions-per-post', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--no-allocations', action='store_true', help='Skip tracemalloc (it slows requests down).')
+        parser.add_argument('--output', help='Write the JSON report here instead of stdout.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with rolled_back():
+            dataset = seed(
+                users=options['users'],
+                posts=options['posts'],
+                solutions_per_post=options['solutions_per_post'],
+                random_seed=options['seed'],
+                prefix='bench-api',
+            )
+            active = dataset.users[:20]
+            tokens = {user.pk: Token.objects.create(user=user).key for user in active}
+            get_cache().clear()
+
+            workload = Workload(dataset, rng, active)
+            client = APIClient(SERVER_NAME='localhost')
+            for _ in range(options['warmup']):
+                self._request(client, tokens, workload.next(), track_allocations=False)
+
+            samples = defaultdict(list)
+            statuses = defaultdict(Counter)
+            track = not options['no_allocations']
+            if track:
+                tracemalloc.start()
+            try:
+                for _ in range(options['requests']):
+                    op = workload.next()
+                    sample, status_code = self._request(client, tokens, op, track)
+                    samples[op[0]].append(sample)
+                    statuses[op[0]][status_code] += 1
+            finally:
+                if track:
+                    tracemalloc.stop()
+
+        report = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'options': {key: options[key] for key in (
+                    'requests', 'warmup', 'users', 'posts', 'solutions_per_post', 'seed', 'no_allocations'
+                )},
+            },
+            'endpoints': {
+                name: self._summarize(rows, statuses[name]) for name, rows in sorted(samples.items())
+            },
+            'total': self._summarize([row for rows in samples.values() for row in rows], None),
+        }
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+            self.stdout.write(f"Wrote {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def _request(self, client, tokens, op, track_allocations):
+        name, method, url, data, user = op
+        if user is None:
+            client.credentials()
+        else:
+            client.credentials(HTTP_AUTHORIZATION=f'Token {tokens[user.pk]}')
+
+        if track_allocations:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data, format='json')
+            elapsed = time.perf_counter() - started
+        allocated = tracemalloc.get_traced_memory()[1] - baseline if track_allocations else None
+        return (elapsed, len(queries), allocated), response.status_code
+
+    def _summarize(self, rows, statuses):
+        latencies = sorted(row[0] * 1000 for row in rows)
+        queries = [row[1] for row in rows]
+        allocations = [row[2] for row in rows if row[2] is not None]
+        summary = {
+            'count': len(rows),
+            'p50_ms': round(percentile(latencies, 0.50), 3),
+            'p95_ms': round(percentile(latencies, 0.95), 3),
+            'p99_ms': round(percentile(latencies, 0.99), 3),
+            'mean_queries': round(sum(queries) / len(queries), 2),
+            'max_queries': max(queries),
+        }
+        if allocations:
+            summary['mean_peak_alloc_kib'] = round(sum(allocations) / len(allocations) / 1024, 1)
+        if statuses is not None:
+            summary['statuses'] = {str(code): count for code, count in sorted(statuses.items())}
+        return summary
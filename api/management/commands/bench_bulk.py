@@ -0,0 +1,41 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+
+from api.management.benchmark import rolled_back
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare bug-post creation throughput of one POST per row with /api/bug-post/bulk/. '
+        'Runs inside a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000)
+        parser.add_argument('--chunk', type=int, default=500, help='Items per bulk request.')
+
+    def handle(self, *args, **options):
+        rows, chunk = options['rows'], options['chunk']
+        payload = [{'title': f'Imported {i}', 'description': 'bulk benchmark'} for i in range(rows)]
+
+        with rolled_back():
+            client = APIClient(SERVER_NAME='localhost')
+            client.force_authenticate(User.objects.create_user(username='bench-bulk-user'))
+
+            started = time.perf_counter()
+            for item in payload:
+                client.post('/api/bug-post/', item, format='json')
+            single = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for start in range(0, rows, chunk):
+                client.post('/api/bug-post/bulk/', payload[start:start + chunk], format='json')
+            bulk = time.perf_counter() - started
+
+        self.stdout.write(f'single-row: {rows / single:.0f} rows/s ({single:.2f}s)')
+        self.stdout.write(f'bulk x{chunk}: {rows / bulk:.0f} rows/s ({bulk:.2f}s), {single / bulk:.1f}x faster')
@@ -0,0 +1,53 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+
+from api.compression import brotli
+from api.management.benchmark import rolled_back
+from api.management.seeding import seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Bytes saved and CPU cost of gzip and brotli (when installed) per level on the '
+        'JSON list pages of /api/bug-post/ and /api/bug-solution/, as rendered by the api. '
+        'Seeds data inside a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        client = APIClient(SERVER_NAME='localhost')
+        with rolled_back():
+            seed(users=100, posts=options['posts'], prefix='bench-compression')
+            bodies = {
+                path: client.get(path, {'page_size': options['page_size']}, format='json').content
+                for path in ('/api/bug-post/', '/api/bug-solution/')
+            }
+
+        codecs = [(f'gzip -{level}', lambda body, level=level: gzip.compress(body, compresslevel=level, mtime=0))
+                  for level in (1, 6, 9)]
+        if brotli is not None:
+            codecs += [(f'br q{quality}', lambda body, quality=quality: brotli.compress(body, quality=quality))
+                       for quality in (1, 5, 11)]
+        else:
+            self.stdout.write('brotli is not installed, gzip only')
+
+        for path, body in bodies.items():
+            self.stdout.write(f'{path} ({len(body):,} bytes, mean of {repeat}):')
+            for name, codec in codecs:
+                started = time.process_time()
+                for _ in range(repeat):
+                    compressed = codec(body)
+                cpu = (time.process_time() - started) / repeat
+                saved = 1 - len(compressed) / len(body)
+                self.stdout.write(
+                    f'  {name:<8} {len(compressed):>9,} bytes  {saved:>6.1%} saved  '
+                    f'{cpu * 1000:>7.2f}ms CPU  {len(body) / cpu / 1024 / 1024:>7.1f} MB/s'
+                )
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+
+from api.management.commands.bench_api import percentile
+from api.models import BugPost, Tag
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare throughput and latency of the sync WSGI viewsets and the async ASGI read '
+        'path (api/async_views.py) at increasing client counts. Both applications run '
+        'in-process behind their real handlers; --workers emulates sync gunicorn workers. '
+        'Reads existing data, so run seed_data first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', default='1,16,64,256', help='Comma-separated concurrent client counts.')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per client count and mode.')
+        parser.add_argument('--workers', type=int, default=4, help='Sync workers for the WSGI run.')
+        parser.add_argument('--db-latency', type=float, default=2.0,
+                            help='Milliseconds of simulated network latency added to every query.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Write the JSON report here instead of stdout.')
+
+    def handle(self, *args, **options):
+        post_ids = list(BugPost.objects.values_list('pk', flat=True)[:500])
+        if not post_ids or not Tag.objects.exists():
+            raise CommandError('No posts or tags to read; run manage.py seed_data first.')
+        user = BugPost.objects.select_related('created_by').get(pk=post_ids[0]).created_by
+        # The sync solutions action needs authentication, the async one is public
+        token, created = Token.objects.get_or_create(user=user)
+        paths = self._paths(post_ids, random.Random(options['seed']), options['requests'])
+
+        def add_latency(sender, connection, **kwargs):
+            def sleep(execute, sql, params, many, context):
+                time.sleep(options['db_latency'] / 1000)
+                return execute(sql, params, many, context)
+            connection.execute_wrappers.append(sleep)
+
+        report = {'meta': {
+            'database': connection.vendor,
+            'workers': options['workers'],
+            'db_latency_ms': options['db_latency'],
+            'requests': options['requests'],
+        }, 'runs': []}
+        connection_created.connect(add_latency)
+        try:
+            # Measure the views, not the response cache in front of the sync ones
+            with override_settings(API_CACHE_ENABLED=False):
+                wsgi, asgi = get_wsgi_application(), get_asgi_application()
+                for clients in [int(value) for value in options['clients'].split(',')]:
+                    for mode, run in (('wsgi', self._run_wsgi), ('asgi', self._run_asgi)):
+                        elapsed, latencies, errors = run(wsgi if mode == 'wsgi' else asgi, paths, clients,
+                                                         options['workers'], token.key)
+                        report['runs'].append(self._summarize(mode, clients, elapsed, latencies, errors))
+                        self.stderr.write(f"{mode} clients={clients}: {report['runs'][-1]['throughput_rps']} req/s")
+        finally:
+            connection_created.disconnect(add_latency)
+            if created:
+                token.delete()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+            self.stdout.write(f"Wrote {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def _paths(self, post_ids, rng, count):
+        """(sync path, async path) pairs for the endpoints both sides serve."""
+        shapes = [
+            (4, lambda pk: ('/api/bug-post/', '/api/async/bug-post/')),
+            (4, lambda pk: (f'/api/bug-post/{pk}/', f'/api/async/bug-post/{pk}/')),
+            (3, lambda pk: (f'/api/bug-post/{pk}/solutions/', f'/api/async/bug-post/{pk}/solutions/')),
+            (1, lambda pk: ('/api/tag/', '/api/async/tag/')),
+        ]
+        builders = rng.choices([shape for _, shape in shapes], [weight for weight, _ in shapes], k=count)
+        return [builder(rng.choice(post_ids)) for builder in builders]
+
+    def _run_wsgi(self, app, paths, clients, workers, token):
+        # Each client waits for one of `workers` single-threaded workers, like gunicorn sync workers
+        slots = threading.Semaphore(workers)
+        latencies, errors = [], []
+
+        def request(path):
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'HTTP_HOST': 'localhost',
+                'HTTP_AUTHORIZATION': f'Token {token}', 'wsgi.input': BytesIO(),
+            }
+            setup_testing_defaults(environ)
+            statuses = []
+            started = time.perf_counter()
+            with slots:
+                body = app(environ, lambda status, headers, exc_info=None: statuses.append(status))
+                b''.join(body)
+                body.close()
+            latencies.append(time.perf_counter() - started)
+            if not statuses[0].startswith('200'):
+                errors.append(statuses[0])
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            list(pool.map(request, [sync_path for sync_path, _ in paths]))
+        return time.perf_counter() - started, latencies, errors
+
+    def _run_asgi(self, app, paths, clients, workers, token):
+        latencies, errors = [], []
+
+        async def request(path):
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+                'root_path': '', 'headers': [(b'host', b'localhost')],
+                'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+            }
+            messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+            done = asyncio.Event()
+            statuses = []
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                await done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            started = time.perf_counter()
+            await app(scope, receive, send)
+            done.set()
+            latencies.append(time.perf_counter() - started)
+            if statuses[0] != 200:
+                errors.append(statuses[0])
+
+        async def main():
+            queue = iter([async_path for _, async_path in paths])
+
+            async def client():
+                for path in queue:
+                    await request(path)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(client() for _ in range(clients)))
+            return time.perf_counter() - started
+
+        return asyncio.run(main()), latencies, errors
+
+    def _summarize(self, mode, clients, elapsed, latencies, errors):
+        latencies = sorted(value * 1000 for value in latencies)
+        return {
+            'mode': mode,
+            'clients': clients,
+            'throughput_rps': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'errors': len(errors),
+        }
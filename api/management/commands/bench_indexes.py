@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.management.benchmark import best_of, rolled_back
+from api.management.seeding import seed
+from api.models import BugPost, BugSolution, Comment, Tag, Upvote
+
+User = get_user_model()
+
+# Indexes added by migration 0011; dropped (inside the rolled-back transaction) for the "before" run
+INDEX_PLAN = [
+    'api_post_created_idx',
+    'api_solution_post_created_idx',
+    'api_solution_created_idx',
+    'api_comment_solution_idx',
+    'api_comment_created_idx',
+    'api_tag_name_trgm_idx',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Show EXPLAIN plans and latency of the hot api query shapes with and without '
+        'the index plan. Seeds data inside a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--solutions-per-post', type=int, default=3)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--no-explain', action='store_true')
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self._seed(options['posts'], options['solutions_per_post'])
+            after = self._run('with index plan', options)
+            with connection.cursor() as cursor:
+                for name in INDEX_PLAN:
+                    cursor.execute(f'DROP INDEX IF EXISTS {connection.ops.quote_name(name)}')
+            before = self._run('without index plan', options)
+
+        self.stdout.write('\nSummary (best of %d):' % options['repeat'])
+        for label in after:
+            self.stdout.write(f'  {label}: {before[label] * 1000:.2f}ms -> {after[label] * 1000:.2f}ms')
+
+    def _shapes(self):
+        post = BugPost.objects.order_by('id').last()
+        solution = BugSolution.objects.order_by('id').last()
+        voter = User.objects.order_by('id').last()
+        return {
+            'post list page': BugPost.objects.order_by('-created_at', '-id')[:20],
+            'solutions of a post': BugSolution.objects.filter(bug_post=post).order_by('-created_at', '-id')[:20],
+            'solution list page': BugSolution.objects.order_by('-created_at', '-id')[:20],
+            'comments of a solution': Comment.objects.filter(bug_solution=solution).order_by('created_at'),
+            'comment list page': Comment.objects.order_by('-created_at', '-id')[:20],
+            'has voted': Upvote.objects.filter(bug_solution=solution, user=voter),
+            'tags of a post': Tag.objects.filter(post=post),
+            'tag name icontains': Tag.objects.filter(name__icontains='tag-1'),
+        }
+
+    def _run(self, title, options):
+        self.stdout.write(f'\n== {title} ==')
+        timings = {}
+        for label, queryset in self._shapes().items():
+            if not options['no_explain']:
+                self.stdout.write(f'-- {label}\n{self._explain(queryset, title)}')
+            timings[label] = best_of(lambda: list(queryset.all()), options['repeat'])
+        return timings
+
+    def _explain(self, queryset, tag):
+        # QuerySet.explain() can return a stale plan on SQLite, whose statement
+        # cache does not re-plan EXPLAIN after DDL; the comment forces a new statement.
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql} /* {tag} */', params)
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+    def _seed(self, posts, solutions_per_post):
+        result = seed(
+            users=200,
+            posts=posts,
+            solutions_per_post=solutions_per_post,
+            comments_per_solution=1,
+            upvotes_per_solution=1,
+            tags=500,
+            tags_per_post=1,
+            prefix='bench-index',
+        )
+        self.stdout.write(f'Seeded {posts} posts, {len(result.solutions)} solutions')
@@ -0,0 +1,61 @@
+import io
+
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api import serializers
+from api.management.benchmark import best_of, rolled_back
+from api.management.seeding import seed
+from api.models import BugPost, BugSolution, Tag
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        'Time rest_framework\'s JSONRenderer/JSONParser against the orjson-backed '
+        'FastJSONRenderer/FastJSONParser (api/renderers.py, api/parsers.py) on list payloads '
+        'of posts and solutions, and check the rendered bytes are identical. Seeds data inside '
+        'a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--rows', type=int, default=1000, help='Items per payload.')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        context = {'request': Request(APIRequestFactory().get('/'))}
+        with rolled_back():
+            seed(users=100, posts=options['posts'], prefix='bench-json')
+            posts = BugPost.objects.select_related('created_by').prefetch_related(
+                Prefetch('tags', queryset=Tag.objects.order_by('id'))
+            ).order_by('-created_at', '-id')[:rows]
+            solutions = BugSolution.objects.with_listing_data().order_by('-created_at', '-id')[:rows]
+            payloads = [
+                ('posts', serializers.BugPostSerializer(posts, many=True, context=context).data),
+                ('solutions', serializers.BugSolutionSerializer(solutions, many=True, context=context).data),
+            ]
+
+        stock_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+        stock_parser, fast_parser = JSONParser(), FastJSONParser()
+        for label, data in payloads:
+            body = stock_renderer.render(data)
+            size = len(body) / 1024 / 1024
+            identical = fast_renderer.render(data) == body
+            results = {
+                'render, stdlib': best_of(lambda: stock_renderer.render(data), repeat),
+                'render, fast': best_of(lambda: fast_renderer.render(data), repeat),
+                'parse, stdlib': best_of(lambda: stock_parser.parse(io.BytesIO(body)), repeat),
+                'parse, fast': best_of(lambda: fast_parser.parse(io.BytesIO(body)), repeat),
+            }
+            self.stdout.write(
+                f'{label} ({len(data)} items, {size:.2f}MB, identical output: {identical}, best of {repeat}):'
+            )
+            for name, elapsed in results.items():
+                self.stdout.write(f'  {name:<16} {size / elapsed:>8,.1f} MB/s  ({elapsed * 1000:.1f}ms)')
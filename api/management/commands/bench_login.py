@@ -0,0 +1,56 @@
+import os
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from accounts.login import _check_password, _hash_pool, local_cache, verify_credentials
+from api.management.benchmark import rolled_back
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Logins/sec through /auth/login/ with full password checks and with repeat logins '
+        'served from the verified-credentials cache (accounts/login.py), plus password checks '
+        'submitted to the AUTH_HASH_WORKERS hash pool all at once, to show how it scales across cores. '
+        'Throttling is off for the run; the user is created in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20, help='Logins per measurement.')
+
+    def handle(self, *args, **options):
+        logins, workers = options['logins'], settings.AUTH_HASH_WORKERS
+        client = APIClient(SERVER_NAME='localhost')
+        payload = {'username': 'bench-login', 'password': 'bench-login-password'}
+
+        def run(count):
+            started = time.perf_counter()
+            for _ in range(count):
+                assert client.post('/auth/login/', payload, format='json').status_code == 200
+            return count / (time.perf_counter() - started)
+
+        with rolled_back(), override_settings(API_THROTTLE_RATES={}):
+            User.objects.create_user(payload['username'], password=payload['password'])
+            local_cache.clear()
+            with override_settings(AUTH_LOGIN_CACHE_TTL=0):
+                cold = run(logins)
+            verify_credentials(None, payload['username'], payload['password'])
+            warm = run(logins * 10)
+            local_cache.clear()
+
+            encoded = User.objects.get(username=payload['username']).password
+            started = time.perf_counter()
+            futures = [_hash_pool().submit(_check_password, payload['password'], encoded) for _ in range(logins * 2)]
+            assert all(future.result()[0] for future in futures)
+            parallel = logins * 2 / (time.perf_counter() - started)
+
+        self.stdout.write(f'full check        {cold:>10,.1f} logins/s (1 thread)')
+        self.stdout.write(f'cached repeat     {warm:>10,.1f} logins/s (1 thread)')
+        cores = min(workers, os.cpu_count() or 1)
+        self.stdout.write(f'hash pool, {workers} workers {parallel:>7,.1f} checks/s ({parallel / cores:,.1f} per core)')
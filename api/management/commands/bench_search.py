@@ -0,0 +1,60 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from api.management.benchmark import best_of, rolled_back
+from api.management.seeding import WORDS, zipf_weights
+from api.models import BugPost
+from api.search import search_posts
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the legacy title icontains filter with full-text search. '
+        'Seeds posts inside a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--queries', nargs='+', default=['crash', 'memory leak', 'token timeout'])
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self._seed(options['posts'])
+            for query in options['queries']:
+                self._compare(query, options['repeat'])
+
+    def _seed(self, count):
+        rng = random.Random(42)
+        # Real text is sparse: a long tail of filler words with a Zipf-like skew
+        vocabulary = WORDS + [f'word{i}' for i in range(5000)]
+        weights = zipf_weights(len(vocabulary))
+        rng.shuffle(vocabulary)
+        user = User.objects.create_user(username='bench-search-user')
+        started = time.perf_counter()
+        BugPost.objects.bulk_create(
+            (
+                BugPost(
+                    title=' '.join(rng.choices(vocabulary, weights, k=6)),
+                    description=' '.join(rng.choices(vocabulary, weights, k=60)),
+                    created_by=user,
+                )
+                for _ in range(count)
+            ),
+            batch_size=2000,
+        )
+        self.stdout.write(f'Seeded {count} posts in {time.perf_counter() - started:.2f}s')
+
+    def _compare(self, query, repeat):
+        # The legacy path as the list endpoint runs it: title icontains, newest first
+        legacy_qs = BugPost.objects.filter(title__icontains=query).order_by('-created_at', '-id')
+        legacy = best_of(lambda: list(legacy_qs[:20]), repeat)
+        fulltext = best_of(lambda: list(search_posts(BugPost.objects.all(), query)[:20]), repeat)
+        self.stdout.write(
+            f'{query!r}: icontains {legacy * 1000:.1f}ms, full-text {fulltext * 1000:.1f}ms (best of {repeat})'
+        )
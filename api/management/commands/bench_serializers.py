@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
+
+from api import serializers
+from api.fastpath import FastBugPostSerializer, FastBugSolutionSerializer
+from api.management.benchmark import best_of, rolled_back
+from api.management.seeding import seed
+from api.models import BugPost, BugSolution, Tag
+
+
+class Command(BaseCommand):
+    help = (
+        'Rows/sec of the DRF serializers and the fast read path (api/fastpath.py) on '
+        'posts and solutions, from already loaded rows and including the queries. The fast '
+        'path loads nested tags/comments itself, so its "loaded" figure includes that query. Seeds data '
+        'inside a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--rows', type=int, default=1000, help='Rows serialized per run.')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        request = Request(APIRequestFactory().get('/'))
+        context = {'request': request}
+        with rolled_back():
+            seed(users=100, posts=options['posts'], prefix='bench-serializers')
+
+            posts = BugPost.objects.select_related('created_by').prefetch_related(
+                Prefetch('tags', queryset=Tag.objects.order_by('id'))
+            ).order_by('-created_at', '-id')
+            solutions = BugSolution.objects.with_listing_data().order_by('-created_at', '-id')
+            cases = [
+                ('posts', posts, serializers.BugPostSerializer,
+                 FastBugPostSerializer.project(BugPost.objects.order_by('-created_at', '-id')),
+                 FastBugPostSerializer),
+                ('solutions', solutions, serializers.BugSolutionSerializer,
+                 FastBugSolutionSerializer.project(
+                     BugSolution.objects.with_listing_data(include={'has_voted'}).order_by('-created_at', '-id')
+                 ),
+                 FastBugSolutionSerializer),
+            ]
+            for label, queryset, serializer_class, projected, fast_class in cases:
+                instances = list(queryset[:rows])
+                values = list(projected[:rows])
+                count = len(instances)
+                results = {
+                    'serializer, loaded': best_of(
+                        lambda: serializer_class(instances, many=True, context=context).data, repeat),
+                    'fast, loaded': best_of(
+                        lambda: fast_class(values, many=True, context=context).data, repeat),
+                    'serializer + queries': best_of(
+                        lambda: serializer_class(list(queryset.all()[:rows]), many=True, context=context).data, repeat),
+                    'fast + queries': best_of(
+                        lambda: fast_class(list(projected.all()[:rows]), many=True, context=context).data, repeat),
+                }
+                self.stdout.write(f'{label} ({count} rows, best of {repeat}):')
+                for name, elapsed in results.items():
+                    self.stdout.write(f'  {name:<22} {count / elapsed:>10,.0f} rows/s  ({elapsed * 1000:.1f}ms)')
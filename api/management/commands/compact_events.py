@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.events import compact
+
+
+class Command(BaseCommand):
+    help = 'Delete activity feed events older than --days (default API_FEED_RETENTION_DAYS).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else settings.API_FEED_RETENTION_DAYS
+        deleted = compact(timezone.now() - timedelta(days=days), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} event(s) older than {days} day(s).'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import invalidate
+from api.ranking import rebuild_scores
+
+
+class Command(BaseCommand):
+    help = 'Recompute BugSolution.score for every solution, e.g. after changing the constants in api/ranking.py.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        changed = rebuild_scores(batch_size=options['batch_size'])
+        if changed:
+            # bulk_update() sends no signals
+            invalidate('bug-solution')
+        self.stdout.write(self.style.SUCCESS(f'Updated the score of {changed} solution(s).'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from api.cache import invalidate
+from api.models import BugSolution, upvote_count_subquery
+
+
+class Command(BaseCommand):
+    help = 'Recompute BugSolution.vote_count from the Upvote table and repair any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Only report drifted solutions.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        drifted = list(
+            BugSolution.objects.annotate(actual=upvote_count_subquery())
+            .exclude(vote_count=F('actual'))
+            .values_list('pk', flat=True)
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f'{len(drifted)} solution(s) have a drifted vote_count.')
+            return
+
+        for start in range(0, len(drifted), batch_size):
+            batch = drifted[start:start + batch_size]
+            with transaction.atomic():
+                BugSolution.objects.filter(pk__in=batch).update(vote_count=upvote_count_subquery())
+
+        if drifted:
+            # queryset.update() sends no signals
+            invalidate('bug-solution')
+        self.stdout.write(self.style.SUCCESS(f'Repaired vote_count on {len(drifted)} solution(s).'))
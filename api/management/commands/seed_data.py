@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.management.seeding import seed
+
+
+class Command(BaseCommand):
+    help = 'Seed the database with a synthetic, skewed bug tracker dataset.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--solutions-per-post', type=int, default=3)
+        parser.add_argument('--comments-per-solution', type=int, default=2)
+        parser.add_argument('--upvotes-per-solution', type=int, default=3)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--tags-per-post', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, for reproducible datasets.')
+        parser.add_argument('--prefix', default='seed', help='Prefix for generated usernames and tag names.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            result = seed(
+                users=options['users'],
+                posts=options['posts'],
+                solutions_per_post=options['solutions_per_post'],
+                comments_per_solution=options['comments_per_solution'],
+                upvotes_per_solution=options['upvotes_per_solution'],
+                tags=options['tags'],
+                tags_per_post=options['tags_per_post'],
+                random_seed=options['seed'],
+                prefix=options['prefix'],
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(result.users)} users, {len(result.posts)} posts, '
+            f'{len(result.solutions)} solutions, {len(result.comments)} comments, '
+            f'{result.upvotes} upvotes and {len(result.tags)} tags '
+            f'in {time.perf_counter() - started:.2f}s'
+        ))
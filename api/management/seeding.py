@@ -0,0 +1,127 @@
+"""
+Synthetic data generator used by the seed_data command and the bench_* commands.
+
+Everything is written with bulk_create. Activity is skewed the way real
+trackers are: a few users write most posts, and a few posts and solutions
+attract most of the solutions, comments and votes (Zipf-like weights).
+"""
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from api.cache import invalidate
+from api.models import BugPost, BugSolution, Comment, Tag, Upvote
+from api.ranking import rebuild_scores
+
+User = get_user_model()
+
+WORDS = (
+    'login logout crash freeze timeout token session cache query index migration '
+    'button form upload download image json parser encoder null pointer memory leak '
+    'deadlock retry network socket proxy header cookie redirect permission admin'
+).split()
+
+
+@dataclass
+class SeedResult:
+    users: list = field(default_factory=list)
+    posts: list = field(default_factory=list)
+    solutions: list = field(default_factory=list)
+    tags: list = field(default_factory=list)
+    comments: list = field(default_factory=list)
+    upvotes: int = 0
+
+
+def zipf_weights(count, exponent=1.0):
+    return [1.0 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+def seed(users=100, posts=1000, solutions_per_post=3, comments_per_solution=2,
+         upvotes_per_solution=3, tags=50, tags_per_post=2, random_seed=42, prefix='seed',
+         batch_size=2000):
+    """Create a dataset and return what was created. Counts are averages where skewed."""
+    rng = random.Random(random_seed)
+    result = SeedResult()
+
+    # One shared unusable hash; hashing per user would dominate seeding time
+    password = make_password(None)
+    result.users = User.objects.bulk_create(
+        [User(username=f'{prefix}-user-{i}', password=password) for i in range(users)],
+        batch_size=batch_size,
+    )
+    user_weights = zipf_weights(len(result.users))
+
+    result.tags = Tag.objects.bulk_create(
+        [Tag(name=f'{prefix}-tag-{i}', slug=f'{prefix}-tag-{i}') for i in range(tags)],
+        batch_size=batch_size,
+    )
+
+    def text(words):
+        return ' '.join(rng.choices(WORDS, k=words))
+
+    result.posts = BugPost.objects.bulk_create(
+        [
+            BugPost(title=text(5)[:100], description=text(40), created_by=author)
+            for author in rng.choices(result.users, user_weights, k=posts)
+        ],
+        batch_size=batch_size,
+    )
+    post_weights = zipf_weights(len(result.posts), 0.8)
+
+    result.solutions = BugSolution.objects.bulk_create(
+        [
+            BugSolution(description=text(30), bug_post=post, created_by=author)
+            for post, author in zip(
+                rng.choices(result.posts, post_weights, k=posts * solutions_per_post),
+                rng.choices(result.users, user_weights, k=posts * solutions_per_post),
+            )
+        ],
+        batch_size=batch_size,
+    )
+    solution_count = len(result.solutions)
+    solution_weights = zipf_weights(solution_count, 0.8)
+
+    comments = [
+        Comment(description=text(15), bug_solution=solution, created_by=author)
+        for solution, author in zip(
+            rng.choices(result.solutions, solution_weights, k=solution_count * comments_per_solution),
+            rng.choices(result.users, user_weights, k=solution_count * comments_per_solution),
+        )
+    ]
+    result.comments = Comment.objects.bulk_create(comments, batch_size=batch_size)
+
+    # Unique (user, solution) pairs, never on one's own solution
+    votes = {}
+    for solution, voter in zip(
+        rng.choices(result.solutions, solution_weights, k=solution_count * upvotes_per_solution),
+        rng.choices(result.users, k=solution_count * upvotes_per_solution),
+    ):
+        if voter.pk != solution.created_by_id:
+            votes[(voter.pk, solution.pk)] = Upvote(user=voter, bug_solution=solution)
+    Upvote.objects.bulk_create(votes.values(), batch_size=batch_size)
+    result.upvotes = len(votes)
+
+    counts = Counter(solution_id for _, solution_id in votes)
+    voted = [solution for solution in result.solutions if solution.pk in counts]
+    for solution in voted:
+        solution.vote_count = counts[solution.pk]
+    BugSolution.objects.bulk_update(voted, ['vote_count'], batch_size=batch_size)
+    rebuild_scores([solution.pk for solution in result.solutions], batch_size=batch_size)
+
+    through = Tag.post.through
+    links = {
+        (post.pk, tag.pk)
+        for post in result.posts
+        for tag in rng.sample(result.tags, min(tags_per_post, len(result.tags)))
+    }
+    through.objects.bulk_create(
+        [through(bugpost_id=post_id, tag_id=tag_id) for post_id, tag_id in links],
+        batch_size=batch_size,
+    )
+
+    # bulk writes send no signals
+    invalidate('bug-post', 'bug-solution', 'comment', 'tag')
+    return result
@@ -0,0 +1,110 @@
+"""
+In-process request metrics, rendered in the Prometheus text format at /metrics/.
+
+RequestMetricsMiddleware (api/middleware.py) records one observation per request;
+values are aggregated per process, so scrape every worker. The endpoint answers
+staff sessions and requests bearing API_METRICS_TOKEN, and 404s for anyone else.
+"""
+import threading
+from collections import defaultdict
+
+from .cache import cache_stats
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (128, 1024, 8192, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        # labels -> [bucket counts..., sum, count]
+        self._series = defaultdict(lambda: [0] * len(buckets) + [0.0, 0])
+
+    def observe(self, labels, value):
+        series = self._series[labels]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, series in sorted(self._series.items()):
+            label_text = _labels(labels)
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {series[-1]}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {series[-2]}')
+            lines.append(f'{self.name}_count{{{label_text}}} {series[-1]}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._series = defaultdict(int)
+
+    def inc(self, labels, amount=1):
+        self._series[labels] += amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self._series.items()):
+            lines.append(f'{self.name}{{{_labels(labels)}}} {value}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in labels)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = Counter('api_requests_total', 'Requests by view, method and status.')
+        self.duration = Histogram('api_request_duration_seconds', 'Wall time per request.', DURATION_BUCKETS)
+        self.db_time = Histogram('api_request_db_seconds', 'Database time per request.', DURATION_BUCKETS)
+        self.queries = Histogram('api_request_queries', 'Queries per request.', QUERY_BUCKETS)
+        self.duplicates = Counter('api_request_duplicate_queries_total', 'Queries repeating an earlier identical query in the same request.')
+        self.size = Histogram('api_response_size_bytes', 'Response body size.', SIZE_BUCKETS)
+
+    def record(self, view, method, status_code, duration, db_time, queries, duplicates, size):
+        labels = (('view', view), ('method', method))
+        with self._lock:
+            self.requests.inc(labels + (('status', status_code),))
+            self.duration.observe(labels, duration)
+            self.db_time.observe(labels, db_time)
+            self.queries.observe(labels, queries)
+            if duplicates:
+                self.duplicates.inc(labels, duplicates)
+            if size is not None:
+                self.size.observe(labels, size)
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for metric in (self.requests, self.duration, self.db_time, self.queries, self.duplicates, self.size):
+                lines.extend(metric.render())
+
+        lines.append('# HELP api_response_cache_total Response cache lookups by namespace and outcome.')
+        lines.append('# TYPE api_response_cache_total counter')
+        for key, value in sorted(cache_stats().items()):
+            if '.' in key:
+                namespace, outcome = key.rsplit('.', 1)
+                lines.append(f'api_response_cache_total{{namespace="{_escape(namespace)}",outcome="{outcome}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
@@ -0,0 +1,107 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .metrics import registry
+
+slow_logger = logging.getLogger('api.slow_requests')
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper counting queries, their time and exact repeats.
+    SQL text is only kept when the slow-request log may need it.
+    """
+
+    def __init__(self, keep_sql):
+        self.count = 0
+        self.duplicates = 0
+        self.time = 0.0
+        self.keep_sql = keep_sql
+        self.statements = []
+        self._seen = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.time += elapsed
+            fingerprint = hash((sql, repr(params)))
+            if fingerprint in self._seen:
+                self.duplicates += 1
+            else:
+                self._seen.add(fingerprint)
+            if self.keep_sql:
+                self.statements.append((elapsed, sql, params))
+
+
+class RequestMetricsMiddleware:
+    """
+    Records wall time, DB time, query count, duplicate queries and response
+    size per resolved view into api.metrics.registry, and logs the SQL of
+    requests slower than API_SLOW_REQUEST_MS (when set).
+
+    Works in both sync and async chains, so async views under ASGI are not
+    pushed onto a worker thread by this middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder(keep_sql=bool(settings.API_SLOW_REQUEST_MS))
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            self._install(stack, recorder)
+            response = self.get_response(request)
+        self._record(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder(keep_sql=bool(settings.API_SLOW_REQUEST_MS))
+        started = time.perf_counter()
+        stack = ExitStack()
+        # Connections are per thread; the async ORM of one ASGI request runs on
+        # that request's thread-sensitive executor thread, so wrap them there.
+        await sync_to_async(self._install)(stack, recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self._record(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    def _install(self, stack, recorder):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+
+    def _record(self, request, response, recorder, duration):
+        slow_ms = settings.API_SLOW_REQUEST_MS
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        size = None if response.streaming else len(response.content)
+        registry.record(
+            view, request.method, response.status_code, duration,
+            recorder.time, recorder.count, recorder.duplicates, size,
+        )
+
+        if slow_ms and duration * 1000 >= slow_ms:
+            slow_logger.warning(
+                'Slow request %s %s (%s): %.1fms, %d queries (%.1fms in DB, %d duplicates)\n%s',
+                request.method, request.get_full_path(), view, duration * 1000,
+                recorder.count, recorder.time * 1000, recorder.duplicates,
+                '\n'.join(f'  [{elapsed * 1000:.2f}ms] {sql} {params!r}' for elapsed, sql, params in recorder.statements),
+            )
@@ -0,0 +1,40 @@
+# Generated by Django 6.0 on 2026-10-18 13:25
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_vote_count(apps, schema_editor):
+    BugSolution = apps.get_model('api', 'BugSolution')
+    Upvote = apps.get_model('api', 'Upvote')
+    votes = (
+        Upvote.objects.filter(bug_solution=OuterRef('pk'))
+        .order_by()
+        .values('bug_solution')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    BugSolution.objects.update(
+        vote_count=Coalesce(Subquery(votes, output_field=models.IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_alter_upvote_bug_solution'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bugsolution',
+            name='vote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_vote_count, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='bugsolution',
+            index=models.Index(fields=['bug_post', '-vote_count'], name='api_solution_post_votes_idx'),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 6.0 on 2026-10-18 14:02
+
+from django.db import migrations
+
+POSTGRESQL_FORWARD = [
+    """
+    ALTER TABLE api_bugpost ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX api_bugpost_search_vector_idx ON api_bugpost USING GIN (search_vector)',
+]
+
+POSTGRESQL_BACKWARD = [
+    'DROP INDEX IF EXISTS api_bugpost_search_vector_idx',
+    'ALTER TABLE api_bugpost DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE api_bugpost_fts USING fts5(
+        title, description, content='api_bugpost', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER api_bugpost_fts_insert AFTER INSERT ON api_bugpost BEGIN
+        INSERT INTO api_bugpost_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER api_bugpost_fts_delete AFTER DELETE ON api_bugpost BEGIN
+        INSERT INTO api_bugpost_fts(api_bugpost_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER api_bugpost_fts_update AFTER UPDATE OF title, description ON api_bugpost BEGIN
+        INSERT INTO api_bugpost_fts(api_bugpost_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO api_bugpost_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    "INSERT INTO api_bugpost_fts(api_bugpost_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS api_bugpost_fts_update',
+    'DROP TRIGGER IF EXISTS api_bugpost_fts_delete',
+    'DROP TRIGGER IF EXISTS api_bugpost_fts_insert',
+    'DROP TABLE IF EXISTS api_bugpost_fts',
+]
+
+
+def _run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+    # The search structures live outside the model state (see api/search.py),
+    # so they are created per database vendor instead of via model fields.
+
+    dependencies = [
+        ('api', '0009_bugsolution_vote_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run_for_vendor({'postgresql': POSTGRESQL_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run_for_vendor({'postgresql': POSTGRESQL_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
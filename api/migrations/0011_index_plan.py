@@ -0,0 +1,48 @@
+# Generated by Django 6.0 on 2026-10-18 13:46
+
+from django.db import migrations, models
+
+
+def create_tag_name_trigram_index(apps, schema_editor):
+    # Serves Tag.name icontains lookups (BugPostFilter); PostgreSQL only
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS api_tag_name_trgm_idx ON api_tag USING GIN (name gin_trgm_ops)'
+        )
+
+
+def drop_tag_name_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS api_tag_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_bugpost_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bugpost',
+            index=models.Index(fields=['created_at', 'id'], name='api_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bugsolution',
+            index=models.Index(fields=['bug_post', 'created_at'], name='api_solution_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bugsolution',
+            index=models.Index(fields=['created_at', 'id'], name='api_solution_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['bug_solution', 'created_at'], name='api_comment_solution_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created_at', 'id'], name='api_comment_created_idx'),
+        ),
+        migrations.RunPython(create_tag_name_trigram_index, drop_tag_name_trigram_index),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 6.0 on 2026-10-18 13:56
+
+import api.ranking
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_score(apps, schema_editor):
+    BugSolution = apps.get_model('api', 'BugSolution')
+    Upvote = apps.get_model('api', 'Upvote')
+    Comment = apps.get_model('api', 'Comment')
+
+    def count(model):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(bug_solution=OuterRef('pk'))
+                .order_by()
+                .values('bug_solution')
+                .annotate(total=Count('pk'))
+                .values('total'),
+                output_field=models.IntegerField(),
+            ),
+            0,
+        )
+
+    solutions = BugSolution.objects.annotate(
+        votes=count(Upvote), comment_total=count(Comment)
+    ).only('pk', 'created_at')
+    batch = []
+    for solution in solutions.iterator(chunk_size=2000):
+        solution.score = api.ranking.solution_score(solution.votes, solution.comment_total, solution.created_at)
+        batch.append(solution)
+        if len(batch) == 2000:
+            BugSolution.objects.bulk_update(batch, ['score'])
+            batch = []
+    BugSolution.objects.bulk_update(batch, ['score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_index_plan'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bugsolution',
+            name='score',
+            field=models.FloatField(default=api.ranking.initial_score),
+        ),
+        migrations.RunPython(backfill_score, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='bugsolution',
+            index=models.Index(fields=['bug_post', '-score', '-id'], name='api_solution_post_score_idx'),
+        ),
+    ]
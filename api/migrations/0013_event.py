@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 14:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_bugsolution_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=32)),
+                ('post_id', models.BigIntegerField(null=True)),
+                ('object_id', models.BigIntegerField()),
+                ('actor', models.CharField(blank=True, max_length=150)),
+                ('data', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_event'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['post_id', 'id'], name='api_event_post_idx'),
+        ),
+    ]
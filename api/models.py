@@ -1,8 +1,103 @@
 from django.db import models
+from django.db.models import Count, Exists, F, Max, OuterRef, Prefetch, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from .ranking import initial_score
 
 User = get_user_model()
 
+def upvote_count_subquery():
+    """Live count of upvotes for the outer BugSolution row."""
+    return Coalesce(
+        Subquery(
+            Upvote.objects.filter(bug_solution=OuterRef('pk'))
+            .order_by()
+            .values('bug_solution')
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=models.IntegerField(),
+        ),
+        0,
+    )
+
+
+def per_post_subquery(queryset, post_path, aggregate, output_field):
+    """``aggregate`` over the rows of ``queryset`` belonging to the outer BugPost row."""
+    return Subquery(
+        queryset.filter(**{post_path: OuterRef('pk')})
+        .order_by()
+        .values(post_path)
+        .annotate(value=aggregate)
+        .values('value'),
+        output_field=output_field,
+    )
+
+
+class BugPostQuerySet(models.QuerySet):
+    def touch(self):
+        """
+        Move updated_at to now for changes with no timestamp of their own (tag
+        links, withdrawn votes, deleted solutions and comments), so that
+        ``?since=`` exports pick them up. Sends no signals.
+        """
+        return self.update(updated_at=timezone.now())
+
+    def with_summary(self):
+        """
+        Annotate solution_count, comment_count, vote_count (the sum of the
+        solutions' cached counters) and last_activity, the latest of the
+        post's own update and any solution, comment or upvote on it. Each is a
+        correlated subquery, so a page of summaries is a single statement.
+        """
+        count, when = models.IntegerField(), models.DateTimeField()
+        solutions = BugSolution.objects.all()
+        comments = Comment.objects.all()
+        upvotes = Upvote.objects.all()
+        return self.annotate(
+            solution_count=Coalesce(per_post_subquery(solutions, 'bug_post', Count('pk'), count), 0),
+            comment_count=Coalesce(per_post_subquery(comments, 'bug_solution__bug_post', Count('pk'), count), 0),
+            vote_count=Coalesce(per_post_subquery(solutions, 'bug_post', Sum('vote_count'), count), 0),
+            # GREATEST() is NULL on SQLite as soon as one argument is
+            last_activity=Greatest(
+                F('updated_at'),
+                Coalesce(per_post_subquery(solutions, 'bug_post', Max('updated_at'), when), F('updated_at')),
+                Coalesce(per_post_subquery(comments, 'bug_solution__bug_post', Max('updated_at'), when), F('updated_at')),
+                Coalesce(per_post_subquery(upvotes, 'bug_solution__bug_post', Max('created_at'), when), F('updated_at')),
+            ),
+        )
+
+
+class BugSolutionQuerySet(models.QuerySet):
+    def with_listing_data(self, user=None, include=None):
+        """
+        Annotate has_voted and prefetch authors and comments,
+        so serializing a page of solutions costs a fixed number of queries.
+        ``include`` limits this to the serializer fields a sparse response
+        will contain (None: all of them).
+        """
+        def wanted(name):
+            return include is None or name in include
+
+        queryset = self
+        if wanted('created_by'):
+            queryset = queryset.select_related('created_by')
+        if wanted('has_voted'):
+            if user is not None and user.is_authenticated:
+                has_voted = Exists(
+                    Upvote.objects.filter(bug_solution=OuterRef('pk'), user=user)
+                )
+            else:
+                has_voted = Value(False, output_field=models.BooleanField())
+            queryset = queryset.annotate(has_voted=has_voted)
+        if wanted('comments'):
+            queryset = queryset.prefetch_related(
+                Prefetch('comments', queryset=Comment.objects.select_related('created_by').order_by('created_at', 'id'))
+            )
+        return queryset
+
+
 # Create your models here.
 class BugPost(models.Model):
     title = models.CharField(max_length=100)
@@ -11,6 +106,14 @@ class BugPost(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BugPostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order, see api/pagination.py
+            models.Index(fields=['created_at', 'id'], name='api_post_created_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -20,6 +123,20 @@ class BugSolution(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized Upvote count, kept in sync by the upvote toggle
+    vote_count = models.PositiveIntegerField(default=0)
+    # Ranking from votes, comments and age, see api/ranking.py
+    score = models.FloatField(default=initial_score)
+
+    objects = BugSolutionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['bug_post', '-vote_count'], name='api_solution_post_votes_idx'),
+            models.Index(fields=['bug_post', '-score', '-id'], name='api_solution_post_score_idx'),
+            models.Index(fields=['bug_post', 'created_at'], name='api_solution_post_created_idx'),
+            models.Index(fields=['created_at', 'id'], name='api_solution_created_idx'),
+        ]
 
 class Comment(models.Model):
     description = models.TextField()
@@ -28,6 +145,12 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['bug_solution', 'created_at'], name='api_comment_solution_idx'),
+            models.Index(fields=['created_at', 'id'], name='api_comment_created_idx'),
+        ]
+
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(max_length=60, unique=True, blank=True)
@@ -42,4 +165,24 @@ class Upvote(models.Model):
         unique_together = ('user', 'bug_solution')
 
     def __str__(self):
-        return f"{self.user.username}"
\ No newline at end of file
+        return f"{self.user.username}"
+
+class Event(models.Model):
+    """
+    Append-only activity log behind the feed, see api/events.py. The primary
+    key is the feed sequence; post and object ids are plain integers so that
+    events outlive the rows they describe until compaction removes them.
+    """
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=32)
+    post_id = models.BigIntegerField(null=True)
+    object_id = models.BigIntegerField()
+    actor = models.CharField(max_length=150, blank=True)
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # One post's events in sequence order, for the live streams
+            models.Index(fields=['post_id', 'id'], name='api_event_post_idx'),
+        ]
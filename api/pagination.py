@@ -0,0 +1,18 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (created_at, id), newest first.
+    The cursor is an opaque token, so deep pages cost the same as the first one.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+
+class TagCursorPagination(CreatedAtCursorPagination):
+    # Tags have no timestamp, the primary key is the keyset
+    ordering = ('-id',)
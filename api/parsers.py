@@ -0,0 +1,40 @@
+"""
+JSON parser backed by orjson when it is installed, stdlib json otherwise.
+
+orjson only reads UTF-8, rejects NaN/Infinity and turns integers wider than
+64 bits into floats, so other charsets, non-strict mode, bodies with a run
+of 20 or more digits and any body orjson refuses are handed to
+rest_framework's JSONParser. Whatever it accepts or rejects is therefore
+exactly what the stock parser would.
+"""
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Digits to b'0', everything else to a space; a run of 20 zeros in the
+# translated body is a number orjson may read as a float instead of an int
+DIGITS = bytes(0x30 if 0x30 <= byte <= 0x39 else 0x20 for byte in range(256))
+WIDE_INTEGER = b'0' * 20
+
+
+class FastJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read() if stream is not None else b''
+        if WIDE_INTEGER in body.translate(DIGITS):
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # Let the stock parser accept what it accepts and word the error
+            return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,160 @@
+"""
+In-process publish/subscribe fan-out for the live streams (api/async_views.py).
+
+Subscribers live on an event loop and read from a bounded queue. Publishing
+is thread-safe and never blocks: a subscriber whose queue is full is flagged
+``overflowed`` and the message is dropped. The event log is the source of
+truth, so the stream catches up from the database instead of the queue
+growing without bound.
+
+How messages reach the hub is up to API_PUBSUB_BACKEND:
+
+* ``api.pubsub.LocalBackend`` delivers straight to this process's
+  subscribers. It is enough for a single ASGI process and for tests.
+* ``api.pubsub.EventLogBackend`` ignores ``publish()`` and instead tails the
+  Event table from a background thread. Every process sees every event,
+  whichever process wrote it, with no broker beyond the database.
+
+Any class with ``publish(channel, message)`` and ``subscribed(channel)``
+(called on a process's first subscription to a channel) can be plugged in,
+e.g. one on Redis pub/sub.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, hub, channel, maxsize):
+        self.hub = hub
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def _put(self, message):
+        # Runs on the subscriber's loop
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def deliver(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # Loop already closed, the stream is gone
+            self.close()
+
+    async def get(self):
+        return await self.queue.get()
+
+    def drain(self):
+        """Drop whatever is queued and clear the overflow flag."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.overflowed = False
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = defaultdict(set)
+
+    def subscribe(self, channel, maxsize=None):
+        subscription = Subscription(self, channel, maxsize or settings.API_PUBSUB_QUEUE_SIZE)
+        with self._lock:
+            self._channels[channel].add(subscription)
+        get_backend().subscribed(channel)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._channels.get(channel, ()))
+
+    def deliver(self, channel, message):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+
+hub = Hub()
+
+
+class LocalBackend:
+    def publish(self, channel, message):
+        hub.deliver(channel, message)
+
+    def subscribed(self, channel):
+        pass
+
+
+class EventLogBackend:
+    """Tails the Event table and delivers each new event to ``post:<id>``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def publish(self, channel, message):
+        pass
+
+    def subscribed(self, channel):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='api-pubsub-tail', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        from .events import as_dict, events_since
+        from .models import Event
+
+        since = None
+        while True:
+            close_old_connections()
+            try:
+                if since is None:
+                    since = Event.objects.order_by('-id').values_list('id', flat=True).first() or 0
+                for event in events_since(since, settings.API_FEED_BATCH_SIZE):
+                    since = event.id
+                    if event.post_id is not None:
+                        hub.deliver(f'post:{event.post_id}', as_dict(event))
+            except Exception:
+                logger.exception('Reading the event log for the pubsub hub failed')
+            time.sleep(settings.API_FEED_POLL_INTERVAL)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None or type(_backend) is not import_string(settings.API_PUBSUB_BACKEND):
+            _backend = import_string(settings.API_PUBSUB_BACKEND)()
+        return _backend
+
+
+def publish(channel, message):
+    get_backend().publish(channel, message)
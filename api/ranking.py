@@ -0,0 +1,83 @@
+"""
+"Top solutions" score, stored on BugSolution.score and kept current per solution.
+
+    score = log10(1 + votes + COMMENT_WEIGHT * comments) + (created - EPOCH) / DECAY_SECONDS
+
+Time decay is folded into the stored value instead of being applied at read
+time: a solution created DECAY_SECONDS later needs roughly ten times less
+activity to rank the same. Scores therefore never go stale as time passes,
+only when votes or comments change, and ``ORDER BY score`` can be served from
+an index.
+
+Changing the constants changes every score; run ``manage.py rebuild_scores``.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+DECAY_SECONDS = 7 * 24 * 3600
+COMMENT_WEIGHT = 0.5
+
+
+def solution_score(votes, comments, created_at):
+    activity = votes + COMMENT_WEIGHT * comments
+    return round(
+        math.log10(1 + activity) + (created_at - EPOCH).total_seconds() / DECAY_SECONDS,
+        7,
+    )
+
+
+def initial_score():
+    """Default for new solutions: no activity yet, created now."""
+    return solution_score(0, 0, timezone.now())
+
+
+def refresh_scores(solution_ids):
+    """Recompute the score of the given solutions from their live upvotes and comments."""
+    from .models import BugSolution, Comment, upvote_count_subquery
+
+    solution_ids = set(solution_ids)
+    if not solution_ids:
+        return 0
+    comment_count = Coalesce(
+        Subquery(
+            Comment.objects.filter(bug_solution=OuterRef('pk'))
+            .order_by()
+            .values('bug_solution')
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=models.IntegerField(),
+        ),
+        0,
+    )
+    with transaction.atomic():
+        solutions = list(
+            BugSolution.objects.filter(pk__in=solution_ids)
+            .annotate(votes=upvote_count_subquery(), comment_total=comment_count)
+            .only('pk', 'created_at', 'score')
+        )
+        changed = []
+        for solution in solutions:
+            score = solution_score(solution.votes, solution.comment_total, solution.created_at)
+            if score != solution.score:
+                solution.score = score
+                changed.append(solution)
+        BugSolution.objects.bulk_update(changed, ['score'])
+    return len(changed)
+
+
+def rebuild_scores(ids=None, batch_size=1000):
+    """Recompute the scores of ``ids`` (default: every solution) in batches; returns how many changed."""
+    from .models import BugSolution
+
+    changed = 0
+    if ids is None:
+        ids = list(BugSolution.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(ids), batch_size):
+        changed += refresh_scores(ids[start:start + batch_size])
+    return changed
@@ -0,0 +1,70 @@
+"""
+JSON renderer backed by orjson when it is installed, stdlib json otherwise.
+
+Output is meant to be byte-for-byte what rest_framework's JSONRenderer
+produces: datetimes, dates, times, decimals and lazy strings go through
+DRF's own encoder, U+2028/U+2029 are escaped, and anything orjson cannot
+represent the same way falls back to the stdlib path. This covers indented
+output, non-compact or ASCII-only settings, and integers wider than
+64 bits. Two differences remain, neither of which the api's own payloads
+produce: floats that need an exponent are written as 1e16 rather than
+1e+16, and NaN and infinities render as null instead of failing under
+STRICT_JSON.
+
+With API_JSON_VERIFY enabled, every response is also rendered by the stdlib
+path and mismatches are logged (and the stdlib bytes returned). Use it to
+check compatibility against real traffic before trusting the fast path.
+"""
+import logging
+
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONRenderer(JSONRenderer):
+    def __init__(self):
+        self._default = encoders.JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        fast = self._render_fast(data, accepted_media_type, renderer_context or {})
+        if fast is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if settings.API_JSON_VERIFY:
+            expected = super().render(data, accepted_media_type, renderer_context)
+            if fast != expected:
+                logger.warning(
+                    'orjson output differs from JSONRenderer for %s',
+                    getattr((renderer_context or {}).get('request'), 'path', 'unknown path'),
+                )
+                return expected
+        return fast
+
+    def _render_fast(self, data, accepted_media_type, renderer_context):
+        """orjson bytes, or None where only the stdlib path matches DRF exactly."""
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return None
+        try:
+            ret = orjson.dumps(data, default=self._default, option=ORJSON_OPTIONS)
+        except (orjson.JSONEncodeError, TypeError):
+            return None
+        # Same strict-javascript-subset escaping as JSONRenderer
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
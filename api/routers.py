@@ -0,0 +1,160 @@
+"""
+Read-replica routing for the api viewsets.
+
+ReplicaReadsMixin decides once per request, after authentication, where the
+request's reads go. For safe methods it picks the next healthy alias from
+API_REPLICA_ALIASES; anything else stays on the primary. ReplicaRouter then
+sends reads to that alias. Writes, and reads outside such a request, go to
+the primary as before.
+
+Read-your-writes: a successful write pins its user (or session) to the
+primary for API_REPLICA_STICKY_SECONDS, long enough for replicas to catch
+up. Pins live in the api cache (CACHES['api']), so they hold across
+processes when that cache is shared.
+
+Failover: a replica that refuses connections, or loses its connection
+mid-request, is marked down for API_REPLICA_RETRY_SECONDS and the request is
+served again from another replica or the primary. Errors from a query on a
+working connection are raised as they would be on the primary.
+"""
+import contextvars
+import itertools
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, InterfaceError, OperationalError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+_read_alias = contextvars.ContextVar('api_read_alias', default=None)
+_turn = itertools.count()
+_down_until = {}
+_down_lock = threading.Lock()
+
+
+def replica_aliases():
+    return settings.API_REPLICA_ALIASES
+
+
+def mark_down(alias):
+    with _down_lock:
+        _down_until[alias] = time.monotonic() + settings.API_REPLICA_RETRY_SECONDS
+    logger.warning('Read replica %s marked down for %ss', alias, settings.API_REPLICA_RETRY_SECONDS)
+
+
+def is_up(alias):
+    with _down_lock:
+        return _down_until.get(alias, 0) <= time.monotonic()
+
+
+def reset_health():
+    with _down_lock:
+        _down_until.clear()
+
+
+def connection_lost(alias):
+    """Whether a failed query on ``alias`` was the connection's fault rather than the query's."""
+    connection = connections[alias]
+    return connection.connection is None or not connection.is_usable()
+
+
+def choose_replica():
+    """A reachable replica, round robin over the healthy ones, or None for the primary."""
+    aliases = [alias for alias in replica_aliases() if is_up(alias)]
+    if not aliases:
+        return None
+    start = next(_turn)
+    for offset in range(len(aliases)):
+        alias = aliases[(start + offset) % len(aliases)]
+        try:
+            # A no-op on an open connection; broken ones surface at query time
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            mark_down(alias)
+            continue
+        return alias
+    return None
+
+
+def _pin_key(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'replica-pin:user:{user.pk}'
+    session = getattr(request, 'session', None)
+    session_key = getattr(session, 'session_key', None)
+    return f'replica-pin:session:{session_key}' if session_key else None
+
+
+def pin_to_primary(request):
+    key = _pin_key(request)
+    if key is not None and settings.API_REPLICA_STICKY_SECONDS:
+        caches[settings.API_CACHE_ALIAS].set(key, True, settings.API_REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(request):
+    key = _pin_key(request)
+    return key is not None and bool(caches[settings.API_CACHE_ALIAS].get(key))
+
+
+def current_read_alias():
+    """The replica this request reads from, or None."""
+    return _read_alias.get()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's rows
+        databases = {'default', *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema through replication
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaReadsMixin:
+    """Viewset mixin routing the reads of safe requests to a replica."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and replica_aliases() and not is_pinned(request):
+            alias = choose_replica()
+            if alias is not None:
+                self._read_alias_token = _read_alias.set(alias)
+
+    def _reset_read_alias(self):
+        token = getattr(self, '_read_alias_token', None)
+        if token is not None:
+            _read_alias.reset(token)
+            self._read_alias_token = None
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        except (OperationalError, InterfaceError):
+            alias = current_read_alias()
+            if alias is None or not connection_lost(alias):
+                raise
+            self._reset_read_alias()
+            mark_down(alias)
+            # Safe requests have no side effects, so run it again elsewhere
+            response = super().dispatch(request, *args, **kwargs)
+        finally:
+            self._reset_read_alias()
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(self.request)
+        return response
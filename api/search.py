@@ -0,0 +1,101 @@
+"""
+Full-text search over BugPost title and description.
+
+PostgreSQL uses the GIN-indexed ``search_vector`` generated column (title weighted
+above description). SQLite uses the ``api_bugpost_fts`` FTS5 table kept in sync by
+triggers. Both are created by migration 0010. Any other backend falls back to an
+icontains scan so the endpoint keeps working.
+"""
+import re
+
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+
+SNIPPET_START = '<mark>'
+SNIPPET_STOP = '</mark>'
+# The database highlights with private-use characters; render_snippet() escapes
+# the text and only then turns them into tags
+_START_SENTINEL = '\ue000'
+_STOP_SENTINEL = '\ue001'
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_posts(queryset, query):
+    """
+    Return ``queryset`` filtered to posts matching ``query``, best match first,
+    annotated with ``rank`` (higher is better) and a raw ``snippet`` for
+    render_snippet().
+    """
+    terms = _WORD_RE.findall(query)
+    if not terms:
+        return queryset.none()
+
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(queryset, ' '.join(terms))
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(queryset, terms)
+    return _search_fallback(queryset, terms)
+
+
+def render_snippet(raw):
+    """A ``snippet`` annotation as HTML: the text escaped, matches wrapped in <mark>."""
+    html = escape(raw or '')
+    return html.replace(_START_SENTINEL, SNIPPET_START).replace(_STOP_SENTINEL, SNIPPET_STOP)
+
+
+def _search_postgresql(queryset, query):
+    from django.contrib.postgres.search import (
+        SearchHeadline,
+        SearchQuery,
+        SearchRank,
+        SearchVectorField,
+    )
+
+    search_query = SearchQuery(query, config='english', search_type='plain')
+    vector = RawSQL('"api_bugpost"."search_vector"', (), output_field=SearchVectorField())
+    return (
+        queryset.alias(search_vector=vector)
+        .filter(search_vector=search_query)
+        .annotate(
+            rank=SearchRank(F('search_vector'), search_query),
+            snippet=SearchHeadline(
+                'description',
+                search_query,
+                config='english',
+                start_sel=_START_SENTINEL,
+                stop_sel=_STOP_SENTINEL,
+                max_words=30,
+            ),
+        )
+        .order_by('-rank', '-id')
+    )
+
+
+def _search_sqlite(queryset, terms):
+    # Quote every term so user input can never be parsed as FTS5 syntax
+    match = ' '.join('"%s"' % term for term in terms)
+    # Joining the FTS table (rather than subqueries) lets SQLite run MATCH once;
+    # bm25 weights mirror the PostgreSQL setup: title counts more than description.
+    return queryset.extra(
+        tables=['api_bugpost_fts'],
+        where=['api_bugpost_fts MATCH %s', 'api_bugpost_fts.rowid = api_bugpost.id'],
+        params=[match],
+        select={
+            'rank': '-bm25(api_bugpost_fts, 10.0, 5.0)',
+            'snippet': "snippet(api_bugpost_fts, 1, %s, %s, '...', 16)",
+        },
+        select_params=[_START_SENTINEL, _STOP_SENTINEL],
+    ).order_by('-rank', '-id')
+
+
+def _search_fallback(queryset, terms):
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(description__icontains=term)
+    return queryset.filter(condition).annotate(
+        rank=Value(0.0, output_field=FloatField()),
+        snippet=F('description'),
+    ).order_by('-id')
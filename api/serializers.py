@@ -6,14 +6,15 @@ from .models import (
     Tag,
     Upvote,
 )
+from .fieldsets import DynamicFieldsSerializerMixin
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ['id', 'name', 'slug']
         
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
     created_by = serializers.ReadOnlyField(source='created_by.username')
 
     class Meta:
@@ -21,9 +22,20 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ['id', 'description', 'bug_solution', 'created_by', 'created_at', 'updated_at']
         read_only_fields = ('id', 'created_by', 'created_at', 'updated_at')
 
-class BugSolutionSerializer(serializers.ModelSerializer):
+class BugPostSummarySerializer(serializers.ModelSerializer):
+    """Counts from BugPost.objects.with_summary()."""
+    solution_count = serializers.IntegerField(read_only=True)
+    comment_count = serializers.IntegerField(read_only=True)
+    vote_count = serializers.IntegerField(read_only=True)
+    last_activity = serializers.DateTimeField(read_only=True)
+
+    class Meta:
+        model = BugPost
+        fields = ['id', 'title', 'created_at', 'solution_count', 'comment_count', 'vote_count', 'last_activity']
+        read_only_fields = fields
+
+class BugSolutionSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
     bug_post = serializers.PrimaryKeyRelatedField(queryset=BugPost.objects.all())
-    vote_count = serializers.SerializerMethodField()
     has_voted = serializers.SerializerMethodField()
     created_by = serializers.ReadOnlyField(source='created_by.username')
     comments = CommentSerializer(many=True, read_only=True)
@@ -38,22 +50,27 @@ class BugSolutionSerializer(serializers.ModelSerializer):
             'created_at',
             'updated_at',
             'vote_count',
+            'score',
             'has_voted',
             'comments',
         ]
-        read_only_fields = ('created_by',)
+        read_only_fields = ('created_by', 'vote_count', 'score')
 
+    def get_expandable_fields(self):
+        return {'bug_post': BugPostSerializer(read_only=True)}
 
-    def get_vote_count(self, obj):
-        return obj.upvotes.count()
 
+    # Prefers the annotation from BugSolution.objects.with_listing_data()
+    # and only falls back to a query for instances loaded without it.
     def get_has_voted(self, obj):
+        if hasattr(obj, 'has_voted'):
+            return obj.has_voted
         user = self.context['request'].user
         if user.is_anonymous:
             return False
         return obj.upvotes.filter(user=user).exists()
 
-class BugPostSerializer(serializers.ModelSerializer):
+class BugPostSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
     created_by = serializers.ReadOnlyField(source='created_by.username')
     # solutions = BugSolutionSerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
@@ -62,3 +79,6 @@ class BugPostSerializer(serializers.ModelSerializer):
         model = BugPost
         fields = '__all__'
         read_only_fields = ('created_by',)
+
+    def get_expandable_fields(self):
+        return {'solutions': BugSolutionSerializer(many=True, read_only=True)}
@@ -0,0 +1,81 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate
+from .models import BugPost, BugSolution, Comment, Tag, Upvote
+from .ranking import refresh_scores
+
+# Which cached namespaces embed data from each model
+CACHE_DEPENDENCIES = {
+    BugPost: ('bug-post',),
+    BugSolution: ('bug-solution',),
+    # comments are nested in solutions
+    Comment: ('comment', 'bug-solution'),
+    # tags are nested in posts
+    Tag: ('tag', 'bug-post'),
+    # votes feed vote_count on solutions
+    Upvote: ('bug-solution',),
+}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_response_cache(sender, **kwargs):
+    namespaces = CACHE_DEPENDENCIES.get(sender)
+    if namespaces:
+        invalidate(*namespaces)
+
+
+@receiver(m2m_changed, sender=Tag.post.through)
+def invalidate_post_tags(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate('bug-post')
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_solution(sender, instance, update_fields=None, **kwargs):
+    # A comment moved to another solution changes the score of both
+    instance._previous_bug_solution_id = None
+    if instance._state.adding or (update_fields is not None and 'bug_solution' not in update_fields):
+        return
+    instance._previous_bug_solution_id = (
+        Comment.objects.filter(pk=instance.pk).values_list('bug_solution_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Upvote)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Upvote)
+@receiver(post_delete, sender=Comment)
+def refresh_solution_score(sender, instance, created=True, **kwargs):
+    # Edits to a comment's text do not move the score
+    previous = getattr(instance, '_previous_bug_solution_id', None)
+    if created:
+        refresh_scores([instance.bug_solution_id])
+    elif previous is not None and previous != instance.bug_solution_id:
+        refresh_scores([previous, instance.bug_solution_id])
+
+
+# Removals and tag links leave no timestamp behind; incremental exports go by BugPost.updated_at
+@receiver(post_delete, sender=BugSolution)
+def touch_post_of_solution(sender, instance, **kwargs):
+    BugPost.objects.filter(pk=instance.bug_post_id).touch()
+
+
+@receiver(post_delete, sender=Upvote)
+@receiver(post_delete, sender=Comment)
+def touch_post_of_solution_child(sender, instance, **kwargs):
+    BugPost.objects.filter(solutions=instance.bug_solution_id).touch()
+
+
+@receiver(m2m_changed, sender=Tag.post.through)
+def touch_tagged_posts(sender, instance, action, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if isinstance(instance, BugPost):
+        post_ids = [instance.pk]
+    elif action == 'pre_clear':
+        post_ids = list(instance.post.values_list('pk', flat=True))
+    else:
+        post_ids = pk_set
+    BugPost.objects.filter(pk__in=post_ids).touch()
@@ -1,8 +1,43 @@
-from rest_framework.test import APITestCase
-from rest_framework import status
+import asyncio
+import csv
+import datetime
+import decimal
+import gzip
+import itertools
+import json
+import time
+import uuid
+from io import BytesIO, StringIO
+from unittest.mock import patch
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.db.models import F
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework import serializers, status
 from django.contrib.auth import get_user_model
 from rest_framework.authtoken.models import Token
-from .models import BugPost, BugSolution, Comment, Tag, Upvote
+from . import compression, events, pubsub
+from .cache import cache_stats, get_cache, invalidate, reset_cache_stats
+from .compression import available_encodings, negotiate
+from .metrics import registry
+from .parsers import FastJSONParser
+from .renderers import FastJSONRenderer
+from .routers import ReplicaRouter, is_up, reset_health
+from .throttling import (
+    CacheBuckets, IPBucketThrottle, MemoryBuckets, TokenBucketThrottle, UserBucketThrottle, local_buckets,
+)
+from .models import BugPost, BugSolution, Comment, Event, Tag, Upvote
 
 User = get_user_model()
 
@@ -72,6 +107,48 @@ class BugPostAPITests(APITestCase, APITestHelpers):
         post.refresh_from_db()
         self.assertTrue(post.tags.filter(id=self.tag.id).exists())
 
+    def test_bulk_tags_adds_and_removes_across_posts(self):
+        ui = Tag.objects.create(name='ui', slug='ui')
+        mine = BugPost.objects.create(title='T3', description='D3', created_by=self.user)
+        theirs = BugPost.objects.create(title='T4', description='D4', created_by=self.other)
+        self.post.tags.add(self.tag)
+        self.auth_as(self.user)
+        payload = {
+            'posts': [self.post.id, mine.id, theirs.id, 999999],
+            'add': ['ui', self.tag.id],
+            'remove': ['missing-tag'],
+        }
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post('/api/bug-post/bulk_tags/', payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertLess(len(queries), 10)
+        self.assertEqual(
+            sorted(map(tuple, res.data['added'])),
+            sorted([(self.post.id, ui.id), (mine.id, ui.id), (mine.id, self.tag.id)]),
+        )
+        self.assertEqual(res.data['forbidden_posts'], [theirs.id])
+        self.assertEqual(res.data['missing_posts'], [999999])
+        self.assertEqual(res.data['unknown_tags'], ['missing-tag'])
+        self.assertFalse(theirs.tags.exists())
+
+        res = self.client.post('/api/bug-post/bulk_tags/', {'posts': [self.post.id, mine.id], 'remove': ['ui']}, format='json')
+        self.assertEqual(sorted(map(tuple, res.data['removed'])), sorted([(self.post.id, ui.id), (mine.id, ui.id)]))
+        self.assertFalse(Tag.post.through.objects.filter(tag=ui).exists())
+
+    def test_bulk_tags_takes_booleans_for_nothing(self):
+        # true would otherwise stand for post and tag 1
+        Tag.objects.filter(pk=1).first() or Tag.objects.create(id=1, name='one', slug='one')
+        BugPost.objects.filter(pk=1).first() or BugPost.objects.create(id=1, title='T1', description='D1', created_by=self.user)
+        BugPost.objects.filter(pk=1).update(created_by=self.user)
+        mine = BugPost.objects.create(title='T3', description='D3', created_by=self.user)
+        self.auth_as(self.user)
+        payload = {'posts': [True, mine.id], 'add': [True, 'bug'], 'remove': [False]}
+        res = self.client.post('/api/bug-post/bulk_tags/', payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['added'], [(mine.id, self.tag.id)])
+        self.assertEqual(res.data['missing_posts'], [True])
+        self.assertEqual(res.data['unknown_tags'], [True, False])
+
     def test_remove_tags_endpoint(self):
         post = BugPost.objects.create(title='T2', description='D2', created_by=self.user)
         post.tags.add(self.tag)
@@ -135,6 +212,108 @@ class BugSolutionAPITests(APITestCase, APITestHelpers):
         self.assertEqual(res2.status_code, status.HTTP_200_OK)
         self.assertEqual(res2.data['action'], 'unvoted')
 
+    def _seed_solutions(self, count):
+        for i in range(count):
+            solution = BugSolution.objects.create(
+                description=f's{i}', bug_post=self.post, created_by=self.user, vote_count=1
+            )
+            Upvote.objects.create(user=self.other, bug_solution=solution)
+            Comment.objects.create(description='c', bug_solution=solution, created_by=self.other)
+
+    def test_list_query_count_is_constant(self):
+        self._seed_solutions(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/bug-solution/')
+        self._seed_solutions(8)
+        with CaptureQueriesContext(connection) as large:
+            res = self.client.get('/api/bug-solution/')
+        self.assertEqual(len(res.data['results']), 10)
+        self.assertEqual(len(small), len(large))
+        # page keys + conditional GET fingerprint + solutions page (with annotations) + prefetched comments
+        self.assertEqual(len(large), 4)
+
+    def test_upvote_toggle_maintains_vote_count(self):
+        solution = BugSolution.objects.create(description='s', bug_post=self.post, created_by=self.user)
+        self.auth_as(self.other)
+        res = self.client.post(f'/api/bug-solution/{solution.id}/upvote/')
+        self.assertEqual(res.data['solution']['vote_count'], 1)
+        self.assertTrue(res.data['solution']['has_voted'])
+        solution.refresh_from_db()
+        self.assertEqual(solution.vote_count, 1)
+        res = self.client.post(f'/api/bug-solution/{solution.id}/upvote/')
+        self.assertEqual(res.data['solution']['vote_count'], 0)
+        solution.refresh_from_db()
+        self.assertEqual(solution.vote_count, 0)
+
+    def test_recount_votes_repairs_drift(self):
+        self._seed_solutions(3)
+        BugSolution.objects.update(vote_count=7)
+        call_command('recount_votes', stdout=StringIO())
+        self.assertEqual(set(BugSolution.objects.values_list('vote_count', flat=True)), {1})
+
+    def test_annotated_votes_match_upvotes(self):
+        self._seed_solutions(1)
+        self.auth_as(self.other)
+        res = self.client.get(f'/api/bug-post/{self.post.id}/solutions/')
+        item = res.data['results'][0]
+        self.assertEqual(item['vote_count'], 1)
+        self.assertTrue(item['has_voted'])
+        self.assertEqual(item['comments'][0]['created_by'], 'other')
+
+    def test_score_follows_votes_and_comments(self):
+        first = BugSolution.objects.create(description='a', bug_post=self.post, created_by=self.user)
+        second = BugSolution.objects.create(description='b', bug_post=self.post, created_by=self.user)
+        base = BugSolution.objects.get(pk=second.pk).score
+        voters = [self.create_user(f'voter{i}') for i in range(3)]
+        for voter in voters:
+            Upvote.objects.create(user=voter, bug_solution=first)
+        Comment.objects.create(description='c', bug_solution=second, created_by=self.other)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertGreater(second.score, base)
+        self.assertGreater(first.score, second.score)
+
+        self.auth_as(self.other)
+        url = f'/api/bug-post/{self.post.id}/solutions/'
+        res = self.client.get(url, {'ordering': 'score'})
+        self.assertEqual([item['id'] for item in res.data['results']], [first.id, second.id])
+        # One ranked list, never a cursor over a moving score
+        self.assertNotIn('next', res.data)
+        self.assertEqual(self.client.get(url, {'ordering': 'score', 'page_size': 1}).data['count'], 1)
+        res = self.client.get(url, {'top': 1})
+        self.assertEqual(res.data['count'], 1)
+        self.assertEqual(res.data['results'][0]['id'], first.id)
+        self.assertEqual(self.client.get(url, {'ordering': 'title'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+        Upvote.objects.filter(bug_solution=first).delete()
+        first.refresh_from_db()
+        self.assertLess(first.score, second.score)
+
+    def test_moving_a_comment_rescores_both_solutions(self):
+        first = BugSolution.objects.create(description='a', bug_post=self.post, created_by=self.user)
+        second = BugSolution.objects.create(description='b', bug_post=self.post, created_by=self.user)
+        comment = Comment.objects.create(description='c', bug_solution=first, created_by=self.other)
+        self.auth_as(self.other)
+
+        res = self.client.patch(f'/api/comment/{comment.id}/', {'bug_solution': second.id}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertLess(first.score, second.score)
+
+        res = self.client.patch('/api/comment/bulk/', [{'id': comment.id, 'bug_solution': first.id}], format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertGreater(first.score, second.score)
+
+    def test_rebuild_scores_repairs_drift(self):
+        self._seed_solutions(2)
+        expected = dict(BugSolution.objects.values_list('pk', 'score'))
+        BugSolution.objects.update(score=0)
+        call_command('rebuild_scores', stdout=StringIO())
+        self.assertEqual(dict(BugSolution.objects.values_list('pk', 'score')), expected)
+
 
 class CommentAPITests(APITestCase, APITestHelpers):
     def setUp(self):
@@ -187,6 +366,308 @@ class TagAPITests(APITestCase, APITestHelpers):
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
 
 
+class BugPostSearchTests(APITestCase, APITestHelpers):
+    def setUp(self):
+        self.user = self.create_user('author')
+        self.title_hit = BugPost.objects.create(
+            title='Login crash', description='App closes on submit', created_by=self.user
+        )
+        self.description_hit = BugPost.objects.create(
+            title='Form issue', description='The login button crash happens twice', created_by=self.user
+        )
+        BugPost.objects.create(title='Unrelated', description='Nothing here', created_by=self.user)
+
+    def test_search_matches_title_and_description_ranked(self):
+        res = self.client.get('/api/bug-post/search/', {'q': 'crash'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [self.title_hit.id, self.description_hit.id])
+        self.assertIn('<mark>crash</mark>', res.data['results'][1]['snippet'])
+
+    def test_snippet_escapes_post_text(self):
+        BugPost.objects.filter(pk=self.description_hit.pk).update(description='<img src=x onerror=alert(1)> crash & burn')
+        res = self.client.get('/api/bug-post/search/', {'q': 'crash'})
+        snippet = res.data['results'][1]['snippet']
+        self.assertEqual(snippet, '&lt;img src=x onerror=alert(1)&gt; <mark>crash</mark> &amp; burn')
+
+    def test_search_index_follows_updates_and_deletes(self):
+        self.title_hit.title = 'Logout freeze'
+        self.title_hit.save()
+        self.description_hit.delete()
+        res = self.client.get('/api/bug-post/search/', {'q': 'crash'})
+        self.assertEqual(res.data['results'], [])
+        res = self.client.get('/api/bug-post/search/', {'q': 'freeze'})
+        self.assertEqual([item['id'] for item in res.data['results']], [self.title_hit.id])
+
+    def test_search_requires_query_and_ignores_syntax(self):
+        res = self.client.get('/api/bug-post/search/')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.get('/api/bug-post/search/', {'q': 'crash" OR *'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class ResponseCacheTests(APITestCase, APITestHelpers):
+    def setUp(self):
+        get_cache().clear()
+        reset_cache_stats()
+        self.user = self.create_user('author')
+        self.other = self.create_user('other')
+        self.post = BugPost.objects.create(title='Bug', description='desc', created_by=self.user)
+        self.solution = BugSolution.objects.create(description='s', bug_post=self.post, created_by=self.user)
+
+    def test_anonymous_list_is_served_from_cache(self):
+        res = self.client.get('/api/bug-post/')
+        self.assertEqual(res['X-Cache'], 'MISS')
+        cached = self.client.get('/api/bug-post/')
+        self.assertEqual(cached['X-Cache'], 'HIT')
+        self.assertEqual(cached.json(), res.json())
+        self.assertEqual(cache_stats()['bug-post.hit'], 1)
+
+    def test_authenticated_requests_bypass_cache(self):
+        token, _ = Token.objects.get_or_create(user=self.other)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.client.get('/api/bug-solution/')
+        res = self.client.get('/api/bug-solution/')
+        self.assertNotIn('X-Cache', res)
+
+    def test_nested_changes_invalidate_parent_namespace(self):
+        self.client.get(f'/api/bug-solution/{self.solution.id}/')
+        Comment.objects.create(description='c', bug_solution=self.solution, created_by=self.other)
+        res = self.client.get(f'/api/bug-solution/{self.solution.id}/')
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(len(res.json()['comments']), 1)
+
+    def test_tag_assignment_invalidates_posts(self):
+        tag = Tag.objects.create(name='ui', slug='ui')
+        self.client.get(f'/api/bug-post/{self.post.id}/')
+        self.post.tags.add(tag)
+        res = self.client.get(f'/api/bug-post/{self.post.id}/')
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.json()['tags'][0]['slug'], 'ui')
+
+    def test_cache_stats_endpoint_is_staff_only(self):
+        self.assertEqual(self.client.get('/cache-stats/').status_code, status.HTTP_404_NOT_FOUND)
+        self.client.get('/api/bug-post/')
+        self.client.force_login(self.create_user('admin', is_staff=True))
+        res = self.client.get('/cache-stats/')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['bug-post.miss'], 1)
+
+
+class ConditionalGetTests(APITestCase, APITestHelpers):
+    def setUp(self):
+        get_cache().clear()
+        self.user = self.create_user('author')
+        self.other = self.create_user('other')
+        self.post = BugPost.objects.create(title='Bug', description='desc', created_by=self.user)
+        self.solution = BugSolution.objects.create(description='s', bug_post=self.post, created_by=self.user)
+
+    def assertNotModified(self, url, queries=1, **headers):
+        with CaptureQueriesContext(connection) as captured:
+            res = self.client.get(url, **headers)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        # a single aggregate statement (lists: plus the page keys), nothing serialized
+        self.assertEqual(len(captured), queries)
+
+    def test_detail_etag_and_last_modified(self):
+        comment = Comment.objects.create(description='c', bug_solution=self.solution, created_by=self.other)
+        url = f'/api/comment/{comment.id}/'
+        self.client.force_authenticate(self.other)
+        res = self.client.get(url)
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+        self.assertNotModified(url, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertNotModified(url, HTTP_IF_MODIFIED_SINCE=res['Last-Modified'])
+
+    def test_no_last_modified_where_removals_cant_be_dated(self):
+        upvote = Upvote.objects.create(user=self.other, bug_solution=self.solution)
+        for url in (f'/api/bug-post/{self.post.id}/', f'/api/bug-solution/{self.solution.id}/', '/api/bug-post/'):
+            res = self.client.get(url)
+            self.assertIn('ETag', res)
+            self.assertNotIn('Last-Modified', res)
+        upvote.delete()
+        res = self.client.get(f'/api/bug-solution/{self.solution.id}/', HTTP_IF_MODIFIED_SINCE='Sat, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_etag_changes_when_rows_change(self):
+        self.client.force_authenticate(self.other)
+        res = self.client.get('/api/bug-post/')
+        self.assertNotModified('/api/bug-post/', queries=2, HTTP_IF_NONE_MATCH=res['ETag'])
+        BugPost.objects.create(title='New', description='d', created_by=self.user)
+        res = self.client.get('/api/bug-post/', HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_fingerprint_covers_the_requested_page(self):
+        self.client.force_authenticate(self.other)
+        newer = BugPost.objects.create(title='Newer', description='d', created_by=self.user)
+        url = '/api/bug-post/?page_size=1'
+        etag = self.client.get(url)['ETag']
+        # Rows on later pages don't touch the first page's validators
+        BugPost.objects.filter(pk=self.post.pk).update(title='Older', updated_at=timezone.now())
+        self.assertNotModified(url, queries=2, HTTP_IF_NONE_MATCH=etag)
+        BugPost.objects.filter(pk=newer.pk).update(title='Changed', updated_at=timezone.now())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_cache_hits_revalidate_without_queries(self):
+        url = '/api/bug-post/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+        self.assertNotModified(url, queries=0, HTTP_IF_NONE_MATCH=etag)
+
+    def test_nested_children_change_the_etag(self):
+        url = f'/api/bug-solution/{self.solution.id}/'
+        etag = self.client.get(url)['ETag']
+        comment = Comment.objects.create(description='c', bug_solution=self.solution, created_by=self.other)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        etag = res['ETag']
+        Upvote.objects.create(user=self.other, bug_solution=self.solution)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        etag = res['ETag']
+        comment.delete()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_post_tags_change_the_etag(self):
+        url = f'/api/bug-post/{self.post.id}/'
+        etag = self.client.get(url)['ETag']
+        self.post.tags.add(Tag.objects.create(name='ui', slug='ui'))
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_solutions_action_is_conditional(self):
+        token, _ = Token.objects.get_or_create(user=self.other)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        url = f'/api/bug-post/{self.post.id}/solutions/'
+        res = self.client.get(url)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_malformed_ids_are_not_found(self):
+        self.client.force_authenticate(self.other)
+        for url in ('/api/bug-post/abc/', '/api/bug-solution/abc/', '/api/comment/abc/', '/api/bug-post/abc/solutions/'):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND, url)
+
+
+class BulkEndpointTests(APITestCase, APITestHelpers):
+    def setUp(self):
+        self.user = self.create_user('author')
+        self.other = self.create_user('other')
+        token, _ = Token.objects.get_or_create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_bulk_create_reports_per_item_status(self):
+        payload = [
+            {'title': 'One', 'description': 'a'},
+            {'title': '', 'description': 'b'},
+            {'title': 'Three', 'description': 'c'},
+        ]
+        res = self.client.post('/api/bug-post/bulk/', payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        statuses = [item['status'] for item in res.data['results']]
+        self.assertEqual(statuses, [201, 400, 201])
+        self.assertIn('title', res.data['results'][1]['errors'])
+        created = BugPost.objects.filter(created_by=self.user).order_by('id')
+        self.assertEqual([post.title for post in created], ['One', 'Three'])
+        self.assertEqual(res.data['results'][2]['id'], created[1].id)
+
+    def test_bulk_update_enforces_author_per_item(self):
+        mine = BugPost.objects.create(title='Mine', description='d', created_by=self.user)
+        theirs = BugPost.objects.create(title='Theirs', description='d', created_by=self.other)
+        payload = [
+            {'id': mine.id, 'title': 'Renamed'},
+            {'id': theirs.id, 'title': 'Hijacked'},
+            {'id': 999999, 'title': 'Missing'},
+        ]
+        res = self.client.patch('/api/bug-post/bulk/', payload, format='json')
+        self.assertEqual([item['status'] for item in res.data['results']], [200, 403, 404])
+        mine.refresh_from_db()
+        theirs.refresh_from_db()
+        self.assertEqual(mine.title, 'Renamed')
+        self.assertEqual(theirs.title, 'Theirs')
+
+    def test_bulk_update_query_count_is_flat(self):
+        posts = [BugPost.objects.create(title=f'P{i}', description='d', created_by=self.user) for i in range(10)]
+        counts = []
+        # The first request also looks up the auth token
+        for size in (1, 2, 10):
+            payload = [{'id': post.id, 'title': 'Renamed'} for post in posts[:size]]
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.patch('/api/bug-post/bulk/', payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            counts.append(len(queries))
+        self.assertEqual(counts[1], counts[2])
+
+    def test_bulk_delete(self):
+        post = BugPost.objects.create(title='P', description='d', created_by=self.other)
+        mine = BugSolution.objects.create(description='s', bug_post=post, created_by=self.user)
+        theirs = BugSolution.objects.create(description='s', bug_post=post, created_by=self.other)
+        res = self.client.delete('/api/bug-solution/bulk/', {'ids': [mine.id, theirs.id]}, format='json')
+        self.assertEqual([item['status'] for item in res.data['results']], [200, 403])
+        self.assertFalse(BugSolution.objects.filter(id=mine.id).exists())
+        self.assertTrue(BugSolution.objects.filter(id=theirs.id).exists())
+
+    def test_bulk_ids_are_coerced_per_item(self):
+        post = BugPost.objects.create(title='P', description='d', created_by=self.user)
+        payload = [{'id': str(post.id), 'title': 'Renamed'}, {'id': True, 'title': 'x'}, {'id': 'abc', 'title': 'x'}, {'id': 1.5}]
+        res = self.client.patch('/api/bug-post/bulk/', payload, format='json')
+        self.assertEqual([item['status'] for item in res.data['results']], [200, 400, 400, 400])
+        self.assertIn('id', res.data['results'][1]['errors'])
+        post.refresh_from_db()
+        self.assertEqual(post.title, 'Renamed')
+
+    def test_bulk_requires_auth_and_list_payload(self):
+        res = self.client.post('/api/comment/bulk/', {'description': 'x'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.credentials()
+        res = self.client.post('/api/comment/bulk/', [], format='json')
+        self.assertIn(res.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+
+class PaginationTests(APITestCase, APITestHelpers):
+    def setUp(self):
+        self.user = self.create_user('author')
+        BugPost.objects.bulk_create([
+            BugPost(title=f'Bug {i}', description='desc', created_by=self.user) for i in range(5)
+        ])
+
+    def test_cursor_pages_do_not_overlap(self):
+        seen = []
+        url = '/api/bug-post/?page_size=2'
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 2)
+            seen.extend(item['id'] for item in res.data['results'])
+            url = res.data['next']
+        self.assertEqual(sorted(seen), sorted(BugPost.objects.values_list('id', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_page_size_is_capped(self):
+        BugPost.objects.bulk_create([
+            BugPost(title=f'More {i}', description='desc', created_by=self.user) for i in range(100)
+        ])
+        res = self.client.get('/api/bug-post/?page_size=1000')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 100)
+        self.assertIsNotNone(res.data['next'])
+
+
+class SeedDataCommandTests(APITestCase):
+    def test_seed_data_creates_consistent_dataset(self):
+        call_command('seed_data', users=5, posts=10, solutions_per_post=2, tags=4, stdout=StringIO())
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(BugPost.objects.count(), 10)
+        self.assertEqual(BugSolution.objects.count(), 20)
+        self.assertTrue(Upvote.objects.exists())
+        self.assertFalse(Upvote.objects.filter(user=F('bug_solution__created_by')).exists())
+        # the denormalized counter matches the seeded votes
+        out = StringIO()
+        call_command('recount_votes', dry_run=True, stdout=out)
+        self.assertIn('0 solution(s)', out.getvalue())
+
+
 class MiscEndpointsTests(APITestCase):
     def test_health_endpoint(self):
         res = self.client.get('/health/')
@@ -197,3 +678,728 @@ class MiscEndpointsTests(APITestCase):
         res = self.client.get('/openapi/')
         # Accept either 200 OK or 302 if auth redirects; primarily assert it's reachable
         self.assertIn(res.status_code, (status.HTTP_200_OK, status.HTTP_302_FOUND))
+
+
+class RequestMetricsTests(APITestCase, APITestHelpers):
+    def setUp(self):
+        registry.reset()
+
+    def test_metrics_endpoint_reports_per_view_series(self):
+        BugPost.objects.create(title='t', description='d', created_by=self.create_user())
+        self.client.get('/api/bug-post/')
+        self.client.force_login(self.create_user('admin', is_staff=True))
+        res = self.client.get('/metrics/')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        body = res.content.decode()
+        self.assertIn('api_requests_total{view="bugpost-list",method="GET",status="200"} 1', body)
+        self.assertIn('api_request_queries_count{view="bugpost-list",method="GET"} 1', body)
+        self.assertIn('api_response_size_bytes_bucket{view="bugpost-list",method="GET",le="+Inf"} 1', body)
+
+    def test_metrics_endpoint_hidden_from_the_public(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, status.HTTP_404_NOT_FOUND)
+        self.client.force_login(self.create_user())
+        self.assertEqual(self.client.get('/metrics/').status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(API_METRICS_TOKEN='scrape-me')
+    def test_metrics_endpoint_accepts_the_scrape_token(self):
+        res = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer guess')
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(API_SLOW_REQUEST_MS=0)
+    def test_slow_request_log_disabled_by_default(self):
+        with self.assertNoLogs('api.slow_requests'):
+            self.client.get('/api/bug-post/')
+
+    @override_settings(API_SLOW_REQUEST_MS=1)
+    def test_slow_request_log_includes_sql(self):
+        BugPost.objects.create(title='t', description='d', created_by=self.create_user())
+        with patch('api.middleware.time.perf_counter', side_effect=itertools.count(0, 1)):
+            with self.assertLogs('api.slow_requests', 'WARNING') as logs:
+                self.client.get('/api/bug-post/')
+        self.assertIn('/api/bug-post/', logs.output[0])
+        self.assertIn('api_bugpost', logs.output[0])
+
+
+class ExportTests(APITestCase, APITestHelpers):
+    def setUp(self):
+        self.user = self.create_user('author')
+        token, _ = Token.objects.get_or_create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.tag = Tag.objects.create(name='ui', slug='ui')
+        self.posts = [
+            BugPost.objects.create(title=f'Bug {i}', description='d', created_by=self.user) for i in range(3)
+        ]
+        self.posts[0].tags.add(self.tag)
+        self.solution = BugSolution.objects.create(description='s', bug_post=self.posts[0], created_by=self.user)
+        Comment.objects.create(description='c1', bug_solution=self.solution, created_by=self.user)
+        Comment.objects.create(description='c2', bug_solution=self.solution, created_by=self.user)
+
+    def test_export_requires_auth(self):
+        self.client.credentials()
+        res = self.client.get('/api/bug-post/export/')
+        self.assertIn(res.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+    @override_settings(API_EXPORT_CHUNK_SIZE=2)
+    def test_ndjson_streams_nested_records(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get('/api/bug-post/export/')
+            lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in lines]
+        self.assertEqual([record['id'] for record in records], [post.id for post in self.posts])
+        self.assertEqual(records[0]['tags'], ['ui'])
+        self.assertEqual([c['description'] for c in records[0]['solutions'][0]['comments']], ['c1', 'c2'])
+        # two chunks, each: posts, tags, solutions, comments
+        self.assertLessEqual(len(queries), 12)
+
+    def test_csv_has_one_row_per_comment(self):
+        res = self.client.get('/api/bug-post/export/', {'output': 'csv'})
+        rows = list(csv.DictReader(StringIO(b''.join(res.streaming_content).decode())))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual([row['comment_description'] for row in rows[:2]], ['c1', 'c2'])
+        self.assertEqual(rows[2]['solution_id'], '')
+
+    @override_settings(API_EXPORT_OVERLAP=0)
+    def test_since_watermark_exports_only_changes(self):
+        res = self.client.get('/api/bug-post/export/')
+        watermark = res['X-Export-Watermark']
+        b''.join(res.streaming_content)
+        Comment.objects.create(description='late', bug_solution=self.solution, created_by=self.user)
+        res = self.client.get('/api/bug-post/export/', {'since': watermark})
+        records = [json.loads(line) for line in b''.join(res.streaming_content).decode().splitlines()]
+        self.assertEqual([record['id'] for record in records], [self.posts[0].id])
+        self.assertEqual(self.client.get('/api/bug-post/export/', {'since': 'yesterday'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(API_EXPORT_OVERLAP=0)
+    def test_since_watermark_sees_removals_and_retags(self):
+        voter = self.create_user('voter')
+        Upvote.objects.create(user=voter, bug_solution=self.solution)
+        self.posts[1].tags.add(self.tag)
+
+        def changed_since(watermark):
+            res = self.client.get('/api/bug-post/export/', {'since': watermark})
+            return [json.loads(line)['id'] for line in b''.join(res.streaming_content).decode().splitlines()]
+
+        res = self.client.get('/api/bug-post/export/')
+        b''.join(res.streaming_content)
+        watermark = res['X-Export-Watermark']
+        self.assertEqual(changed_since(watermark), [])
+        Upvote.objects.filter(user=voter).delete()
+        self.posts[1].tags.remove(self.tag)
+        self.posts[2].tags.add(self.tag)
+        self.assertEqual(changed_since(watermark), [post.id for post in self.posts])
+
+    def test_watermark_overlaps_the_read(self):
+        overlap = datetime.timedelta(seconds=settings.API_EXPORT_OVERLAP)
+        before = timezone.now()
+        res = self.client.get('/api/bug-post/export/')
+        watermark = parse_datetime(res['X-Export-Watermark'])
+        self.assertTrue(before - overlap <= watermark <= timezone.now() - overlap)
+
+
+class AsyncReadPathTests(APITestCase, APITestHelpers):
+    def setUp(self):
+        self.user = self.create_user('author')
+        self.tag = Tag.objects.create(name='ui', slug='ui')
+        self.posts = [
+            BugPost.objects.create(title=f'Bug {i}', description='d', created_by=self.user) for i in range(3)
+        ]
+        self.posts[0].tags.add(self.tag)
+        solution = BugSolution.objects.create(description='s', bug_post=self.posts[0], created_by=self.user)
+        Comment.objects.create(description='c', bug_solution=solution, created_by=self.user)
+
+    def test_post_list_matches_sync_endpoint(self):
+        sync = self.client.get('/api/bug-post/').json()
+        res = self.client.get('/api/async/bug-post/')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['results'], sync['results'])
+
+    def test_post_list_cursor_walks_all_pages(self):
+        seen = []
+        url = '/api/async/bug-post/?page_size=2'
+        while url:
+            body = self.client.get(url).json()
+            seen += [post['id'] for post in body['results']]
+            url = body['next']
+        self.assertEqual(seen, [post.id for post in reversed(self.posts)])
+        self.assertEqual(self.client.get('/api/async/bug-post/?cursor=bogus').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_detail_solutions_and_tags(self):
+        post = self.posts[0]
+        res = self.client.get(f'/api/async/bug-post/{post.id}/')
+        self.assertEqual(res.json()['tags'], [{'id': self.tag.id, 'name': 'ui', 'slug': 'ui'}])
+        self.assertEqual(self.client.get('/api/async/bug-post/999999/').status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.get(f'/api/async/bug-post/{post.id}/solutions/')
+        solution = res.json()['results'][0]
+        self.assertFalse(solution['has_voted'])
+        self.assertEqual(solution['comments'][0]['description'], 'c')
+
+        res = self.client.get('/api/async/tag/')
+        self.assertEqual([tag['slug'] for tag in res.json()['results']], ['ui'])
+        self.assertEqual(self.client.post('/api/async/tag/').status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class SparseFieldsetTests(APITestCase, APITestHelpers):
+    def setUp(self):
+        self.user = self.create_user('author')
+        self.tag = Tag.objects.create(name='ui', slug='ui')
+        self.post = BugPost.objects.create(title='Bug', description='long text', created_by=self.user)
+        self.post.tags.add(self.tag)
+        self.solution = BugSolution.objects.create(description='s', bug_post=self.post, created_by=self.user)
+        Comment.objects.create(description='c', bug_solution=self.solution, created_by=self.user)
+
+    def test_fields_narrow_response_and_sql(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get('/api/bug-post/', {'fields': 'id,title'})
+        self.assertEqual(res.data['results'], [{'id': self.post.id, 'title': 'Bug'}])
+        page_sql = queries.captured_queries[-1]['sql']
+        self.assertNotIn('description', page_sql)
+        # After the page keys and the validators (which count tag links)
+        self.assertFalse(any('api_tag' in query['sql'] for query in queries.captured_queries[2:]))
+        self.assertFalse(any('auth_user' in query['sql'] for query in queries.captured_queries))
+
+    def test_expanded_responses_are_never_stale(self):
+        get_cache().clear()
+        url = f'/api/bug-post/{self.post.id}/?expand=solutions'
+        res = self.client.get(url)
+        self.assertNotIn('ETag', res)
+        BugSolution.objects.create(description='new', bug_post=self.post, created_by=self.user)
+        res = self.client.get(url)
+        self.assertNotIn('X-Cache', res)
+        self.assertEqual(len(res.data['solutions']), 2)
+        url = f'/api/bug-solution/{self.solution.id}/?expand=bug_post'
+        self.client.get(url)
+        BugPost.objects.filter(pk=self.post.pk).update(title='Renamed')
+        self.assertEqual(self.client.get(url).data['bug_post']['title'], 'Renamed')
+
+    def test_expand_embeds_relations(self):
+        res = self.client.get(f'/api/bug-post/{self.post.id}/', {'expand': 'solutions'})
+        self.assertEqual(res.data['solutions'][0]['id'], self.solution.id)
+        self.assertEqual(res.data['solutions'][0]['comments'][0]['description'], 'c')
+        self.assertNotIn('solutions', self.client.get(f'/api/bug-post/{self.post.id}/').data)
+
+        res = self.client.get('/api/bug-solution/', {'fields': 'id', 'expand': 'bug_post'})
+        item = res.data['results'][0]
+        self.assertEqual(set(item), {'id', 'bug_post'})
+        self.assertEqual(item['bug_post']['tags'], [{'id': self.tag.id, 'name': 'ui', 'slug': 'ui'}])
+
+    def test_solutions_action_skips_unrequested_prefetches(self):
+        token, _ = Token.objects.get_or_create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(f'/api/bug-post/{self.post.id}/solutions/', {'fields': 'id,vote_count'})
+        self.assertEqual(res.data['results'], [{'id': self.solution.id, 'vote_count': 0}])
+        # no comments prefetch
+        self.assertFalse(any('"api_comment"."description"' in query['sql'] for query in queries.captured_queries))
+
+    def test_writes_ignore_fields(self):
+        token, _ = Token.objects.get_or_create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        res = self.client.post('/api/bug-post/?fields=id', {'title': 'New', 'description': 'X'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['title'], 'New')
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class FastReadPathTests(APITestCase, APITestHelpers):
+    """The fast path must render byte-for-byte what the DRF serializers render."""
+
+    def setUp(self):
+        self.user = self.create_user('author')
+        self.other = self.create_user('other')
+        tags = [Tag.objects.create(name=f'tag{i}', slug=f'tag-{i}') for i in range(3)]
+        for i in range(4):
+            post = BugPost.objects.create(title=f'Bug "{i}" ü', description='line\nbreak', created_by=self.user)
+            post.tags.add(*tags[i % 2:])
+            for j in range(2):
+                solution = BugSolution.objects.create(description=f's{j}', bug_post=post, created_by=self.user)
+                Comment.objects.create(description='c', bug_solution=solution, created_by=self.other)
+        self.post = post
+        Upvote.objects.create(user=self.other, bug_solution=solution)
+        BugSolution.objects.filter(pk=solution.pk).update(vote_count=1)
+        token, _ = Token.objects.get_or_create(user=self.other)
+        self.token = token.key
+
+    def assertSameOutput(self, url, params=None, auth=False):
+        if auth:
+            self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+        with override_settings(API_FAST_READS=False):
+            expected = self.client.get(url, params)
+        with CaptureQueriesContext(connection) as queries:
+            actual = self.client.get(url, params)
+        self.assertEqual(expected.status_code, status.HTTP_200_OK)
+        self.assertEqual(actual.content, expected.content)
+        return queries
+
+    def test_post_list_and_detail(self):
+        self.assertSameOutput('/api/bug-post/')
+        self.assertSameOutput('/api/bug-post/', {'page_size': 2, 'fields': 'id,tags,updated_at'})
+        self.assertSameOutput('/api/bug-post/', {'search': 'Bug'})
+        self.assertSameOutput(f'/api/bug-post/{self.post.id}/')
+
+    def test_solution_list_and_detail(self):
+        queries = self.assertSameOutput('/api/bug-solution/')
+        # page keys, fingerprint, page, comments
+        self.assertEqual(len(queries), 4)
+        self.assertSameOutput('/api/bug-solution/', auth=True)
+        self.assertSameOutput('/api/bug-solution/', {'fields': 'id,score,has_voted'}, auth=True)
+        solution = BugSolution.objects.filter(vote_count=1).get()
+        self.assertSameOutput(f'/api/bug-solution/{solution.id}/', auth=True)
+
+    def test_solutions_action(self):
+        url = f'/api/bug-post/{self.post.id}/solutions/'
+        self.assertSameOutput(url, auth=True)
+        self.assertSameOutput(url, {'ordering': 'score', 'page_size': 1}, auth=True)
+        self.assertSameOutput(url, {'top': 5, 'fields': 'id,comments'}, auth=True)
+
+    def test_expand_and_browsable_api_use_serializers(self):
+        res = self.client.get(f'/api/bug-post/{self.post.id}/', {'expand': 'solutions'})
+        self.assertEqual(len(res.data['solutions']), 2)
+        res = self.client.get('/api/bug-post/', HTTP_ACCEPT='text/html')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class JSONRendererParserTests(APITestCase, APITestHelpers):
+    payload = {
+        'when': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        'day': datetime.date(2024, 5, 1),
+        'at': datetime.time(8, 15),
+        'price': decimal.Decimal('12.50'),
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'label': gettext_lazy('Bug'),
+        'text': 'ünïcode   separator "quoted"\n',
+        'huge': 2 ** 70,
+        'items': [1, 2.5, None, True, ('a', 'b')],
+        1: 'int key',
+    }
+
+    def test_renderer_matches_drf_byte_for_byte(self):
+        stock, fast = JSONRenderer(), FastJSONRenderer()
+        for data in (self.payload, {'no': 'huge', 'score': 145.9402687, 'nested': [{'x': 'y'}]}, [], None):
+            self.assertEqual(fast.render(data), stock.render(data))
+        self.assertEqual(
+            fast.render(self.payload, 'application/json; indent=4'),
+            stock.render(self.payload, 'application/json; indent=4'),
+        )
+
+    def test_list_endpoint_renders_like_drf(self):
+        user = self.create_user('author')
+        post = BugPost.objects.create(title='Bug  ', description='d', created_by=user)
+        post.tags.add(Tag.objects.create(name='ui', slug='ui'))
+        res = self.client.get('/api/bug-post/')
+        self.assertEqual(res.content, JSONRenderer().render(res.data))
+
+    @override_settings(API_JSON_VERIFY=True)
+    def test_verify_mode_falls_back_on_mismatch(self):
+        with self.assertLogs('api.renderers', 'WARNING'):
+            # exponent floats are the known difference
+            self.assertEqual(FastJSONRenderer().render({'x': 1e16}), b'{"x":1e+16}')
+
+    def test_parser_matches_drf(self):
+        stock, fast = JSONParser(), FastJSONParser()
+        for body in (b'{"a": [1, 2.5, "\\u00fc", null], "b": 123456789012345678901234567890}', b'[]'):
+            self.assertEqual(fast.parse(BytesIO(body)), stock.parse(BytesIO(body)))
+        for body in (b'{"a": NaN}', b'{"a": ', b''):
+            with self.assertRaises(ParseError):
+                fast.parse(BytesIO(body))
+        latin = '{"a": "ü"}'.encode('latin-1')
+        self.assertEqual(fast.parse(BytesIO(latin), parser_context={'encoding': 'latin-1'}), {'a': 'ü'})
+
+
+class CompressionTests(APITestCase, APITestHelpers):
+    def setUp(self):
+        get_cache().clear()
+        self.user = self.create_user('author')
+        BugPost.objects.bulk_create([
+            BugPost(title=f'Bug {i}', description='a fairly repetitive description ' * 5, created_by=self.user)
+            for i in range(10)
+        ])
+
+    def test_negotiate(self):
+        self.assertEqual(negotiate('gzip, deflate'), 'gzip')
+        self.assertEqual(negotiate('*'), available_encodings()[0])
+        self.assertIsNone(negotiate('gzip;q=0, deflate'))
+        self.assertIsNone(negotiate(''))
+        with patch('api.compression.brotli', object()):
+            self.assertEqual(negotiate('gzip, br'), 'br')
+            self.assertEqual(negotiate('gzip, br;q=0.5'), 'gzip')
+
+    @override_settings(API_CACHE_ENABLED=False)
+    def test_large_json_is_gzipped(self):
+        plain = self.client.get('/api/bug-post/')
+        res = self.client.get('/api/bug-post/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertEqual(int(res['Content-Length']), len(res.content))
+        self.assertEqual(res['ETag'], 'W/' + plain['ETag'])
+        again = self.client.get('/api/bug-post/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_small_and_streaming_responses_are_untouched(self):
+        with override_settings(API_COMPRESSION_MIN_BYTES=10 ** 6):
+            self.assertNotIn('Content-Encoding', self.client.get('/api/bug-post/', HTTP_ACCEPT_ENCODING='gzip'))
+        token, _ = Token.objects.get_or_create(user=self.user)
+        res = self.client.get(
+            '/api/bug-post/export/', HTTP_ACCEPT_ENCODING='gzip', HTTP_AUTHORIZATION=f'Token {token.key}'
+        )
+        self.assertTrue(res.streaming)
+        self.assertNotIn('Content-Encoding', res)
+
+    def test_cached_entry_is_compressed_once(self):
+        with patch('api.compression.compress', wraps=compression.compress) as compress:
+            first = self.client.get('/api/bug-post/', HTTP_ACCEPT_ENCODING='gzip')
+            calls = compress.call_count
+            second = self.client.get('/api/bug-post/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(calls, len(available_encodings()))
+        self.assertEqual(compress.call_count, calls)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second['Content-Encoding'], 'gzip')
+        self.assertEqual(second.content, first.content)
+
+
+class BugPostSummaryTests(APITestCase, APITestHelpers):
+    def setUp(self):
+        self.user = self.create_user('author')
+        self.other = self.create_user('other')
+        self.busy = BugPost.objects.create(title='Busy', description='d', created_by=self.user)
+        self.quiet = BugPost.objects.create(title='Quiet', description='d', created_by=self.user)
+        first = BugSolution.objects.create(description='s1', bug_post=self.busy, created_by=self.user)
+        second = BugSolution.objects.create(description='s2', bug_post=self.busy, created_by=self.other)
+        Comment.objects.create(description='c1', bug_solution=first, created_by=self.other)
+        Comment.objects.create(description='c2', bug_solution=second, created_by=self.user)
+        Upvote.objects.create(user=self.other, bug_solution=first)
+        self.last_vote = Upvote.objects.create(user=self.user, bug_solution=second)
+        BugSolution.objects.filter(pk__in=[first.pk, second.pk]).update(vote_count=1)
+
+    def test_summary_page_is_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get('/api/bug-post/summary/')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        by_id = {item['id']: item for item in res.data['results']}
+        busy, quiet = by_id[self.busy.id], by_id[self.quiet.id]
+        self.assertEqual(
+            (busy['solution_count'], busy['comment_count'], busy['vote_count']), (2, 2, 2)
+        )
+        self.assertEqual(
+            (quiet['solution_count'], quiet['comment_count'], quiet['vote_count']), (0, 0, 0)
+        )
+        self.assertEqual(busy['last_activity'], serializers.DateTimeField().to_representation(self.last_vote.created_at))
+        self.assertEqual(quiet['last_activity'], serializers.DateTimeField().to_representation(self.quiet.updated_at))
+
+    def test_summary_by_ids(self):
+        res = self.client.get('/api/bug-post/summary/', {'ids': f'{self.quiet.id}'})
+        self.assertEqual([item['title'] for item in res.data['results']], ['Quiet'])
+        res = self.client.get('/api/bug-post/summary/', {'ids': 'a,b'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class EventFeedTests(APITestCase, APITestHelpers):
+    def setUp(self):
+        self.user = self.create_user('author')
+        self.other = self.create_user('other')
+        self.tag = Tag.objects.create(name='ui', slug='ui')
+
+    def auth_as(self, user):
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_write_paths_append_events_in_order(self):
+        self.auth_as(self.user)
+        post_id = self.client.post('/api/bug-post/', {'title': 'Bug', 'description': 'd'}).data['id']
+        self.client.post(f'/api/bug-post/{post_id}/add_tags/', {'tag': self.tag.id})
+        self.client.post(f'/api/bug-post/{post_id}/add_tags/', {'tag': self.tag.id})
+        self.client.post(f'/api/bug-post/{post_id}/remove_tags/', {'tag': self.tag.id})
+        solution_id = self.client.post('/api/bug-solution/', {'description': 's', 'bug_post': post_id}).data['id']
+        self.client.post('/api/comment/', {'description': 'c', 'bug_solution': solution_id})
+        self.auth_as(self.other)
+        self.client.post(f'/api/bug-solution/{solution_id}/upvote/')
+        self.client.post(f'/api/bug-solution/{solution_id}/upvote/')
+
+        res = self.client.get('/api/events/')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        feed = res.json()
+        self.assertEqual([event['kind'] for event in feed['events']], [
+            'post.created', 'post.tagged', 'post.untagged', 'solution.created',
+            'comment.created', 'vote.added', 'vote.removed',
+        ])
+        self.assertTrue(all(event['post'] == post_id for event in feed['events']))
+        self.assertEqual([event['data'].get('vote_count') for event in feed['events'][-2:]], [1, 0])
+        self.assertEqual(feed['events'][-1]['actor'], 'other')
+        self.assertEqual(feed['next'], feed['events'][-1]['seq'])
+
+        seqs = [event['seq'] for event in feed['events']]
+        res = self.client.get('/api/events/', {'since': seqs[3], 'limit': 2}).json()
+        self.assertEqual([event['seq'] for event in res['events']], seqs[4:6])
+        self.assertEqual(self.client.get('/api/events/', {'since': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_creates_append_events(self):
+        self.auth_as(self.user)
+        res = self.client.post('/api/bug-post/bulk/', [{'title': 'A', 'description': 'd'}, {'title': '', 'description': 'd'}], format='json')
+        post_id = res.data['results'][0]['id']
+        res = self.client.post('/api/bug-solution/bulk/', [{'description': 's', 'bug_post': post_id}], format='json')
+        solution_id = res.data['results'][0]['id']
+        self.client.post('/api/comment/bulk/', [{'description': 'c', 'bug_solution': solution_id}] * 2, format='json')
+
+        feed = self.client.get('/api/events/').json()['events']
+        self.assertEqual([event['kind'] for event in feed], [
+            'post.created', 'solution.created', 'comment.created', 'comment.created',
+        ])
+        self.assertEqual([event['post'] for event in feed], [post_id] * 4)
+        self.assertEqual(feed[0]['data'], {'title': 'A'})
+        self.assertEqual(feed[-1]['data'], {'bug_solution': solution_id})
+
+    def test_bulk_tags_records_each_change(self):
+        self.auth_as(self.user)
+        posts = [BugPost.objects.create(title=f'Bug {i}', description='d', created_by=self.user) for i in range(2)]
+        self.client.post('/api/bug-post/bulk_tags/', {'posts': [p.id for p in posts], 'add': ['ui']}, format='json')
+        kinds = list(Event.objects.order_by('id').values_list('kind', 'post_id', 'object_id'))
+        self.assertEqual(kinds, [('post.tagged', posts[0].id, self.tag.id), ('post.tagged', posts[1].id, self.tag.id)])
+
+    @override_settings(API_FEED_POLL_INTERVAL=0.01)
+    def test_long_poll_times_out_empty(self):
+        events.record(events.TAG_CREATED, None, self.tag.id)
+        seq = Event.objects.get().id
+        started = time.monotonic()
+        res = self.client.get('/api/events/', {'since': seq, 'wait': '0.1'}).json()
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+        self.assertEqual(res, {'next': seq, 'events': []})
+
+    def test_reads_stop_at_recent_holes(self):
+        now = timezone.now()
+        rows = [Event(id=1, created_at=now), Event(id=3, created_at=now), Event(id=4, created_at=now)]
+        self.assertEqual([event.id for event in events.settled(rows, 0, now)], [1])
+        old = now - datetime.timedelta(minutes=1)
+        rows = [Event(id=1, created_at=old), Event(id=3, created_at=old), Event(id=4, created_at=now)]
+        self.assertEqual([event.id for event in events.settled(rows, 0, now)], [1, 3, 4])
+
+    def test_compact_events_drops_old_events(self):
+        for _ in range(3):
+            events.record(events.TAG_CREATED, None, self.tag.id)
+        first, *rest = Event.objects.order_by('id')
+        Event.objects.filter(pk=first.pk).update(created_at=timezone.now() - datetime.timedelta(days=30))
+        call_command('compact_events', days=7, batch_size=1, stdout=StringIO())
+        self.assertEqual(list(Event.objects.order_by('id')), rest)
+
+
+class PostStreamTests(APITestCase, APITestHelpers):
+    def setUp(self):
+        self.user = self.create_user('author')
+        self.post = BugPost.objects.create(title='Bug', description='d', created_by=self.user)
+        self.other_post = BugPost.objects.create(title='Other', description='d', created_by=self.user)
+
+    def solution_event(self, post):
+        solution = BugSolution.objects.create(description='s', bug_post=post, created_by=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return events.record(events.SOLUTION_CREATED, self.user, solution.pk, post_id=post.pk)
+
+    async def read(self, stream, count):
+        return [(await anext(stream)).decode() for _ in range(count)]
+
+    async def test_replays_after_last_event_id_then_streams_live(self):
+        first = await sync_to_async(self.solution_event)(self.post)
+        await sync_to_async(self.solution_event)(self.other_post)
+        missed = await sync_to_async(self.solution_event)(self.post)
+
+        res = await self.async_client.get(f'/api/async/bug-post/{self.post.id}/stream/', headers={'Last-Event-ID': str(first.id)})
+        self.assertEqual(res['Content-Type'], 'text/event-stream')
+        stream = res.streaming_content
+        retry, replayed = await self.read(stream, 2)
+        self.assertTrue(retry.startswith('retry: '))
+        self.assertTrue(replayed.startswith(f'id: {missed.id}\nevent: solution.created\n'))
+
+        live = await sync_to_async(self.solution_event)(self.post)
+        (chunk,) = await self.read(stream, 1)
+        self.assertEqual(json.loads(chunk.split('data: ', 1)[1])['seq'], live.id)
+        # A client disconnect cancels the task waiting on the stream
+        waiting = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertEqual(pubsub.hub.subscriber_count(f'post:{self.post.id}'), 0)
+
+    async def test_slow_consumer_catches_up_from_the_log(self):
+        with override_settings(API_PUBSUB_QUEUE_SIZE=1):
+            res = await self.async_client.get(f'/api/async/bug-post/{self.post.id}/stream/')
+            stream = res.streaming_content
+            await self.read(stream, 1)
+            # Subscribed and positioned once the first wait starts
+            waiting = asyncio.ensure_future(anext(stream))
+            await asyncio.sleep(0.05)
+            created = [await sync_to_async(self.solution_event)(self.post) for _ in range(3)]
+            chunks = [(await waiting).decode()] + await self.read(stream, 2)
+            await stream.aclose()
+        self.assertEqual([int(chunk.split('\n')[0][4:]) for chunk in chunks], [event.id for event in created])
+
+    def test_unknown_post_and_bad_last_event_id(self):
+        self.assertEqual(self.client.get('/api/async/bug-post/999/stream/').status_code, status.HTTP_404_NOT_FOUND)
+        res = self.client.get(f'/api/async/bug-post/{self.post.id}/stream/', HTTP_LAST_EVENT_ID='x')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stream_refuses_wsgi(self):
+        # The sync test client goes through the WSGI handler
+        res = self.client.get(f'/api/async/bug-post/{self.post.id}/stream/')
+        self.assertEqual(res.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+        self.assertFalse(res.streaming)
+
+
+@override_settings(API_THROTTLE_RATES={'create': '2/min', 'upvote': '3/min'})
+class ThrottlingTests(APITestCase, APITestHelpers):
+    def setUp(self):
+        local_buckets.clear()
+        self.user = self.create_user('author')
+        self.other = self.create_user('other')
+        self.post = BugPost.objects.create(title='Bug', description='d', created_by=self.user)
+        self.solution = BugSolution.objects.create(description='s', bug_post=self.post, created_by=self.user)
+
+    def auth_as(self, user):
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_creates_are_limited_per_user(self):
+        self.auth_as(self.user)
+        for remaining in ('1', '0'):
+            res = self.client.post('/api/bug-post/', {'title': 'Bug', 'description': 'd'})
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            self.assertEqual((res['RateLimit-Limit'], res['RateLimit-Remaining']), ('2', remaining))
+        res = self.client.post('/api/comment/', {'description': 'c', 'bug_solution': self.solution.id})
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+        # Reads carry no scope and other users have their own bucket
+        res = self.client.get('/api/bug-post/')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('RateLimit-Limit', res)
+        self.auth_as(self.other)
+        self.assertEqual(self.client.post('/api/bug-post/', {'title': 'Bug', 'description': 'd'}).status_code, status.HTTP_201_CREATED)
+
+    def test_upvote_toggles_are_limited(self):
+        self.auth_as(self.other)
+        codes = [self.client.post(f'/api/bug-solution/{self.solution.id}/upvote/').status_code for _ in range(4)]
+        self.assertEqual(codes[-1], status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertNotIn(status.HTTP_429_TOO_MANY_REQUESTS, codes[:3])
+
+    def test_decisions_skip_the_database(self):
+        request = Request(APIRequestFactory().post('/'))
+        request.user, request.auth = self.user, Token.objects.create(user=self.user)
+        view = type('View', (), {'action': 'create', 'throttle_scopes': {'create': 'create'}})()
+        with self.assertNumQueries(0):
+            for throttle in (UserBucketThrottle(), TokenBucketThrottle(), IPBucketThrottle()):
+                self.assertTrue(throttle.allow_request(request, view))
+
+    def test_bucket_refills(self):
+        for buckets in (MemoryBuckets(10), CacheBuckets(get_cache())):
+            decisions = [buckets.consume('throttle:test', 2, 1.0, 100.0) for _ in range(3)]
+            self.assertEqual([d.allowed for d in decisions], [True, True, False])
+            self.assertAlmostEqual(decisions[-1].wait, 1.0)
+            self.assertTrue(buckets.consume('throttle:test', 2, 1.0, 101.0).allowed)
+            self.assertFalse(buckets.consume('throttle:test', 2, 1.0, 101.0).allowed)
+            # Idle time refills up to the bucket size, not beyond
+            later = [buckets.consume('throttle:test', 2, 1.0, 200.0).allowed for _ in range(3)]
+            self.assertEqual(later, [True, True, False])
+
+    def test_racing_bucket_resets_keep_every_token(self):
+        cache = get_cache()
+        buckets = CacheBuckets(cache)
+        buckets.consume('throttle:race', 2, 1.0, 100.0)
+        # Two processes read the bucket before either moves its epoch
+        get_many = cache.get_many
+        snapshot = []
+
+        def stale_get_many(keys):
+            if not snapshot:
+                snapshot.append(get_many(keys))
+            return snapshot[0]
+
+        with patch.object(cache, 'get_many', side_effect=stale_get_many):
+            racing = [buckets.consume('throttle:race', 2, 1.0, 200.0).allowed for _ in range(2)]
+        self.assertEqual(racing, [True, True])
+        self.assertFalse(buckets.consume('throttle:race', 2, 1.0, 200.0).allowed)
+
+
+@override_settings(API_REPLICA_ALIASES=['replica'])
+class ReplicaRoutingTests(APITestCase, APITestHelpers):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        get_cache().clear()
+        reset_health()
+        self.addCleanup(reset_health)
+        Tag.objects.create(name='primary', slug='primary')
+        Tag.objects.using('replica').create(name='replica', slug='replica')
+
+    def auth_as(self, user):
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def tag_names(self, client=None):
+        res = (client or self.client).get('/api/tag/')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [tag['name'] for tag in res.json()['results']]
+
+    def test_safe_requests_read_from_the_replica(self):
+        with CaptureQueriesContext(connection) as primary:
+            self.assertEqual(self.tag_names(), ['replica'])
+        self.assertEqual(len(primary), 0)
+
+    def test_replica_reads_are_not_cached_right_after_a_change(self):
+        invalidate('tag')
+        self.assertEqual([self.client.get('/api/tag/')['X-Cache'] for _ in range(2)], ['MISS', 'MISS'])
+        get_cache().clear()
+        self.assertEqual([self.client.get('/api/tag/')['X-Cache'] for _ in range(2)], ['MISS', 'HIT'])
+
+    def test_writes_go_to_the_primary_and_stick_to_it(self):
+        user = self.create_user('author')
+        self.auth_as(user)
+        # Before any write the user reads from the (empty) replica
+        self.assertEqual(self.client.get('/api/bug-post/').data['results'], [])
+        res = self.client.post('/api/bug-post/', {'title': 'Fresh', 'description': 'd'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(BugPost.objects.using('replica').exists())
+        titles = [post['title'] for post in self.client.get('/api/bug-post/').data['results']]
+        self.assertEqual(titles, ['Fresh'])
+        # Other readers are not pinned
+        self.assertEqual(self.client_class().get('/api/bug-post/').data['results'], [])
+        with override_settings(API_REPLICA_STICKY_SECONDS=0):
+            get_cache().clear()
+            self.assertEqual(self.client.get('/api/bug-post/').data['results'], [])
+
+    def test_unreachable_replica_fails_over_to_the_primary(self):
+        with self.assertLogs('api.routers', 'WARNING'), \
+                patch.object(connections['replica'], 'ensure_connection', side_effect=OperationalError):
+            self.assertEqual(self.tag_names(), ['primary'])
+        # Stays out of rotation until the retry window passes
+        self.assertEqual(self.tag_names(), ['primary'])
+        reset_health()
+        get_cache().clear()
+        self.assertEqual(self.tag_names(), ['replica'])
+
+    def test_lost_replica_connection_is_served_from_the_primary(self):
+        with connections['replica'].cursor() as cursor:
+            cursor.execute('DROP TABLE api_tag_post')
+            cursor.execute('DROP TABLE api_tag')
+        with self.assertLogs('api.routers', 'WARNING'), \
+                patch.object(connections['replica'], 'is_usable', return_value=False):
+            self.assertEqual(self.tag_names(), ['primary'])
+        self.assertFalse(is_up('replica'))
+
+    def test_query_errors_on_a_live_replica_are_raised(self):
+        with connections['replica'].cursor() as cursor:
+            cursor.execute('DROP TABLE api_tag_post')
+            cursor.execute('DROP TABLE api_tag')
+        with self.assertRaises(OperationalError):
+            self.client.get('/api/tag/')
+        self.assertTrue(is_up('replica'))
+
+    def test_replicas_are_never_migrated(self):
+        router = ReplicaRouter()
+        self.assertFalse(router.allow_migrate('replica', 'api'))
+        self.assertIsNone(router.allow_migrate('default', 'api'))
+        self.assertIsNone(router.db_for_write(Tag))
@@ -0,0 +1,249 @@
+"""
+Token-bucket rate limiting for write and toggle endpoints.
+
+Rates are set per scope in API_THROTTLE_RATES, in DRF's ``'<n>/<period>'``
+form. A bucket holds ``n`` tokens and refills at ``n`` per period, so that
+many requests may arrive in a burst. Views name their scopes per action
+(``throttle_scopes = {'upvote': 'upvote'}``) or for the whole view
+(``throttle_scope``). Actions without a scope, or with a scope that has no
+rate, are never throttled and never touch the buckets.
+
+Three throttles share the scheme. They are keyed on the user, the auth
+token (hashed) and, for anonymous requests, the client IP. Login is keyed on
+the client IP, signed in or not, and on the submitted username from that IP,
+so flooding a username from elsewhere can't lock its owner out. The client
+IP is REMOTE_ADDR unless NUM_PROXIES (API_NUM_PROXIES) trusts that many
+X-Forwarded-For hops, so clients can't pick their own bucket. Buckets live in
+the cache named by API_THROTTLE_CACHE_ALIAS, shared between processes, or
+in a locked in-process table when it is unset. A decision is one cache
+round trip plus an atomic incr (and a write when its epoch moves), with no
+database access.
+
+RateLimitHeadersMiddleware adds ``RateLimit-Limit``, ``RateLimit-Remaining``
+and ``RateLimit-Reset`` from the tightest bucket a request touched. DRF adds
+``Retry-After`` to the 429 itself.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+Decision = namedtuple('Decision', 'allowed limit remaining reset wait')
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """``'10/min'`` -> (10, 10 / 60): bucket size and refill per second."""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / PERIODS[period.strip()[0]]
+
+
+def _decision(allowed, size, refill, tokens):
+    """``tokens`` is what is left in the bucket after this request (negative: short by that much)."""
+    remaining = max(0, math.floor(tokens))
+    reset = math.ceil((size - tokens) / refill) if tokens < size else 0
+    wait = 0 if allowed else -tokens / refill
+    return Decision(allowed, size, remaining, reset, wait)
+
+
+class MemoryBuckets:
+    """Token buckets in a bounded, lock-protected LRU table of (tokens, updated)."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, size, refill, now):
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (size, now))
+            tokens = min(size, tokens + (now - updated) * refill)
+            allowed = tokens >= 1
+            left = tokens - 1
+            self._buckets[key] = (left if allowed else tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return _decision(allowed, size, refill, left)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBuckets:
+    """
+    Token buckets in a shared Django cache, kept as a counter of every token
+    ever taken and an ``(epoch, base)`` mark: the tokens taken since the
+    epoch are the counter minus base. The counter only ever moves by atomic
+    incr and decr, never by a set, so no request's token is lost to another
+    process writing at the same time. The mark moves, with a plain set, when
+    a bucket is full again or once per refill period (carrying the net count
+    over), and the counter is touched with it, so the keys never expire
+    while a bucket is in use. Two processes moving the mark at once write
+    marks computed from the same counter, and either one holds.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def consume(self, key, size, refill, now):
+        mark_key, count_key = f'{key}:mark', f'{key}:count'
+        state = self.cache.get_many([mark_key, count_key])
+        mark, count = state.get(mark_key), state.get(count_key)
+        period = size / refill
+        timeout = 2 * math.ceil(period) + 1
+        if count is None:
+            self.cache.add(count_key, 0, timeout)
+            count = self.cache.get(count_key, 0)
+        # A missing bucket is a full one, so is a counter that expired under its mark
+        if mark is None or count < mark[1]:
+            epoch, base = now, count
+            self.cache.set(mark_key, (epoch, base), timeout)
+        else:
+            epoch, base = mark
+            taken = count - base
+            if (now - epoch) * refill >= taken or now - epoch >= period:
+                carried = max(0, math.ceil(taken - (now - epoch) * refill))
+                epoch, base = now, count - carried
+                self.cache.set(mark_key, (epoch, base), timeout)
+                self.cache.touch(count_key, timeout)
+        try:
+            taken = self.cache.incr(count_key) - base
+        except ValueError:
+            self.cache.add(count_key, base, timeout)
+            taken = self.cache.incr(count_key) - base
+
+        tokens = size + (now - epoch) * refill - taken
+        if tokens >= 0:
+            return _decision(True, size, refill, tokens)
+        # Give the token back, a refused request doesn't use up capacity
+        self.cache.decr(count_key)
+        return _decision(False, size, refill, tokens)
+
+
+local_buckets = MemoryBuckets(settings.API_THROTTLE_MEMORY_SIZE)
+
+
+def get_buckets():
+    alias = settings.API_THROTTLE_CACHE_ALIAS
+    return CacheBuckets(caches[alias]) if alias else local_buckets
+
+
+class BucketThrottle(BaseThrottle):
+    """Base class; subclasses return the identity a bucket is keyed on, or None to skip."""
+    kind = None
+    scope = None
+
+    def get_scope(self, view):
+        if self.scope:
+            return self.scope
+        scopes = getattr(view, 'throttle_scopes', None) or {}
+        return scopes.get(getattr(view, 'action', None)) or getattr(view, 'throttle_scope', None)
+
+    def get_identity(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.decision = None
+        rate = settings.API_THROTTLE_RATES.get(self.get_scope(view))
+        if not rate:
+            return True
+        identity = self.get_identity(request)
+        if identity is None:
+            return True
+
+        size, refill = parse_rate(rate)
+        key = f'throttle:{self.get_scope(view)}:{self.kind}:{identity}'
+        self.decision = get_buckets().consume(key, size, refill, time.time())
+
+        # Headers report the bucket closest to running out
+        current = getattr(request._request, 'rate_limit', None)
+        if current is None or self.decision.remaining < current.remaining or not self.decision.allowed:
+            request._request.rate_limit = self.decision
+        return self.decision.allowed
+
+    def wait(self):
+        return self.decision.wait if self.decision else None
+
+
+class UserBucketThrottle(BucketThrottle):
+    kind = 'user'
+
+    def get_identity(self, request):
+        return request.user.pk if request.user and request.user.is_authenticated else None
+
+
+class TokenBucketThrottle(BucketThrottle):
+    kind = 'token'
+
+    def get_identity(self, request):
+        key = getattr(request.auth, 'key', None)
+        # Never put raw credentials in a shared cache
+        return hashlib.sha256(key.encode()).hexdigest()[:32] if key else None
+
+
+class IPBucketThrottle(BucketThrottle):
+    kind = 'ip'
+
+    def get_identity(self, request):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.get_ident(request)
+
+
+class LoginThrottle(BucketThrottle):
+    """Login attempts per client address, with or without a session."""
+    kind = 'ip'
+    scope = 'login'
+
+    def get_identity(self, request):
+        return self.get_ident(request)
+
+
+class LoginUsernameThrottle(BucketThrottle):
+    """Login attempts per submitted username and client address, a share of the address's login rate."""
+    kind = 'username'
+    scope = 'login-username'
+
+    def get_identity(self, request):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not username:
+            return None
+        # Hashed like tokens; a mistyped username is sometimes a password
+        identity = f'{str(username).casefold()}\0{self.get_ident(request)}'
+        return hashlib.sha256(identity.encode()).hexdigest()[:32]
+
+
+class RateLimitHeadersMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        decision = getattr(request, 'rate_limit', None)
+        if decision is not None:
+            response['RateLimit-Limit'] = str(decision.limit)
+            response['RateLimit-Remaining'] = str(decision.remaining)
+            response['RateLimit-Reset'] = str(decision.reset)
+        return response
@@ -2,12 +2,15 @@ from django.urls import path, include
 from django.views.generic import TemplateView
 from rest_framework.routers import DefaultRouter
 from rest_framework.authtoken.views import obtain_auth_token
+from . import async_views
 from .views import (
     BugPostCreateView,
     BugSolutionCreateView,
     CommentCreateView,
     TagCreateView,
     health,
+    cache_stats_view,
+    metrics,
 )
 
 # DRF-Spectacular schema and docs
@@ -26,12 +29,22 @@ router.register(r'tag', TagCreateView)
 urlpatterns = [
     path('', TemplateView.as_view(template_name='api/home.html'), name='home'),
     path('health/', health, name='health'),
+    path('cache-stats/', cache_stats_view, name='cache_stats'),
+    path('metrics/', metrics, name='metrics'),
     path('openapi/', SpectacularAPIView.as_view(), name='schema'),
     path('docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
     path('api-token-auth/', obtain_auth_token, name='api_token_auth'),
     # keep this legacy path to satisfy tests and consumers expecting /api/api-token-auth/
     path('api/api-token-auth/', obtain_auth_token, name='api_token_auth_api'),
+    # Async (ASGI) read path for the hottest anonymous endpoints, see api/async_views.py
+    path('api/async/bug-post/', async_views.bug_post_list, name='async_bugpost_list'),
+    path('api/async/bug-post/<int:pk>/', async_views.bug_post_detail, name='async_bugpost_detail'),
+    path('api/async/bug-post/<int:pk>/solutions/', async_views.bug_post_solutions, name='async_bugpost_solutions'),
+    path('api/async/bug-post/<int:pk>/stream/', async_views.bug_post_stream, name='async_bugpost_stream'),
+    path('api/async/tag/', async_views.tag_list, name='async_tag_list'),
+    # Activity feed over the append-only event log, see api/events.py
+    path('api/events/', async_views.event_feed, name='event_feed'),
     path('api/', include(router.urls)),
 ]
 
@@ -21,31 +21,128 @@ from .models import (
     Tag,
     Upvote,
 )
+from accounts.authentication import CachedTokenAuthentication
 from .permissions import OnlyAuthorEditsOrDeletes
-from django.http import JsonResponse
+from . import events
+from .cache import CachedResponseMixin, cache_stats, invalidate
+from .conditional import ConditionalGetMixin, filter_or_404
+from .bulk import BulkMixin
+from .fieldsets import SparseFieldsetMixin
+from .fastpath import FastBugPostSerializer, FastBugSolutionSerializer, FastReadMixin
+from .search import render_snippet, search_posts
+from .export import export_queryset, iter_csv, iter_ndjson
+from .pagination import CreatedAtCursorPagination, TagCursorPagination
+from .ranking import refresh_scores
+from .metrics import registry
+from .routers import ReplicaReadsMixin
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+import functools
+from datetime import timedelta
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.dateparse import parse_datetime
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Prefetch, Q
 
 def health(request):
     return JsonResponse({'status':'ok'})
 
+#Operational endpoints: staff sessions, or scrapers sending "Authorization: Bearer <API_METRICS_TOKEN>"
+def internal_only(view):
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = settings.API_METRICS_TOKEN
+        scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+        bearer_ok = bool(token) and scheme.lower() == 'bearer' and constant_time_compare(credentials.strip(), token)
+        if not bearer_ok and not request.user.is_staff:
+            return JsonResponse({'detail': 'Not found.'}, status=404)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+@internal_only
+def cache_stats_view(request):
+    return JsonResponse(cache_stats())
+
+@internal_only
+def metrics(request):
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# JSON true/false arrive as Python bools, which pass for the ints 1 and 0
+def is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def solution_listing(view, queryset, always=('id', 'created_at'), fast=False):
+    # Solutions shaped by the view's ?fields= / ?expand=, see api/fieldsets.py
+    if fast:
+        # Rows for FastBugSolutionSerializer, which loads the comments itself
+        include = {'has_voted'} if view.wants('has_voted') else set()
+        queryset = queryset.with_listing_data(view.request.user, include=include)
+        return FastBugSolutionSerializer.project(queryset, view.get_shape()[0], always)
+    queryset = queryset.with_listing_data(view.request.user, include=view.requested_fields())
+    if view.expands('bug_post'):
+        queryset = queryset.select_related('bug_post__created_by').prefetch_related('bug_post__tags')
+    return view.only_requested(queryset, always)
+
+def solution_fingerprint_parts(queryset):
+    # Solutions embed their comments and a vote count
+    return [
+        ('self', queryset, 'updated_at'),
+        ('comments', Comment.objects.filter(bug_solution__in=queryset), 'updated_at'),
+        ('upvotes', Upvote.objects.filter(bug_solution__in=queryset), 'created_at'),
+    ]
+
         
 # BugPostCreate
-class BugPostCreateView(viewsets.ModelViewSet):
+class BugPostCreateView(ReplicaReadsMixin, BulkMixin, FastReadMixin, SparseFieldsetMixin, CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    cache_namespace = 'bug-post'
+    bulk_invalidates = ('bug-post',)
+    created_event = events.POST_CREATED
+    throttle_scopes = {'create': 'create', 'bulk': 'create', 'bulk_tags': 'create'}
     authentication_classes = [
         authentication.SessionAuthentication,
-        authentication.TokenAuthentication
+        CachedTokenAuthentication
     ]
     queryset = BugPost.objects.all()
+    pagination_class = CreatedAtCursorPagination
     serializer_class = serializers.BugPostSerializer
+    fast_serializer_class = FastBugPostSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ['title']
     
 
+    # Joins and prefetches only for the fields the response will contain
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.use_fast_path():
+            return FastBugPostSerializer.project(queryset, self.get_shape()[0])
+        if self.wants('created_by'):
+            queryset = queryset.select_related('created_by')
+        if self.wants('tags'):
+            queryset = queryset.prefetch_related(Prefetch('tags', queryset=Tag.objects.order_by('id')))
+        if self.expands('solutions'):
+            queryset = queryset.prefetch_related(
+                Prefetch('solutions', queryset=BugSolution.objects.with_listing_data(self.request.user))
+            )
+        return self.only_requested(queryset, always=('id', 'created_at'))
+
+    def get_fingerprint_children(self, queryset):
+        # Posts embed their tags
+        return [('tags', Tag.post.through.objects.filter(bugpost__in=queryset), None)]
+
+    #Activity feed event for single and bulk creates
+    def created_event_row(self, post):
+        return post.pk, post.pk, {'title': post.title}
+
     #Set the user who created the BugPost
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        with transaction.atomic():
+            post = serializer.save(created_by=self.request.user)
+            object_id, post_id, data = self.created_event_row(post)
+            events.record(self.created_event, self.request.user, object_id, post_id=post_id, **data)
 
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'search', 'summary']:
             return [permissions.AllowAny()]
         elif self.action in ['update', 'partial_update', 'destroy']:
             return [permissions.IsAuthenticated(), OnlyAuthorEditsOrDeletes()]
@@ -71,7 +168,10 @@ class BugPostCreateView(viewsets.ModelViewSet):
 
         tag = get_object_or_404(Tag, id=tag_id)
 
-        post.tags.add(tag)
+        with transaction.atomic():
+            if not post.tags.filter(pk=tag.pk).exists():
+                post.tags.add(tag)
+                events.record(events.POST_TAGGED, request.user, tag.pk, post_id=post.pk, slug=tag.slug)
         serializer = self.get_serializer(post)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
@@ -90,29 +190,224 @@ class BugPostCreateView(viewsets.ModelViewSet):
         
         tag = get_object_or_404(Tag, id=tag_id)
         # remove the tag from the post (fix: use post.tags.remove)
-        post.tags.remove(tag)
+        with transaction.atomic():
+            if post.tags.filter(pk=tag.pk).exists():
+                post.tags.remove(tag)
+                events.record(events.POST_UNTAGGED, request.user, tag.pk, post_id=post.pk, slug=tag.slug)
 
         serializer = self.get_serializer(post)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
+    #Add and/or remove many tags on many posts in one request
+    @action(detail=False, methods=['post'])
+    def bulk_tags(self, request):
+        post_ids = request.data.get('posts')
+        to_add = request.data.get('add') or []
+        to_remove = request.data.get('remove') or []
+        if not isinstance(post_ids, list) or not post_ids:
+            return Response({"detail": "A list of post ids is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(to_add, list) or not isinstance(to_remove, list) or not (to_add or to_remove):
+            return Response({"detail": "Provide 'add' and/or 'remove' lists of tag ids or slugs."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(post_ids) > settings.API_BULK_MAX_ITEMS:
+            return Response({"detail": f"At most {settings.API_BULK_MAX_ITEMS} posts per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        refs = to_add + to_remove
+        if not all(isinstance(ref, (int, str)) for ref in refs):
+            return Response({"detail": "Tags must be given as ids or slugs."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Resolve every referenced tag, by id or slug, in one query
+        ids = {ref for ref in refs if is_id(ref)}
+        slugs = {ref for ref in refs if isinstance(ref, str)}
+        tags = list(Tag.objects.filter(Q(id__in=ids) | Q(slug__in=slugs)).values_list('id', 'slug'))
+        by_ref = {**{tag_id: tag_id for tag_id, _ in tags}, **{slug: tag_id for tag_id, slug in tags}}
+
+        def resolve(ref):
+            # A bool would otherwise find the tag with id 1 or 0
+            return None if isinstance(ref, bool) else by_ref.get(ref)
+
+        unknown_tags = [ref for ref in refs if resolve(ref) is None]
+        add_ids = {resolve(ref) for ref in to_add} - {None}
+        remove_ids = {resolve(ref) for ref in to_remove} - {None} - add_ids
+
+        # Only author or admin can retag a post
+        posts = dict(BugPost.objects.filter(pk__in=[pk for pk in post_ids if is_id(pk)]).values_list('id', 'created_by_id'))
+        missing_posts = [pk for pk in post_ids if not is_id(pk) or pk not in posts]
+        forbidden_posts = [pk for pk, author in posts.items() if author != request.user.pk and not request.user.is_staff]
+        allowed = set(posts) - set(forbidden_posts)
+
+        through = Tag.post.through
+        added, removed = [], []
+        with transaction.atomic():
+            if add_ids and allowed:
+                existing = set(through.objects.filter(bugpost_id__in=allowed, tag_id__in=add_ids).values_list('bugpost_id', 'tag_id'))
+                added = sorted({(post_id, tag_id) for post_id in allowed for tag_id in add_ids} - existing)
+                through.objects.bulk_create(
+                    [through(bugpost_id=post_id, tag_id=tag_id) for post_id, tag_id in added],
+                    ignore_conflicts=True,
+                )
+            if remove_ids and allowed:
+                links = through.objects.filter(bugpost_id__in=allowed, tag_id__in=remove_ids)
+                removed = sorted(links.values_list('bugpost_id', 'tag_id'))
+                links.delete()
+            slugs = {tag_id: slug for tag_id, slug in tags}
+            for kind, pairs in ((events.POST_TAGGED, added), (events.POST_UNTAGGED, removed)):
+                if pairs:
+                    events.record_many(kind, request.user, [
+                        (tag_id, post_id, {'slug': slugs[tag_id]}) for post_id, tag_id in pairs
+                    ])
+
+        if added or removed:
+            # Through-table writes send no m2m_changed
+            BugPost.objects.filter(pk__in={post_id for post_id, _ in added + removed}).touch()
+            invalidate('bug-post')
+        return Response({
+            'added': added,
+            'removed': removed,
+            'missing_posts': missing_posts,
+            'forbidden_posts': sorted(forbidden_posts),
+            'unknown_tags': unknown_tags,
+        }, status=status.HTTP_200_OK)
+
+    #Stream every post with its solutions and comments, see api/export.py
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        # ?format= is taken by DRF's renderer negotiation
+        output = request.query_params.get('output', 'ndjson')
+        if output not in ('ndjson', 'csv'):
+            return Response({"detail": "output must be 'ndjson' or 'csv'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        since = request.query_params.get('since')
+        if since:
+            since = parse_datetime(since)
+            if since is None:
+                return Response({"detail": "since must be an ISO 8601 datetime."}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        # Passed back as ?since=, the next export starts API_EXPORT_OVERLAP seconds before
+        # this one read, so writes committed during the read are included. Rows changed
+        # in that window are exported twice; consumers upsert by id.
+        watermark = timezone.now() - timedelta(seconds=settings.API_EXPORT_OVERLAP)
+        queryset = export_queryset(since or None)
+        chunk_size = settings.API_EXPORT_CHUNK_SIZE
+        if output == 'csv':
+            response = StreamingHttpResponse(iter_csv(queryset, chunk_size), content_type='text/csv; charset=utf-8')
+            response['Content-Disposition'] = 'attachment; filename="bug-posts.csv"'
+        else:
+            response = StreamingHttpResponse(iter_ndjson(queryset, chunk_size), content_type='application/x-ndjson')
+        response['X-Export-Watermark'] = watermark.isoformat()
+        return response
+
+    #Ranked full-text search over title and description, see api/search.py
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"detail": "Query parameter 'q' is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = int(request.query_params.get('limit', settings.API_PAGE_SIZE))
+        except ValueError:
+            return Response({"detail": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+        posts = search_posts(self.get_queryset(), query)[:limit]
+        results = []
+        for post in posts:
+            data = self.get_serializer(post).data
+            data['rank'] = post.rank
+            data['snippet'] = render_snippet(post.snippet)
+            results.append(data)
+        return Response({'count': len(results), 'results': results}, status=status.HTTP_200_OK)
+
+    #Solution, comment and vote counts plus last activity per post, one query per page
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        queryset = self.filter_queryset(BugPost.objects.all()).only('id', 'title', 'created_at', 'updated_at').with_summary()
+
+        # ?ids=1,2,3 -> just those posts, e.g. the ones a dashboard already shows
+        ids = request.query_params.get('ids')
+        if ids is not None:
+            try:
+                ids = {int(pk) for pk in ids.split(',') if pk.strip()}
+            except ValueError:
+                return Response({"detail": "ids must be a comma-separated list of integers."}, status=status.HTTP_400_BAD_REQUEST)
+            if len(ids) > settings.API_MAX_PAGE_SIZE:
+                return Response({"detail": f"At most {settings.API_MAX_PAGE_SIZE} ids per request."}, status=status.HTTP_400_BAD_REQUEST)
+            posts = queryset.filter(pk__in=ids).order_by('-created_at', '-id')
+            data = serializers.BugPostSummarySerializer(posts, many=True).data
+            return Response({'count': len(data), 'results': data})
+
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(serializers.BugPostSummarySerializer(page, many=True).data)
+
     #create an action that maps solutions to individual bug posts
     @action(detail=True, methods=['get'])
     def solutions(self, request, pk=None):
+        parts = solution_fingerprint_parts(filter_or_404(BugSolution.objects, bug_post_id=pk))
+        return self.conditional_response(parts, self._solutions, request, pk=pk)
+
+    def _solutions(self, request, pk=None):
         post = self.get_object()
-        solutions = post.solutions.all()
-        serializer = serializers.BugSolutionSerializer(solutions, many=True, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        fast = self.can_use_fast_path()
+        solutions = solution_listing(self, post.solutions.all(), always=('id', 'created_at', 'score'), fast=fast)
+
+        def serialize(rows):
+            if fast:
+                return self.get_fast_serializer(FastBugSolutionSerializer, rows, many=True).data
+            return serializers.BugSolutionSerializer(
+                rows, many=True, context={'request': request}, **self.get_shape_kwargs()
+            ).data
+
+        # ?top=k -> the k best solutions, straight off the (bug_post, -score, -id) index.
+        # Scores move with every vote and comment, so score order can't be paged with a
+        # cursor (rows would skip or repeat between pages); ?ordering=score is the top page_size.
+        ordering = request.query_params.get('ordering')
+        top = request.query_params.get('top')
+        if top is None and ordering == 'score':
+            top = self.paginator.get_page_size(request)
+        if top is not None:
+            try:
+                top = int(top)
+            except ValueError:
+                return Response({"detail": "top must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+            top = max(1, min(top, settings.API_MAX_PAGE_SIZE))
+            data = serialize(solutions.order_by('-score', '-id')[:top])
+            return Response({'count': len(data), 'results': data})
+
+        if ordering not in (None, '', 'created_at'):
+            return Response({"detail": "ordering must be 'score' or 'created_at'."}, status=status.HTTP_400_BAD_REQUEST)
+        page = self.paginate_queryset(solutions)
+        return self.get_paginated_response(serialize(page))
 
 # BugSolutionCreate
-class BugSolutionCreateView(viewsets.ModelViewSet):
-    authentication_classes = [authentication.SessionAuthentication, authentication.TokenAuthentication]
+class BugSolutionCreateView(ReplicaReadsMixin, BulkMixin, FastReadMixin, SparseFieldsetMixin, CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    cache_namespace = 'bug-solution'
+    bulk_invalidates = ('bug-solution',)
+    created_event = events.SOLUTION_CREATED
+    throttle_scopes = {'create': 'create', 'bulk': 'create', 'upvote': 'upvote'}
+    authentication_classes = [authentication.SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     queryset = BugSolution.objects.all()
+    pagination_class = CreatedAtCursorPagination
     serializer_class = serializers.BugSolutionSerializer
+    fast_serializer_class = FastBugSolutionSerializer
+
+    def get_queryset(self):
+        return solution_listing(self, super().get_queryset(), fast=self.use_fast_path())
+
+    def get_fingerprint_parts(self, queryset):
+        return solution_fingerprint_parts(queryset)
+
+    def created_event_row(self, solution):
+        return solution.pk, solution.bug_post_id, {}
 
     #Set the user who created the BugSolution
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        with transaction.atomic():
+            solution = serializer.save(created_by=self.request.user)
+            object_id, post_id, data = self.created_event_row(solution)
+            events.record(self.created_event, self.request.user, object_id, post_id=post_id, **data)
 
     #Override to allow anonymous list/retrieve but require auth for create
     def get_permissions(self):
@@ -134,21 +429,31 @@ class BugSolutionCreateView(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        vote, created = Upvote.objects.get_or_create(
-            user=user,
-            bug_solution=solution
-        )
+        with transaction.atomic():
+            vote, created = Upvote.objects.get_or_create(
+                user=user,
+                bug_solution=solution
+            )
 
-        if not created:
-            # User already voted -> unvote (toggle off)
-            vote.delete()
-            action = 'unvoted'
-            status_code = status.HTTP_200_OK
-        else:
-            # New vote -> toggle on
-            action = 'voted'
-            status_code = status.HTTP_201_CREATED
+            if not created:
+                # User already voted -> unvote (toggle off)
+                deleted, _ = Upvote.objects.filter(pk=vote.pk).delete()
+                if deleted:
+                    BugSolution.objects.filter(pk=solution.pk).update(vote_count=F('vote_count') - 1)
+                action = 'unvoted'
+                status_code = status.HTTP_200_OK
+            else:
+                # New vote -> toggle on
+                BugSolution.objects.filter(pk=solution.pk).update(vote_count=F('vote_count') + 1)
+                action = 'voted'
+                status_code = status.HTTP_201_CREATED
 
+            # Reload so the vote annotations reflect the toggle
+            solution = self.get_queryset().get(pk=solution.pk)
+            events.record(
+                events.VOTE_ADDED if created else events.VOTE_REMOVED, user, solution.pk,
+                post_id=solution.bug_post_id, vote_count=solution.vote_count,
+            )
         serializer = self.get_serializer(solution)
         return Response(
             {
@@ -160,15 +465,42 @@ class BugSolutionCreateView(viewsets.ModelViewSet):
 
     
 # CommentCreate
-class CommentCreateView(viewsets.ModelViewSet):
-    authentication_classes = [authentication.SessionAuthentication, authentication.TokenAuthentication]
+class CommentCreateView(ReplicaReadsMixin, BulkMixin, SparseFieldsetMixin, CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    cache_namespace = 'comment'
+    bulk_invalidates = ('comment', 'bug-solution')
+    created_event = events.COMMENT_CREATED
+    throttle_scopes = {'create': 'create', 'bulk': 'create'}
+    authentication_classes = [authentication.SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated,]
     queryset = Comment.objects.all()
+    pagination_class = CreatedAtCursorPagination
     serializer_class = serializers.CommentSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.wants('created_by'):
+            queryset = queryset.select_related('created_by')
+        return self.only_requested(queryset, always=('id', 'created_at'))
+
+    # Bulk writes skip the signal that keeps solution scores current.
+    # A comment moved to another solution changes the score of both.
+    _moved_from = ()
+
+    def bulk_updating(self, instances):
+        self._moved_from = [comment.bug_solution_id for comment in instances]
+
+    def bulk_written(self, instances):
+        refresh_scores([*self._moved_from, *(comment.bug_solution_id for comment in instances)])
+
+    def created_event_row(self, comment):
+        return comment.pk, comment.bug_solution.bug_post_id, {'bug_solution': comment.bug_solution_id}
+
     #Set the user who created the Comment
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        with transaction.atomic():
+            comment = serializer.save(created_by=self.request.user)
+            object_id, post_id, data = self.created_event_row(comment)
+            events.record(self.created_event, self.request.user, object_id, post_id=post_id, **data)
 
     #Override to allow anonymous list/retrieve but require auth for create
     def get_permissions(self):
@@ -180,11 +512,24 @@ class CommentCreateView(viewsets.ModelViewSet):
         return [permissions.IsAuthenticated()]
 
 # TagCreate
-class TagCreateView(viewsets.ModelViewSet):
-    authentication_classes = [authentication.SessionAuthentication, authentication.TokenAuthentication]
+class TagCreateView(ReplicaReadsMixin, SparseFieldsetMixin, CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    cache_namespace = 'tag'
+    throttle_scopes = {'create': 'create'}
+    authentication_classes = [authentication.SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated,permissions.IsAdminUser]
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    pagination_class = TagCursorPagination
+    # Tags carry no timestamp, so they only get an ETag
+    timestamp_field = None
+
+    def get_queryset(self):
+        return self.only_requested(super().get_queryset())
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            tag = serializer.save()
+            events.record(events.TAG_CREATED, self.request.user, tag.pk, name=tag.name, slug=tag.slug)
 
     #Override to allow anonymous list/retrieve but require admin for create
     def get_permissions(self):
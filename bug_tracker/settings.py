@@ -51,10 +51,14 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     'drf_spectacular',
     'api',
+    'accounts',
     'django_filters',
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestMetricsMiddleware',
+    'api.compression.CompressionMiddleware',
+    'api.throttling.RateLimitHeadersMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -109,15 +113,35 @@ DATABASES = {
     )
 }
 
+# Read replicas (api/routers.py): DATABASE_REPLICA_URLS is a comma-separated
+# list of database URLs, added as replica_0, replica_1, ... Safe requests to
+# the api viewsets read from them; writes always go to the primary.
+for index, url in enumerate(url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()):
+    DATABASES[f'replica_{index}'] = dj_database_url.parse(url, conn_max_age=600, ssl_require=True)
+API_REPLICA_ALIASES = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+# After a write, the same user/session reads from the primary this long (replica lag budget)
+API_REPLICA_STICKY_SECONDS = int(os.getenv('API_REPLICA_STICKY_SECONDS', '5'))
+# A replica that failed a connection or query is skipped this long
+API_REPLICA_RETRY_SECONDS = int(os.getenv('API_REPLICA_RETRY_SECONDS', '30'))
+
 
 # Use in-memory SQLite database when running tests to make it easy for
 # contributors to run tests locally without setting up MySQL.
 import sys
 if 'test' in sys.argv or os.getenv('USE_SQLITE_FOR_TESTS') == '1':
-    DATABASES['default'] = {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': ':memory:',
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
+        # A separate database; the routing tests turn it on with API_REPLICA_ALIASES
+        'replica': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
     }
+    API_REPLICA_ALIASES = []
 
 
 # Password validation
@@ -161,7 +185,125 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # orjson-backed when installed, stdlib json otherwise (api/renderers.py, api/parsers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Only act on views/actions with a throttle scope, see api/throttling.py
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.UserBucketThrottle',
+        'api.throttling.TokenBucketThrottle',
+        'api.throttling.IPBucketThrottle',
+    ],
+    # Reverse proxies that append to X-Forwarded-For; with 0, client IPs are REMOTE_ADDR
+    # and a client-supplied X-Forwarded-For can't move a request to another bucket
+    'NUM_PROXIES': int(os.getenv('API_NUM_PROXIES', '0')),
+}
+
+# Cursor pagination used by the api viewsets
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', '20'))
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '100'))
+
+# Response cache for anonymous list/retrieve requests (api/cache.py).
+# API_CACHE_BACKEND accepts any Django cache backend, e.g.
+# django.core.cache.backends.filebased.FileBasedCache or
+# django.core.cache.backends.redis.RedisCache with API_CACHE_LOCATION set.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': os.getenv('API_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('API_CACHE_LOCATION', 'api-responses'),
+    },
+}
+API_CACHE_ALIAS = 'api'
+API_CACHE_ENABLED = os.getenv('API_CACHE_ENABLED', 'True').lower() == 'true'
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', '300'))
+# Bump when a serializer's output changes shape to orphan old entries
+API_CACHE_VERSION = 1
+
+# Token authentication cache (accounts/authentication.py). Set
+# AUTH_TOKEN_CACHE_ALIAS to a CACHES alias to share entries between processes.
+AUTH_TOKEN_CACHE_ALIAS = os.getenv('AUTH_TOKEN_CACHE_ALIAS') or None
+# Without a shared alias, other worker processes keep accepting a revoked token
+# until their own entry expires, so the default window is short
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', '60' if AUTH_TOKEN_CACHE_ALIAS else '5'))
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', '10000'))
+
+# Login credential checks (accounts/login.py): how long verified credentials
+# are remembered (0 disables), in-process entries, optional shared CACHES
+# alias, and the threads available for password hashing
+AUTH_LOGIN_CACHE_TTL = int(os.getenv('AUTH_LOGIN_CACHE_TTL', '300'))
+AUTH_LOGIN_CACHE_SIZE = int(os.getenv('AUTH_LOGIN_CACHE_SIZE', '10000'))
+AUTH_LOGIN_CACHE_ALIAS = os.getenv('AUTH_LOGIN_CACHE_ALIAS') or None
+AUTH_HASH_WORKERS = int(os.getenv('AUTH_HASH_WORKERS', str(os.cpu_count() or 1)))
+
+# List-payload bulk endpoints (api/bulk.py)
+API_BULK_MAX_ITEMS = int(os.getenv('API_BULK_MAX_ITEMS', '1000'))
+API_BULK_BATCH_SIZE = int(os.getenv('API_BULK_BATCH_SIZE', '500'))
+
+# Also render every response with stdlib json and log differences from orjson (api/renderers.py)
+API_JSON_VERIFY = os.getenv('API_JSON_VERIFY', 'False').lower() == 'true'
+
+# Serve JSON list/retrieve of posts and solutions through api/fastpath.py
+API_FAST_READS = os.getenv('API_FAST_READS', 'True').lower() == 'true'
+
+# Rows per query chunk of the streaming export (api/export.py)
+API_EXPORT_CHUNK_SIZE = int(os.getenv('API_EXPORT_CHUNK_SIZE', '500'))
+# X-Export-Watermark lags the read by this much, longer than any write transaction runs
+API_EXPORT_OVERLAP = int(os.getenv('API_EXPORT_OVERLAP', '300'))
+
+# Request metrics (api/middleware.py); log the SQL of requests slower than this, 0 disables
+API_SLOW_REQUEST_MS = int(os.getenv('API_SLOW_REQUEST_MS', '0'))
+# Bearer token for scraping /metrics/ and /cache-stats/; empty leaves it to staff sessions
+API_METRICS_TOKEN = os.getenv('API_METRICS_TOKEN', '')
+
+# Activity feed (api/events.py): events per read, longest long-poll and its
+# polling interval in seconds, how long a sequence hole may still fill, and
+# how many days of events compact_events keeps
+API_FEED_BATCH_SIZE = int(os.getenv('API_FEED_BATCH_SIZE', '500'))
+API_FEED_MAX_WAIT = int(os.getenv('API_FEED_MAX_WAIT', '30'))
+API_FEED_POLL_INTERVAL = float(os.getenv('API_FEED_POLL_INTERVAL', '0.5'))
+API_FEED_SETTLE_SECONDS = float(os.getenv('API_FEED_SETTLE_SECONDS', '2'))
+API_FEED_RETENTION_DAYS = int(os.getenv('API_FEED_RETENTION_DAYS', '7'))
+
+# Live post streams (api/pubsub.py, api/async_views.py): fan-out backend,
+# messages queued per subscriber before it catches up from the event log,
+# keepalive interval in seconds and the client reconnect delay
+API_PUBSUB_BACKEND = os.getenv('API_PUBSUB_BACKEND', 'api.pubsub.LocalBackend')
+API_PUBSUB_QUEUE_SIZE = int(os.getenv('API_PUBSUB_QUEUE_SIZE', '100'))
+API_SSE_HEARTBEAT = int(os.getenv('API_SSE_HEARTBEAT', '15'))
+API_SSE_RETRY_MS = int(os.getenv('API_SSE_RETRY_MS', '3000'))
+
+# Token-bucket throttling (api/throttling.py): '<requests>/<s|min|hour|day>'
+# per scope, an empty value disables a scope. Buckets are kept in the
+# API_THROTTLE_CACHE_ALIAS cache when set (shared between processes), else in
+# a per-process table of at most API_THROTTLE_MEMORY_SIZE buckets.
+API_THROTTLE_RATES = {
+    'login': os.getenv('API_THROTTLE_LOGIN', '10/min'),
+    'login-username': os.getenv('API_THROTTLE_LOGIN_USERNAME', '5/min'),
+    'register': os.getenv('API_THROTTLE_REGISTER', '5/hour'),
+    'create': os.getenv('API_THROTTLE_CREATE', '60/min'),
+    'upvote': os.getenv('API_THROTTLE_UPVOTE', '30/min'),
 }
+API_THROTTLE_CACHE_ALIAS = os.getenv('API_THROTTLE_CACHE_ALIAS') or None
+API_THROTTLE_MEMORY_SIZE = int(os.getenv('API_THROTTLE_MEMORY_SIZE', '100000'))
+# Test clients write far faster than any limit; throttling tests set their own rates
+if 'test' in sys.argv:
+    API_THROTTLE_RATES = {}
+
+# Response compression (api/compression.py); brotli is offered when the brotli package is installed
+API_COMPRESSION_ENABLED = os.getenv('API_COMPRESSION_ENABLED', 'True').lower() == 'true'
+API_COMPRESSION_MIN_BYTES = int(os.getenv('API_COMPRESSION_MIN_BYTES', '1024'))
+API_COMPRESSION_GZIP_LEVEL = int(os.getenv('API_COMPRESSION_GZIP_LEVEL', '6'))
+API_COMPRESSION_BROTLI_QUALITY = int(os.getenv('API_COMPRESSION_BROTLI_QUALITY', '5'))
 
 SPECTACULAR_SETTINGS = {
     'TITLE': 'ALX Bug Tracker API',